@@ -1299,6 +1299,11 @@ WEBHOOK_URL = PersistentConfig(
 
 ENABLE_ADMIN_EXPORT = os.environ.get("ENABLE_ADMIN_EXPORT", "True").lower() == "true"
 
+# Chats read per query when streaming an export, and written per transaction
+# when streaming an import
+CHAT_EXPORT_BATCH_SIZE = int(os.environ.get("CHAT_EXPORT_BATCH_SIZE", "100"))
+CHAT_IMPORT_BATCH_SIZE = int(os.environ.get("CHAT_IMPORT_BATCH_SIZE", "100"))
+
 ENABLE_ADMIN_CHAT_ACCESS = (
     os.environ.get("ENABLE_ADMIN_CHAT_ACCESS", "True").lower() == "true"
 )
@@ -1844,6 +1849,26 @@ if VECTOR_DB == "chroma":
     CHROMA_HTTP_SSL = os.environ.get("CHROMA_HTTP_SSL", "false").lower() == "true"
 # this uses the model defined in the Dockerfile ENV variable. If you dont use docker or docker based deployments such as k8s, the default embedding model will be used (sentence-transformers/all-MiniLM-L6-v2)
 
+# Local
+LOCAL_VECTOR_DB_PATH = os.environ.get(
+    "LOCAL_VECTOR_DB_PATH", f"{DATA_DIR}/vector_db/local"
+)
+# float16 halves the size of the vectors on disk and in the page cache
+LOCAL_VECTOR_DB_DTYPE = os.environ.get("LOCAL_VECTOR_DB_DTYPE", "float32")
+# Collections are searched exhaustively below this size, through IVF above
+LOCAL_VECTOR_DB_IVF_MIN_SIZE = int(
+    os.environ.get("LOCAL_VECTOR_DB_IVF_MIN_SIZE", "50000")
+)
+# Share of the IVF lists probed per query. With sqrt(n) lists, a fixed count
+# would probe a shrinking share of a growing collection and lose recall
+LOCAL_VECTOR_DB_IVF_PROBE_RATIO = float(
+    os.environ.get("LOCAL_VECTOR_DB_IVF_PROBE_RATIO", "0.15")
+)
+# Collections are compacted once this share of their rows are tombstones
+LOCAL_VECTOR_DB_COMPACT_RATIO = float(
+    os.environ.get("LOCAL_VECTOR_DB_COMPACT_RATIO", "0.2")
+)
+
 # Milvus
 
 MILVUS_URI = os.environ.get("MILVUS_URI", f"{DATA_DIR}/vector_db/milvus.db")
@@ -2289,6 +2314,82 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Cache of computed embeddings: "" (disabled), "sqlite" or "redis"
+RAG_EMBEDDING_CACHE = os.environ.get("RAG_EMBEDDING_CACHE", "").lower()
+
+RAG_EMBEDDING_CACHE_PATH = os.environ.get(
+    "RAG_EMBEDDING_CACHE_PATH", f"{CACHE_DIR}/embeddings.db"
+)
+
+RAG_EMBEDDING_CACHE_REDIS_URL = os.environ.get(
+    "RAG_EMBEDDING_CACHE_REDIS_URL", REDIS_URL
+)
+
+# Least recently used embeddings are evicted past this many entries (sqlite)
+RAG_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_MAX_ENTRIES", "1000000")
+)
+
+# Embeddings unused for this many seconds expire (redis)
+RAG_EMBEDDING_CACHE_TTL = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_TTL", str(30 * 24 * 60 * 60))
+)
+
+# Embedding API batches in flight at once, per process
+RAG_EMBEDDING_CONCURRENT_REQUESTS = int(
+    os.environ.get("RAG_EMBEDDING_CONCURRENT_REQUESTS", "4")
+)
+
+# Upper bound of the estimated tokens of an embedding API batch
+RAG_EMBEDDING_BATCH_MAX_TOKENS = int(
+    os.environ.get("RAG_EMBEDDING_BATCH_MAX_TOKENS", "100000")
+)
+
+RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "5"))
+
+# Chunks embedded and inserted together when ingesting documents
+RAG_INGESTION_BATCH_SIZE = int(os.environ.get("RAG_INGESTION_BATCH_SIZE", "256"))
+
+# Characters of split text waiting to be embedded while ingesting a file
+RAG_INGESTION_MAX_BUFFER_SIZE = int(
+    os.environ.get("RAG_INGESTION_MAX_BUFFER_SIZE", str(8 * 1024 * 1024))
+)
+
+# Background ingestion jobs run at once, per process
+RAG_INGESTION_JOB_WORKERS = int(os.environ.get("RAG_INGESTION_JOB_WORKERS", "2"))
+
+RAG_INGESTION_JOB_MAX_ATTEMPTS = int(
+    os.environ.get("RAG_INGESTION_JOB_MAX_ATTEMPTS", "3")
+)
+
+# Seconds between checks for jobs queued by other instances
+RAG_INGESTION_JOB_POLL_INTERVAL = int(
+    os.environ.get("RAG_INGESTION_JOB_POLL_INTERVAL", "5")
+)
+
+# Running jobs not heard from for this many seconds are requeued
+RAG_INGESTION_JOB_STALE_TIMEOUT = int(
+    os.environ.get("RAG_INGESTION_JOB_STALE_TIMEOUT", "300")
+)
+
+# Files embedded at once when reindexing the knowledge bases
+RAG_REINDEX_CONCURRENCY = int(os.environ.get("RAG_REINDEX_CONCURRENCY", "4"))
+
+# Cache of retrieval results: "" (disabled), "memory" or "redis"
+RAG_RETRIEVAL_CACHE = os.environ.get("RAG_RETRIEVAL_CACHE", "").lower()
+
+RAG_RETRIEVAL_CACHE_REDIS_URL = os.environ.get(
+    "RAG_RETRIEVAL_CACHE_REDIS_URL", REDIS_URL
+)
+
+# Retrieval results are reused for this many seconds
+RAG_RETRIEVAL_CACHE_TTL = int(os.environ.get("RAG_RETRIEVAL_CACHE_TTL", "300"))
+
+# Least recently used results are evicted past this many entries (memory)
+RAG_RETRIEVAL_CACHE_MAX_ENTRIES = int(
+    os.environ.get("RAG_RETRIEVAL_CACHE_MAX_ENTRIES", "1000")
+)
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -2516,6 +2617,43 @@ WEB_SEARCH_TRUST_ENV = PersistentConfig(
     os.getenv("WEB_SEARCH_TRUST_ENV", "False").lower() == "true",
 )
 
+# Seconds to fetch a page before giving up on it
+WEB_LOADER_PAGE_TIMEOUT = float(os.environ.get("WEB_LOADER_PAGE_TIMEOUT", "10"))
+
+# Pages of the same host fetched at once
+WEB_LOADER_CONCURRENT_REQUESTS_PER_HOST = int(
+    os.environ.get("WEB_LOADER_CONCURRENT_REQUESTS_PER_HOST", "2")
+)
+
+# Web search stops loading pages past this many characters (0 for no limit)
+WEB_SEARCH_MAX_CONTENT_SIZE = int(os.environ.get("WEB_SEARCH_MAX_CONTENT_SIZE", "0"))
+
+# Web search stops loading pages after this many seconds (0 for no limit)
+WEB_SEARCH_LOAD_TIMEOUT = float(os.environ.get("WEB_SEARCH_LOAD_TIMEOUT", "0"))
+
+# Cache of loaded web pages: "" (disabled), "sqlite" or "redis"
+WEB_LOADER_CACHE = os.environ.get("WEB_LOADER_CACHE", "").lower()
+
+WEB_LOADER_CACHE_PATH = os.environ.get(
+    "WEB_LOADER_CACHE_PATH", f"{CACHE_DIR}/web_pages.db"
+)
+
+WEB_LOADER_CACHE_REDIS_URL = os.environ.get("WEB_LOADER_CACHE_REDIS_URL", REDIS_URL)
+
+# Cached pages are served without revalidation for this many seconds, or
+# less if the page says so
+WEB_LOADER_CACHE_MAX_AGE = int(os.environ.get("WEB_LOADER_CACHE_MAX_AGE", "3600"))
+
+# Least recently used pages are evicted past this many bytes (sqlite)
+WEB_LOADER_CACHE_MAX_SIZE = int(
+    os.environ.get("WEB_LOADER_CACHE_MAX_SIZE", str(512 * 1024 * 1024))
+)
+
+# Pages unused for this many seconds expire (redis)
+WEB_LOADER_CACHE_TTL = int(
+    os.environ.get("WEB_LOADER_CACHE_TTL", str(7 * 24 * 60 * 60))
+)
+
 
 SEARXNG_QUERY_URL = PersistentConfig(
     "SEARXNG_QUERY_URL",
@@ -341,6 +341,20 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Streamed message saves are coalesced and written at most once per interval
+# (seconds), or earlier once this many bytes of content are pending
+REALTIME_CHAT_SAVE_INTERVAL = os.environ.get("REALTIME_CHAT_SAVE_INTERVAL", "1")
+try:
+    REALTIME_CHAT_SAVE_INTERVAL = float(REALTIME_CHAT_SAVE_INTERVAL)
+except ValueError:
+    REALTIME_CHAT_SAVE_INTERVAL = 1.0
+
+REALTIME_CHAT_SAVE_MAX_BYTES = os.environ.get("REALTIME_CHAT_SAVE_MAX_BYTES", "32768")
+try:
+    REALTIME_CHAT_SAVE_MAX_BYTES = int(REALTIME_CHAT_SAVE_MAX_BYTES)
+except ValueError:
+    REALTIME_CHAT_SAVE_MAX_BYTES = 32768
+
 ####################################
 # REDIS
 ####################################
@@ -497,6 +511,40 @@ WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Batch the chat events of a streamed message and send content as deltas
+ENABLE_CHAT_EVENT_BATCHING = (
+    os.environ.get("ENABLE_CHAT_EVENT_BATCHING", "False").lower() == "true"
+)
+
+# Batching window in seconds
+CHAT_EVENT_BATCH_INTERVAL = os.environ.get("CHAT_EVENT_BATCH_INTERVAL", "0.04")
+try:
+    CHAT_EVENT_BATCH_INTERVAL = float(CHAT_EVENT_BATCH_INTERVAL)
+except ValueError:
+    CHAT_EVENT_BATCH_INTERVAL = 0.04
+
+# The Yjs update log of a collaborative document is merged into a single
+# update once it holds this many updates or bytes
+YDOC_COMPACT_UPDATE_COUNT = os.environ.get("YDOC_COMPACT_UPDATE_COUNT", "100")
+try:
+    YDOC_COMPACT_UPDATE_COUNT = int(YDOC_COMPACT_UPDATE_COUNT)
+except ValueError:
+    YDOC_COMPACT_UPDATE_COUNT = 100
+
+YDOC_COMPACT_UPDATE_BYTES = os.environ.get("YDOC_COMPACT_UPDATE_BYTES", "1048576")
+try:
+    YDOC_COMPACT_UPDATE_BYTES = int(YDOC_COMPACT_UPDATE_BYTES)
+except ValueError:
+    YDOC_COMPACT_UPDATE_BYTES = 1048576
+
+# Interval in seconds of the cleanup of collaborative document sessions
+# whose disconnect was never handled
+YDOC_RECONCILE_INTERVAL = os.environ.get("YDOC_RECONCILE_INTERVAL", "300")
+try:
+    YDOC_RECONCILE_INTERVAL = int(YDOC_RECONCILE_INTERVAL)
+except ValueError:
+    YDOC_RECONCILE_INTERVAL = 300
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -59,6 +59,7 @@ from open_webui.socket.main import (
     periodic_usage_pool_cleanup,
     get_models_in_use,
     get_active_user_ids,
+    emit_to_user,
 )
 from open_webui.routers import (
     audio,
@@ -451,6 +452,8 @@ from open_webui.utils.plugin import install_tool_and_function_dependencies
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 from open_webui.utils.redis import get_redis_connection
+from open_webui.utils.write_buffer import CHAT_MESSAGE_WRITE_BUFFER
+from open_webui.retrieval.jobs import INGESTION_JOB_QUEUE
 
 from open_webui.tasks import (
     redis_task_command_listener,
@@ -538,6 +541,8 @@ async def lifespan(app: FastAPI):
 
     asyncio.create_task(periodic_usage_pool_cleanup())
 
+    INGESTION_JOB_QUEUE.start(app, emit=emit_to_user)
+
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         await get_all_models(
             Request(
@@ -564,6 +569,10 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    await INGESTION_JOB_QUEUE.stop()
+
+    CHAT_MESSAGE_WRITE_BUFFER.flush_all()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -1720,7 +1729,10 @@ async def get_current_usage(user=Depends(get_verified_user)):
     This is an experimental endpoint and subject to change.
     """
     try:
-        return {"model_ids": get_models_in_use(), "user_ids": get_active_user_ids()}
+        return {
+            "model_ids": await get_models_in_use(),
+            "user_ids": await get_active_user_ids(),
+        }
     except Exception as e:
         log.error(f"Error getting usage statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -0,0 +1,53 @@
+"""Add BM25 index tables
+
+Revision ID: 3e5a7c9b1f20
+Revises: b8e9c6a1d4f2
+Create Date: 2025-07-22 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "3e5a7c9b1f20"
+down_revision = "b8e9c6a1d4f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "bm25_collection",
+        sa.Column("name", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("doc_count", sa.BigInteger(), nullable=False),
+        sa.Column("total_length", sa.BigInteger(), nullable=False),
+    )
+
+    op.create_table(
+        "bm25_document",
+        sa.Column("collection_name", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("id", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("meta", sa.JSON(), nullable=True),
+        sa.Column("length", sa.Integer(), nullable=False),
+    )
+
+    op.create_table(
+        "bm25_posting",
+        sa.Column("collection_name", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("term", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("document_id", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("tf", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_bm25_posting_document",
+        "bm25_posting",
+        ["collection_name", "document_id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_bm25_posting_document", table_name="bm25_posting")
+    op.drop_table("bm25_posting")
+    op.drop_table("bm25_document")
+    op.drop_table("bm25_collection")
@@ -0,0 +1,47 @@
+"""Add ingestion job table
+
+Revision ID: 5d2f8a1c7e34
+Revises: 3e5a7c9b1f20
+Create Date: 2025-07-24 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "5d2f8a1c7e34"
+down_revision = "3e5a7c9b1f20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ingestion_job",
+        sa.Column("id", sa.String(), nullable=False, primary_key=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("progress", sa.JSON(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("run_at", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.BigInteger(), nullable=False),
+    )
+    op.create_index(
+        "ix_ingestion_job_status_run_at", "ingestion_job", ["status", "run_at"]
+    )
+    op.create_index(
+        "ix_ingestion_job_user_id_created_at",
+        "ingestion_job",
+        ["user_id", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_ingestion_job_user_id_created_at", table_name="ingestion_job")
+    op.drop_index("ix_ingestion_job_status_run_at", table_name="ingestion_job")
+    op.drop_table("ingestion_job")
@@ -0,0 +1,23 @@
+"""Add checkpoint to ingestion job
+
+Revision ID: 8c4e1f6a2b93
+Revises: 5d2f8a1c7e34
+Create Date: 2025-07-28 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "8c4e1f6a2b93"
+down_revision = "5d2f8a1c7e34"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("ingestion_job", sa.Column("checkpoint", sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("ingestion_job", "checkpoint")
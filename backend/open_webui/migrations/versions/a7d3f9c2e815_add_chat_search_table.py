@@ -0,0 +1,144 @@
+"""Add chat search table
+
+Revision ID: a7d3f9c2e815
+Revises: 8c4e1f6a2b93
+Create Date: 2025-08-02 10:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "a7d3f9c2e815"
+down_revision = "8c4e1f6a2b93"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+chat_table = table(
+    "chat",
+    column("id", sa.String()),
+    column("user_id", sa.String()),
+    column("title", sa.Text()),
+)
+
+chat_message_table = table(
+    "chat_message",
+    column("chat_id", sa.Text()),
+    column("content", sa.Text()),
+    column("created_at", sa.BigInteger()),
+)
+
+chat_search_table = table(
+    "chat_search",
+    column("chat_id", sa.Text()),
+    column("user_id", sa.Text()),
+    column("title", sa.Text()),
+    column("content", sa.Text()),
+    column("indexed_at", sa.BigInteger()),
+)
+
+
+def upgrade():
+    op.create_table(
+        "chat_search",
+        sa.Column("id", sa.Integer(), nullable=False, primary_key=True),
+        sa.Column("chat_id", sa.Text(), nullable=False, unique=True),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("title", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("indexed_at", sa.BigInteger(), nullable=False),
+    )
+    op.create_index("ix_chat_search_user_id", "chat_search", ["user_id"])
+
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == "sqlite":
+        # External content FTS5 table over chat_search, kept in sync by triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE chat_search_fts USING fts5("
+            "title, content, content='chat_search', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER chat_search_ai AFTER INSERT ON chat_search BEGIN "
+            "INSERT INTO chat_search_fts(rowid, title, content) "
+            "VALUES (new.id, new.title, new.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER chat_search_ad AFTER DELETE ON chat_search BEGIN "
+            "INSERT INTO chat_search_fts(chat_search_fts, rowid, title, content) "
+            "VALUES ('delete', old.id, old.title, old.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER chat_search_au AFTER UPDATE ON chat_search BEGIN "
+            "INSERT INTO chat_search_fts(chat_search_fts, rowid, title, content) "
+            "VALUES ('delete', old.id, old.title, old.content); "
+            "INSERT INTO chat_search_fts(rowid, title, content) "
+            "VALUES (new.id, new.title, new.content); END"
+        )
+    elif dialect_name == "postgresql":
+        op.execute(
+            "ALTER TABLE chat_search ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(content, '')), 'B')"
+            ") STORED"
+        )
+        op.execute(
+            "CREATE INDEX ix_chat_search_search_vector "
+            "ON chat_search USING GIN (search_vector)"
+        )
+
+    # Backfill from the titles and messages of the chats, indexed by the
+    # triggers and generated column above. Shared chats are never searched
+    conn = op.get_bind()
+    chats = conn.execute(
+        sa.select(chat_table.c.id, chat_table.c.user_id, chat_table.c.title).where(
+            ~chat_table.c.user_id.like("shared-%")
+        )
+    ).fetchall()
+    now = int(time.time())
+
+    for idx in range(0, len(chats), BATCH_SIZE):
+        batch = chats[idx : idx + BATCH_SIZE]
+        contents = {chat.id: [] for chat in batch}
+        for chat_id, content in conn.execute(
+            sa.select(chat_message_table.c.chat_id, chat_message_table.c.content)
+            .where(
+                chat_message_table.c.chat_id.in_(list(contents)),
+                chat_message_table.c.content != None,
+            )
+            .order_by(chat_message_table.c.created_at)
+        ):
+            contents[chat_id].append(content)
+
+        conn.execute(
+            sa.insert(chat_search_table),
+            [
+                {
+                    "chat_id": chat.id,
+                    "user_id": chat.user_id,
+                    "title": chat.title,
+                    "content": "\n".join(contents[chat.id]),
+                    "indexed_at": now,
+                }
+                for chat in batch
+            ],
+        )
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS chat_search_au")
+        op.execute("DROP TRIGGER IF EXISTS chat_search_ad")
+        op.execute("DROP TRIGGER IF EXISTS chat_search_ai")
+        op.execute("DROP TABLE IF EXISTS chat_search_fts")
+    elif dialect_name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_chat_search_search_vector")
+
+    op.drop_index("ix_chat_search_user_id", table_name="chat_search")
+    op.drop_table("chat_search")
@@ -0,0 +1,38 @@
+"""Add chat list indexes
+
+Revision ID: b4e8d2a61c07
+Revises: a7d3f9c2e815
+Create Date: 2025-08-04 10:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "b4e8d2a61c07"
+down_revision = "a7d3f9c2e815"
+branch_labels = None
+depends_on = None
+
+# Chat lists are ordered by (updated_at, id) and paginated by keyset on it
+INDEXES = {
+    "ix_chat_user_id_updated_at": ["user_id", "updated_at", "id"],
+    "ix_chat_user_id_archived_updated_at": ["user_id", "archived", "updated_at", "id"],
+    "ix_chat_user_id_archived_pinned_folder_id_updated_at": [
+        "user_id",
+        "archived",
+        "pinned",
+        "folder_id",
+        "updated_at",
+        "id",
+    ],
+}
+
+
+def upgrade():
+    for name, columns in INDEXES.items():
+        op.create_index(name, "chat", columns)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name="chat")
@@ -0,0 +1,159 @@
+"""Add chat message table
+
+Revision ID: b8e9c6a1d4f2
+Revises: d31026856c01
+Create Date: 2025-07-20 03:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "b8e9c6a1d4f2"
+down_revision = "d31026856c01"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 100
+
+chat_table = table(
+    "chat",
+    column("id", sa.String()),
+    column("chat", sa.JSON()),
+)
+
+chat_message_table = table(
+    "chat_message",
+    column("chat_id", sa.Text()),
+    column("id", sa.Text()),
+    column("parent_id", sa.Text()),
+    column("role", sa.Text()),
+    column("content", sa.Text()),
+    column("data", sa.JSON()),
+    column("created_at", sa.BigInteger()),
+    column("updated_at", sa.BigInteger()),
+)
+
+
+def get_messages_list(messages, message_id):
+    messages_list = []
+    visited = set()
+
+    while message_id and message_id in messages and message_id not in visited:
+        visited.add(message_id)
+        messages_list.append(messages[message_id])
+        message_id = messages[message_id].get("parentId")
+
+    return messages_list[::-1]
+
+
+def upgrade():
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("id", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("parent_id", sa.Text(), nullable=True),
+        sa.Column("role", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+
+    # Backfill: move `history.messages` of every chat into the new table
+    conn = op.get_bind()
+    chat_ids = [row.id for row in conn.execute(sa.select(chat_table.c.id))]
+    now = int(time.time())
+
+    for idx in range(0, len(chat_ids), BATCH_SIZE):
+        rows = conn.execute(
+            sa.select(chat_table.c.id, chat_table.c.chat).where(
+                chat_table.c.id.in_(chat_ids[idx : idx + BATCH_SIZE])
+            )
+        ).fetchall()
+
+        for row in rows:
+            chat = row.chat
+            if not isinstance(chat, dict):
+                continue
+
+            history = chat.get("history")
+            if not isinstance(history, dict) or not isinstance(
+                history.get("messages"), dict
+            ):
+                continue
+
+            chat_messages = []
+            for message_id, message in history["messages"].items():
+                if not isinstance(message, dict):
+                    continue
+
+                content = message.get("content")
+                if isinstance(content, str):
+                    content = content.replace("\x00", "")
+                    data = {k: v for k, v in message.items() if k != "content"}
+                else:
+                    content = None
+                    data = message
+
+                chat_messages.append(
+                    {
+                        "chat_id": row.id,
+                        "id": message_id,
+                        "parent_id": message.get("parentId"),
+                        "role": message.get("role"),
+                        "content": content,
+                        "data": data,
+                        "created_at": message.get("timestamp", now),
+                        "updated_at": now,
+                    }
+                )
+
+            if chat_messages:
+                conn.execute(sa.insert(chat_message_table), chat_messages)
+
+            chat = {k: v for k, v in chat.items() if k != "messages"}
+            chat["history"] = {k: v for k, v in history.items() if k != "messages"}
+            conn.execute(
+                sa.update(chat_table).where(chat_table.c.id == row.id).values(chat=chat)
+            )
+
+
+def downgrade():
+    # Restore the message history into the chat blobs
+    conn = op.get_bind()
+    chat_ids = [
+        row.chat_id
+        for row in conn.execute(sa.select(chat_message_table.c.chat_id).distinct())
+    ]
+
+    for chat_id in chat_ids:
+        chat = conn.execute(
+            sa.select(chat_table.c.chat).where(chat_table.c.id == chat_id)
+        ).scalar()
+        if not isinstance(chat, dict):
+            continue
+
+        messages = {}
+        for row in conn.execute(
+            sa.select(chat_message_table).where(chat_message_table.c.chat_id == chat_id)
+        ):
+            message = dict(row.data or {})
+            if row.content is not None:
+                message["content"] = row.content
+            messages[row.id] = message
+
+        history = {**chat.get("history", {}), "messages": messages}
+        chat = {
+            **chat,
+            "history": history,
+            "messages": get_messages_list(messages, history.get("currentId")),
+        }
+        conn.execute(
+            sa.update(chat_table).where(chat_table.c.id == chat_id).values(chat=chat)
+        )
+
+    op.drop_table("chat_message")
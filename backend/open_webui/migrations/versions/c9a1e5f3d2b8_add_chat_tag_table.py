@@ -0,0 +1,65 @@
+"""Add chat tag table
+
+Revision ID: c9a1e5f3d2b8
+Revises: b4e8d2a61c07
+Create Date: 2025-08-06 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c9a1e5f3d2b8"
+down_revision = "b4e8d2a61c07"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "chat_tag",
+        sa.Column("chat_id", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("tag_id", sa.Text(), nullable=False, primary_key=True),
+        sa.Column("user_id", sa.Text(), nullable=False),
+    )
+    op.create_index("ix_chat_tag_user_id_tag_id", "chat_tag", ["user_id", "tag_id"])
+
+    # Backfill from the tags in the meta of the chats
+    conn = op.get_bind()
+    chat = sa.table(
+        "chat",
+        sa.column("id", sa.Text()),
+        sa.column("user_id", sa.Text()),
+        sa.column("meta", sa.JSON()),
+    )
+    chat_tag = sa.table(
+        "chat_tag",
+        sa.column("chat_id", sa.Text()),
+        sa.column("tag_id", sa.Text()),
+        sa.column("user_id", sa.Text()),
+    )
+
+    rows = []
+    result = conn.execution_options(stream_results=True).execute(
+        sa.select(chat.c.id, chat.c.user_id, chat.c.meta)
+    )
+    for chat_id, user_id, meta in result:
+        tags = meta.get("tags") if isinstance(meta, dict) else None
+        if not isinstance(tags, list):
+            continue
+
+        for tag_id in dict.fromkeys(tags):
+            if isinstance(tag_id, str):
+                rows.append({"chat_id": chat_id, "tag_id": tag_id, "user_id": user_id})
+
+        if len(rows) >= 1000:
+            conn.execute(chat_tag.insert(), rows)
+            rows = []
+
+    if rows:
+        conn.execute(chat_tag.insert(), rows)
+
+
+def downgrade():
+    op.drop_index("ix_chat_tag_user_id_tag_id", table_name="chat_tag")
+    op.drop_table("chat_tag")
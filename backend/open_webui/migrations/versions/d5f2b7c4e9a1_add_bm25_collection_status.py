@@ -0,0 +1,40 @@
+"""Add BM25 collection status
+
+Revision ID: d5f2b7c4e9a1
+Revises: c9a1e5f3d2b8
+Create Date: 2025-08-08 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d5f2b7c4e9a1"
+down_revision = "c9a1e5f3d2b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "bm25_collection",
+        sa.Column("status", sa.Text(), nullable=False, server_default="ready"),
+    )
+    op.add_column(
+        "bm25_collection",
+        sa.Column("updated_at", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+    # Empty collections may be leftovers of an interrupted first indexing,
+    # they are indexed again on next use
+    op.execute(
+        "DELETE FROM bm25_collection WHERE doc_count = 0 AND NOT EXISTS "
+        "(SELECT 1 FROM bm25_document "
+        "WHERE bm25_document.collection_name = bm25_collection.name)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("bm25_collection") as batch_op:
+        batch_op.drop_column("updated_at")
+        batch_op.drop_column("status")
@@ -0,0 +1,394 @@
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from sqlalchemy import BigInteger, Column, Float, Index, Integer, Text, JSON
+from sqlalchemy import and_, case, cast, func, insert
+from sqlalchemy.exc import IntegrityError
+
+####################
+# BM25 Index DB Schema
+####################
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+K1 = 1.5
+B = 0.75
+
+# Bound parameters per statement, below the SQLite limit
+BATCH_SIZE = 500
+
+# Seconds after which a collection still being indexed is considered
+# abandoned by a worker that failed or stopped, and is indexed again
+BUILD_TIMEOUT = 30 * 60
+
+
+class BM25Collection(Base):
+    """
+    A collection is "building" while it is first indexed, then "ready".
+    Only ready collections are searched, `updated_at` is when the status
+    was last set.
+    """
+
+    __tablename__ = "bm25_collection"
+
+    name = Column(Text, primary_key=True)
+    doc_count = Column(BigInteger, nullable=False, default=0)
+    total_length = Column(BigInteger, nullable=False, default=0)
+
+    status = Column(Text, nullable=False, default="ready")
+    updated_at = Column(BigInteger, nullable=False, default=0)
+
+
+class BM25Document(Base):
+    __tablename__ = "bm25_document"
+
+    collection_name = Column(Text, primary_key=True)
+    id = Column(Text, primary_key=True)
+
+    text = Column(Text, nullable=True)
+    meta = Column(JSON, nullable=True)
+    length = Column(Integer, nullable=False)
+
+
+class BM25Posting(Base):
+    __tablename__ = "bm25_posting"
+
+    collection_name = Column(Text, primary_key=True)
+    term = Column(Text, primary_key=True)
+    document_id = Column(Text, primary_key=True)
+
+    tf = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_bm25_posting_document", "collection_name", "document_id"),
+    )
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def matches_filter(metadata: Optional[dict], filter: dict) -> bool:
+    metadata = metadata or {}
+    return all(metadata.get(key) == value for key, value in filter.items())
+
+
+class BM25IndexTable:
+    """
+    Persistent inverted index of the documents of vector DB collections, for
+    the lexical half of hybrid search. Collections are indexed on first use
+    and kept up to date from then on.
+    """
+
+    def has_collection(self, collection_name: str) -> bool:
+        """
+        Whether the collection is indexed or being indexed, so that writes to
+        it are mirrored in the index.
+        """
+        with get_db() as db:
+            return db.get(BM25Collection, collection_name) is not None
+
+    def _claim_collection(self, db, collection_name: str) -> str:
+        """
+        Returns "ready" if the collection is indexed, "build" if the caller
+        is to index it and "building" if another caller is indexing it.
+        """
+        now = int(time.time())
+        collection = db.get(BM25Collection, collection_name)
+        if collection is None:
+            try:
+                db.add(
+                    BM25Collection(
+                        name=collection_name,
+                        doc_count=0,
+                        total_length=0,
+                        status="building",
+                        updated_at=now,
+                    )
+                )
+                db.commit()
+                return "build"
+            except IntegrityError:
+                db.rollback()
+                return "building"
+
+        if collection.status == "ready":
+            return "ready"
+
+        # Only one caller takes over an abandoned build
+        claimed = (
+            db.query(BM25Collection)
+            .filter(
+                BM25Collection.name == collection_name,
+                BM25Collection.status == "building",
+                BM25Collection.updated_at < now - BUILD_TIMEOUT,
+            )
+            .update({BM25Collection.updated_at: now}, synchronize_session=False)
+        )
+        if not claimed:
+            return "building"
+
+        log.info(f"Indexing {collection_name} again, its indexing was abandoned")
+        db.query(BM25Posting).filter_by(collection_name=collection_name).delete()
+        db.query(BM25Document).filter_by(collection_name=collection_name).delete()
+        db.query(BM25Collection).filter_by(name=collection_name).update(
+            {BM25Collection.doc_count: 0, BM25Collection.total_length: 0}
+        )
+        db.commit()
+        return "build"
+
+    def ensure_collection(self, collection_name: str, load: Callable) -> bool:
+        """
+        Indexes the collection from the documents returned by `load` (a
+        vector DB `GetResult`) unless it is already indexed. Returns False if
+        the collection does not exist. A collection being indexed by another
+        caller is not searched until it is ready.
+        """
+        with get_db() as db:
+            # Claims the collection first, so that documents inserted while it
+            # is being indexed are added too
+            status = self._claim_collection(db, collection_name)
+        if status != "build":
+            return True
+
+        try:
+            result = load()
+            if result is None or not result.ids:
+                self.delete_collection(collection_name)
+                return result is not None
+
+            self.upsert(
+                collection_name,
+                [
+                    {"id": id, "text": text, "metadata": metadata}
+                    for id, text, metadata in zip(
+                        result.ids[0], result.documents[0], result.metadatas[0]
+                    )
+                ],
+            )
+
+            with get_db() as db:
+                db.query(BM25Collection).filter_by(
+                    name=collection_name, status="building"
+                ).update(
+                    {
+                        BM25Collection.status: "ready",
+                        BM25Collection.updated_at: int(time.time()),
+                    }
+                )
+                db.commit()
+            return True
+        except Exception:
+            self.delete_collection(collection_name)
+            raise
+
+    def upsert(self, collection_name: str, items: list[dict]):
+        items = list({item["id"]: item for item in items}.values())
+
+        with get_db() as db:
+            self._delete_documents(db, collection_name, [item["id"] for item in items])
+
+            documents = []
+            postings = []
+            for item in items:
+                tokens = tokenize(item.get("text"))
+                documents.append(
+                    {
+                        "collection_name": collection_name,
+                        "id": item["id"],
+                        "text": item.get("text"),
+                        "meta": item.get("metadata"),
+                        "length": len(tokens),
+                    }
+                )
+                postings.extend(
+                    {
+                        "collection_name": collection_name,
+                        "term": term,
+                        "document_id": item["id"],
+                        "tf": tf,
+                    }
+                    for term, tf in Counter(tokens).items()
+                )
+
+            for idx in range(0, len(documents), BATCH_SIZE):
+                db.execute(insert(BM25Document), documents[idx : idx + BATCH_SIZE])
+            for idx in range(0, len(postings), BATCH_SIZE):
+                db.execute(insert(BM25Posting), postings[idx : idx + BATCH_SIZE])
+
+            db.query(BM25Collection).filter_by(name=collection_name).update(
+                {
+                    BM25Collection.doc_count: BM25Collection.doc_count + len(documents),
+                    BM25Collection.total_length: BM25Collection.total_length
+                    + sum(document["length"] for document in documents),
+                }
+            )
+            db.commit()
+
+    def _delete_documents(self, db, collection_name: str, ids: list[str]):
+        doc_count = 0
+        total_length = 0
+
+        for idx in range(0, len(ids), BATCH_SIZE):
+            batch = ids[idx : idx + BATCH_SIZE]
+            lengths = [
+                length
+                for (length,) in db.query(BM25Document.length).filter(
+                    BM25Document.collection_name == collection_name,
+                    BM25Document.id.in_(batch),
+                )
+            ]
+            if not lengths:
+                continue
+
+            db.query(BM25Posting).filter(
+                BM25Posting.collection_name == collection_name,
+                BM25Posting.document_id.in_(batch),
+            ).delete(synchronize_session=False)
+            db.query(BM25Document).filter(
+                BM25Document.collection_name == collection_name,
+                BM25Document.id.in_(batch),
+            ).delete(synchronize_session=False)
+
+            doc_count += len(lengths)
+            total_length += sum(lengths)
+
+        if doc_count:
+            db.query(BM25Collection).filter_by(name=collection_name).update(
+                {
+                    BM25Collection.doc_count: BM25Collection.doc_count - doc_count,
+                    BM25Collection.total_length: BM25Collection.total_length
+                    - total_length,
+                }
+            )
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        with get_db() as db:
+            if filter:
+                ids = [
+                    id
+                    for id, meta in db.query(BM25Document.id, BM25Document.meta).filter(
+                        BM25Document.collection_name == collection_name
+                    )
+                    if matches_filter(meta, filter)
+                ]
+
+            self._delete_documents(db, collection_name, ids or [])
+            db.commit()
+
+    def delete_collection(self, collection_name: str):
+        with get_db() as db:
+            db.query(BM25Posting).filter_by(collection_name=collection_name).delete()
+            db.query(BM25Document).filter_by(collection_name=collection_name).delete()
+            db.query(BM25Collection).filter_by(name=collection_name).delete()
+            db.commit()
+
+    def reset(self):
+        with get_db() as db:
+            db.query(BM25Posting).delete()
+            db.query(BM25Document).delete()
+            db.query(BM25Collection).delete()
+            db.commit()
+
+    def search(self, collection_name: str, query: str, k: int) -> list[dict]:
+        """
+        Top `k` documents of the collection by BM25 (Okapi, with the always
+        positive idf of Lucene), scored in the database.
+        """
+        query_terms = Counter(tokenize(query))
+        if not query_terms:
+            return []
+
+        with get_db() as db:
+            collection = db.get(BM25Collection, collection_name)
+            if (
+                not collection
+                or collection.status != "ready"
+                or not collection.doc_count
+            ):
+                return []
+
+            doc_count = collection.doc_count
+            avg_length = max(collection.total_length / doc_count, 1e-9)
+
+            document_frequencies = dict(
+                db.query(BM25Posting.term, func.count())
+                .filter(
+                    BM25Posting.collection_name == collection_name,
+                    BM25Posting.term.in_(list(query_terms)),
+                )
+                .group_by(BM25Posting.term)
+                .all()
+            )
+            if not document_frequencies:
+                return []
+
+            weights = {
+                term: query_terms[term]
+                * math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for term, df in document_frequencies.items()
+            }
+
+            tf = cast(BM25Posting.tf, Float)
+            length = cast(BM25Document.length, Float)
+            score = func.sum(
+                case(weights, value=BM25Posting.term, else_=0.0)
+                * tf
+                * (K1 + 1)
+                / (tf + K1 * (1 - B + B * length / avg_length))
+            ).label("score")
+
+            rows = (
+                db.query(BM25Document.id, score)
+                .join(
+                    BM25Posting,
+                    and_(
+                        BM25Posting.collection_name == BM25Document.collection_name,
+                        BM25Posting.document_id == BM25Document.id,
+                    ),
+                )
+                .filter(
+                    BM25Posting.collection_name == collection_name,
+                    BM25Posting.term.in_(list(weights)),
+                )
+                .group_by(BM25Document.id)
+                .order_by(score.desc(), BM25Document.id)
+                .limit(k)
+                .all()
+            )
+
+            scores = {id: score for id, score in rows}
+            documents = {
+                document.id: document
+                for document in db.query(BM25Document).filter(
+                    BM25Document.collection_name == collection_name,
+                    BM25Document.id.in_(list(scores)),
+                )
+            }
+
+            return [
+                {
+                    "id": id,
+                    "text": documents[id].text,
+                    "metadata": documents[id].meta or {},
+                    "score": score,
+                }
+                for id, score in scores.items()
+                if id in documents
+            ]
+
+
+BM25Index = BM25IndexTable()
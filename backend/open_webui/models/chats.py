@@ -1,17 +1,27 @@
 import logging
 import json
+import re
 import time
 import uuid
-from typing import Optional
+from typing import Iterator, Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
-from sqlalchemy import or_, func, select, and_, text
-from sqlalchemy.sql import exists
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+    JSON,
+)
+from sqlalchemy import or_, func, select, exists, text, tuple_
 from sqlalchemy.sql.expression import bindparam
 
 ####################
@@ -40,6 +50,75 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    __table_args__ = (
+        Index("ix_chat_user_id_updated_at", "user_id", "updated_at", "id"),
+        Index(
+            "ix_chat_user_id_archived_updated_at",
+            "user_id",
+            "archived",
+            "updated_at",
+            "id",
+        ),
+        Index(
+            "ix_chat_user_id_archived_pinned_folder_id_updated_at",
+            "user_id",
+            "archived",
+            "pinned",
+            "folder_id",
+            "updated_at",
+            "id",
+        ),
+    )
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    chat_id = Column(Text, primary_key=True)
+    id = Column(Text, primary_key=True)
+
+    parent_id = Column(Text, nullable=True)
+    role = Column(Text, nullable=True)
+    content = Column(Text, nullable=True)
+    data = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class ChatSearch(Base):
+    """
+    Searchable text of a chat, the title and the content of its messages.
+    Indexed by an FTS5 table on SQLite and a tsvector column on PostgreSQL,
+    both created by the migration.
+    """
+
+    __tablename__ = "chat_search"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(Text, unique=True, nullable=False)
+    user_id = Column(Text, nullable=False, index=True)
+
+    title = Column(Text, nullable=True)
+    content = Column(Text, nullable=True)
+
+    indexed_at = Column(BigInteger, nullable=False)
+
+
+class ChatTag(Base):
+    """
+    Tags of a chat, mirroring the tag ids in `Chat.meta["tags"]` so that chats
+    are filtered and counted by tag from an index.
+    """
+
+    __tablename__ = "chat_tag"
+
+    chat_id = Column(Text, primary_key=True)
+    tag_id = Column(Text, primary_key=True)
+    user_id = Column(Text, nullable=False)
+
+    __table_args__ = (Index("ix_chat_tag_user_id_tag_id", "user_id", "tag_id"),)
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -107,7 +186,281 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+####################
+# Chat Messages
+####################
+
+# `history.messages` of a chat is stored row-per-message in the `chat_message`
+# table, `Chat.chat` only keeps the rest of the chat object. The legacy blob
+# (including the derived `messages` list) is assembled on read.
+
+
+def split_chat_messages(chat: dict) -> tuple[dict, Optional[dict]]:
+    """
+    Splits a chat object into the part stored in `Chat.chat` and the
+    `history.messages` map. The map is None if the chat has no message history.
+    """
+    history = chat.get("history")
+    if not isinstance(history, dict) or not isinstance(history.get("messages"), dict):
+        return chat, None
+
+    chat = {
+        **{key: value for key, value in chat.items() if key != "messages"},
+        "history": {key: value for key, value in history.items() if key != "messages"},
+    }
+    return chat, history["messages"]
+
+
+def get_messages_list(messages: dict, message_id: Optional[str]) -> list[dict]:
+    """
+    Returns the branch ending at `message_id`, ordered from the root message.
+    """
+    messages_list = []
+    visited = set()
+
+    while message_id and message_id in messages and message_id not in visited:
+        visited.add(message_id)
+        message = messages[message_id]
+        messages_list.append(message)
+        message_id = message.get("parentId")
+
+    return messages_list[::-1]
+
+
+def assemble_chat(chat: dict, messages: dict) -> dict:
+    history = chat.get("history")
+    if not isinstance(history, dict) or (not messages and "messages" in history):
+        return chat
+
+    if isinstance(history.get("messages"), dict):
+        # Chats written before the message table existed
+        messages = {
+            **history["messages"],
+            **{
+                message_id: {**history["messages"].get(message_id, {}), **message}
+                for message_id, message in messages.items()
+            },
+        }
+
+    return {
+        **chat,
+        "history": {**history, "messages": messages},
+        "messages": get_messages_list(messages, history.get("currentId")),
+    }
+
+
+def message_to_chat_message_values(message: dict) -> dict:
+    content = message.get("content")
+    if isinstance(content, str):
+        # Sanitize message content for null characters
+        content = content.replace("\x00", "")
+        data = {key: value for key, value in message.items() if key != "content"}
+    else:
+        content = None
+        data = message
+
+    return {
+        "parent_id": message.get("parentId"),
+        "role": message.get("role"),
+        "content": content,
+        "data": data,
+    }
+
+
+def chat_message_to_message(chat_message: ChatMessage) -> dict:
+    message = dict(chat_message.data or {})
+    if chat_message.content is not None:
+        message["content"] = chat_message.content
+    return message
+
+
+####################
+# Chat Search
+####################
+
+# The searchable text of a chat is rewritten with the chat, whenever its title
+# or the content of its messages change, and the database indexes it: with
+# triggers filling the FTS5 table on SQLite, a generated column on PostgreSQL.
+
+
+def get_search_terms(search_text: str) -> list[str]:
+    return re.findall(r"[^\W_]+", search_text)
+
+
+def get_fts5_query(terms: list[str]) -> str:
+    """Every term as a prefix, all of them matching."""
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def get_tsquery(terms: list[str]) -> str:
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+####################
+# Chat List Pagination
+####################
+
+# Chat lists are ordered by (updated_at, id), newest first. A cursor holds the
+# `updated_at` and `id` of the last chat of a page, the next page starts right
+# after it however many chats were created or updated since, and is read from
+# the indexes without scanning the chats before it as OFFSET does.
+
+
+def get_chat_cursor(updated_at: int, id: str) -> str:
+    return f"{updated_at}_{id}"
+
+
+def parse_chat_cursor(cursor: str) -> tuple[int, str]:
+    """Raises a ValueError if the cursor is invalid."""
+    updated_at, id = cursor.split("_", 1)
+    return int(updated_at), id
+
+
 class ChatTable:
+    """
+    Chats returned by single chat getters and by export style getters include
+    the assembled message history. Listing and flag updating methods return
+    `Chat.chat` as stored, without `history.messages`.
+    """
+
+    def _get_messages_by_chat_ids(self, db, chat_ids: list[str]) -> dict[str, dict]:
+        messages = {chat_id: {} for chat_id in chat_ids}
+        for idx in range(0, len(chat_ids), 500):
+            chat_messages = (
+                db.query(ChatMessage)
+                .filter(ChatMessage.chat_id.in_(chat_ids[idx : idx + 500]))
+                .all()
+            )
+            for chat_message in chat_messages:
+                messages[chat_message.chat_id][chat_message.id] = (
+                    chat_message_to_message(chat_message)
+                )
+        return messages
+
+    def _to_chat_models(self, db, chats: list[Chat]) -> list[ChatModel]:
+        messages = self._get_messages_by_chat_ids(db, [chat.id for chat in chats])
+
+        chat_models = []
+        for chat in chats:
+            chat_model = ChatModel.model_validate(chat)
+            chat_model.chat = assemble_chat(chat_model.chat, messages[chat.id])
+            chat_models.append(chat_model)
+        return chat_models
+
+    def _set_chat_tags(self, db, chat: Chat, tag_ids: list[str]):
+        """Sets the tags of the chat, in its meta and in the chat_tag table."""
+        tag_ids = list(dict.fromkeys(tag_ids))
+        chat.meta = {**(chat.meta or {}), "tags": tag_ids}
+
+        db.query(ChatTag).filter_by(chat_id=chat.id).delete()
+        db.add_all(
+            ChatTag(chat_id=chat.id, tag_id=tag_id, user_id=chat.user_id)
+            for tag_id in tag_ids
+        )
+
+    def _paginate(
+        self,
+        query,
+        cursor: Optional[str] = None,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+    ):
+        """
+        Orders a chat list query by recency and returns the page after
+        `cursor`, or after `skip` chats without a cursor.
+        """
+        query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+        if cursor:
+            updated_at, id = parse_chat_cursor(cursor)
+            query = query.filter(
+                tuple_(Chat.updated_at, Chat.id) < tuple_(updated_at, id)
+            )
+        elif skip:
+            query = query.offset(skip)
+        if limit:
+            query = query.limit(limit)
+        return query
+
+    def _sync_chat_messages(self, db, chat_id: str, messages: dict) -> bool:
+        """
+        Writes only the messages that changed since the last save. Returns
+        whether the content of any message changed.
+        """
+        existing = {
+            chat_message.id: chat_message
+            for chat_message in db.query(ChatMessage).filter_by(chat_id=chat_id)
+        }
+        now = int(time.time())
+        content_changed = False
+
+        for message_id, message in messages.items():
+            if not isinstance(message, dict):
+                continue
+
+            values = message_to_chat_message_values(message)
+            chat_message = existing.pop(message_id, None)
+            if chat_message is None:
+                content_changed = content_changed or values["content"] is not None
+                db.add(
+                    ChatMessage(
+                        chat_id=chat_id,
+                        id=message_id,
+                        created_at=now,
+                        updated_at=now,
+                        **values,
+                    )
+                )
+            elif any(
+                getattr(chat_message, key) != value for key, value in values.items()
+            ):
+                content_changed = (
+                    content_changed or chat_message.content != values["content"]
+                )
+                for key, value in values.items():
+                    setattr(chat_message, key, value)
+                chat_message.updated_at = now
+
+        for chat_message in existing.values():
+            content_changed = content_changed or chat_message.content is not None
+            db.delete(chat_message)
+        return content_changed
+
+    def _index_chat(self, db, chat: Chat):
+        """Writes the searchable text of the chat, from its title and messages."""
+        # Messages added in this session are not autoflushed
+        db.flush()
+        contents = [
+            content
+            for (content,) in db.query(ChatMessage.content)
+            .filter(ChatMessage.chat_id == chat.id, ChatMessage.content != None)
+            .order_by(ChatMessage.created_at)
+        ]
+
+        chat_search = db.query(ChatSearch).filter_by(chat_id=chat.id).first()
+        if chat_search is None:
+            chat_search = ChatSearch(chat_id=chat.id, user_id=chat.user_id)
+            db.add(chat_search)
+
+        chat_search.title = chat.title
+        chat_search.content = "\n".join(contents)
+        chat_search.indexed_at = int(time.time())
+
+    def _copy_chat_messages(self, db, chat_id: str, target_chat_id: str):
+        db.query(ChatMessage).filter_by(chat_id=target_chat_id).delete()
+        for chat_message in db.query(ChatMessage).filter_by(chat_id=chat_id).all():
+            db.add(
+                ChatMessage(
+                    chat_id=target_chat_id,
+                    id=chat_message.id,
+                    parent_id=chat_message.parent_id,
+                    role=chat_message.role,
+                    content=chat_message.content,
+                    data=chat_message.data,
+                    created_at=chat_message.created_at,
+                    updated_at=chat_message.updated_at,
+                )
+            )
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -127,70 +480,106 @@ class ChatTable:
                 }
             )
 
-            result = Chat(**chat.model_dump())
+            chat_data, messages = split_chat_messages(form_data.chat)
+
+            result = Chat(**{**chat.model_dump(), "chat": chat_data})
             db.add(result)
+            if messages:
+                self._sync_chat_messages(db, id, messages)
+            self._index_chat(db, result)
             db.commit()
             db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return self._to_chat_models(db, [result])[0] if result else None
+
+    def _add_imported_chat(self, db, user_id: str, form_data: ChatImportForm) -> Chat:
+        id = str(uuid.uuid4())
+        chat = ChatModel(
+            **{
+                "id": id,
+                "user_id": user_id,
+                "title": (
+                    form_data.chat["title"] if "title" in form_data.chat else "New Chat"
+                ),
+                "chat": form_data.chat,
+                "meta": form_data.meta,
+                "pinned": form_data.pinned,
+                "folder_id": form_data.folder_id,
+                "created_at": (
+                    form_data.created_at if form_data.created_at else int(time.time())
+                ),
+                "updated_at": (
+                    form_data.updated_at if form_data.updated_at else int(time.time())
+                ),
+            }
+        )
+
+        chat_data, messages = split_chat_messages(form_data.chat)
+
+        result = Chat(**{**chat.model_dump(), "chat": chat_data})
+        db.add(result)
+        if messages:
+            self._sync_chat_messages(db, id, messages)
+        self._index_chat(db, result)
+
+        tags = (form_data.meta or {}).get("tags", [])
+        if isinstance(tags, list) and tags:
+            self._set_chat_tags(db, result, tags)
+        return result
 
     def import_chat(
         self, user_id: str, form_data: ChatImportForm
     ) -> Optional[ChatModel]:
         with get_db() as db:
-            id = str(uuid.uuid4())
-            chat = ChatModel(
-                **{
-                    "id": id,
-                    "user_id": user_id,
-                    "title": (
-                        form_data.chat["title"]
-                        if "title" in form_data.chat
-                        else "New Chat"
-                    ),
-                    "chat": form_data.chat,
-                    "meta": form_data.meta,
-                    "pinned": form_data.pinned,
-                    "folder_id": form_data.folder_id,
-                    "created_at": (
-                        form_data.created_at
-                        if form_data.created_at
-                        else int(time.time())
-                    ),
-                    "updated_at": (
-                        form_data.updated_at
-                        if form_data.updated_at
-                        else int(time.time())
-                    ),
-                }
-            )
-
-            result = Chat(**chat.model_dump())
-            db.add(result)
+            result = self._add_imported_chat(db, user_id, form_data)
             db.commit()
             db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return self._to_chat_models(db, [result])[0] if result else None
+
+    def import_chats(self, user_id: str, forms: list[ChatImportForm]) -> int:
+        """
+        Imports a batch of chats in a single transaction, returns their count.
+        """
+        with get_db() as db:
+            for form_data in forms:
+                self._add_imported_chat(db, user_id, form_data)
+            db.commit()
+            return len(forms)
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
+        """
+        Messages are only synced if `chat` carries `history.messages`, so
+        callers can update the rest of the chat object without loading them.
+        """
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
+
+                chat, messages = split_chat_messages(chat)
+                content_changed = messages is not None and self._sync_chat_messages(
+                    db, id, messages
+                )
+
+                title = chat["title"] if "title" in chat else "New Chat"
+                if content_changed or title != chat_item.title:
+                    chat_item.title = title
+                    self._index_chat(db, chat_item)
+
                 chat_item.chat = chat
-                chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat_item)
 
-                return ChatModel.model_validate(chat_item)
+                return self._to_chat_models(db, [chat_item])[0]
         except Exception:
             return None
 
     def update_chat_title_by_id(self, id: str, title: str) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat_item = db.get(Chat, id)
+            if chat_item is None:
+                return None
 
-        chat = chat.chat
-        chat["title"] = title
+            chat = {**(chat_item.chat or {}), "title": title}
 
         return self.update_chat_by_id(id, chat)
 
@@ -215,72 +604,138 @@ class ChatTable:
         return self.get_chat_by_id(id)
 
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat = db.query(Chat.title).filter_by(id=id).first()
+            if chat is None:
+                return None
 
-        return chat.chat.get("title", "New Chat")
+            return chat.title or "New Chat"
 
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat = db.get(Chat, id)
+            if chat is None:
+                return None
 
-        return chat.chat.get("history", {}).get("messages", {}) or {}
+            chat = assemble_chat(
+                chat.chat or {}, self._get_messages_by_chat_ids(db, [id])[id]
+            )
+            return chat.get("history", {}).get("messages", {}) or {}
 
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat_message = db.get(ChatMessage, (id, message_id))
+            if chat_message is not None:
+                return chat_message_to_message(chat_message)
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+            chat = db.get(Chat, id)
+            if chat is None:
+                return None
+
+            return (
+                (chat.chat or {})
+                .get("history", {})
+                .get("messages", {})
+                .get(message_id, {})
+            )
 
     def upsert_message_to_chat_by_id_and_message_id(
-        self, id: str, message_id: str, message: dict
+        self, id: str, message_id: str, message: dict, index: bool = True
     ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        """
+        Writes the single message row and the chat's `currentId`, the rest of
+        the chat history is left untouched. Saves of a message still being
+        streamed pass `index=False`, and the chat is indexed for search with
+        `index_chat_by_id` once the message is done.
+        """
+        try:
+            with get_db() as db:
+                chat = db.get(Chat, id)
+                if chat is None:
+                    return None
 
-        # Sanitize message content for null characters before upserting
-        if isinstance(message.get("content"), str):
-            message["content"] = message["content"].replace("\x00", "")
+                now = int(time.time())
+                chat_message = db.get(ChatMessage, (id, message_id))
+                if chat_message is not None:
+                    content = chat_message.content
+                    message = {**chat_message_to_message(chat_message), **message}
+                    for key, value in message_to_chat_message_values(message).items():
+                        setattr(chat_message, key, value)
+                    chat_message.updated_at = now
+                else:
+                    content = None
+                    chat_message = ChatMessage(
+                        chat_id=id,
+                        id=message_id,
+                        created_at=now,
+                        updated_at=now,
+                        **message_to_chat_message_values(message),
+                    )
+                    db.add(chat_message)
 
-        chat = chat.chat
-        history = chat.get("history", {})
+                if index and chat_message.content != content:
+                    self._index_chat(db, chat)
 
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+                history = (chat.chat or {}).get("history", {})
+                chat.chat = {
+                    **(chat.chat or {}),
+                    "history": {**history, "currentId": message_id},
+                }
+                chat.updated_at = now
+                db.commit()
+                db.refresh(chat)
 
-        history["currentId"] = message_id
+                return ChatModel.model_validate(chat)
+        except Exception as e:
+            log.exception(e)
+            return None
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+    def index_chat_by_id(self, id: str) -> bool:
+        with get_db() as db:
+            chat = db.get(Chat, id)
+            if chat is None:
+                return False
+
+            self._index_chat(db, chat)
+            db.commit()
+            return True
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
     ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        return self.add_message_statuses_to_chat_by_id_and_message_id(
+            id, message_id, [status]
+        )
 
-        chat = chat.chat
-        history = chat.get("history", {})
+    def add_message_statuses_to_chat_by_id_and_message_id(
+        self, id: str, message_id: str, statuses: list[dict]
+    ) -> Optional[ChatModel]:
+        try:
+            with get_db() as db:
+                chat = db.get(Chat, id)
+                if chat is None:
+                    return None
 
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
+                chat_message = db.get(ChatMessage, (id, message_id))
+                if chat_message is not None:
+                    data = dict(chat_message.data or {})
+                    data["statusHistory"] = [
+                        *data.get("statusHistory", []),
+                        *statuses,
+                    ]
+                    chat_message.data = data
+                    chat_message.updated_at = int(time.time())
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+                chat.updated_at = int(time.time())
+                db.commit()
+                db.refresh(chat)
+
+                return ChatModel.model_validate(chat)
+        except Exception as e:
+            log.exception(e)
+            return None
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -302,6 +757,7 @@ class ChatTable:
             )
             shared_result = Chat(**shared_chat.model_dump())
             db.add(shared_result)
+            self._copy_chat_messages(db, chat_id, shared_chat.id)
             db.commit()
             db.refresh(shared_result)
 
@@ -312,7 +768,11 @@ class ChatTable:
                 .update({"share_id": shared_chat.id})
             )
             db.commit()
-            return shared_chat if (shared_result and result) else None
+            return (
+                self._to_chat_models(db, [shared_result])[0]
+                if (shared_result and result)
+                else None
+            )
 
     def update_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         try:
@@ -327,18 +787,24 @@ class ChatTable:
 
                 shared_chat.title = chat.title
                 shared_chat.chat = chat.chat
+                self._copy_chat_messages(db, chat_id, shared_chat.id)
 
                 shared_chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(shared_chat)
 
-                return ChatModel.model_validate(shared_chat)
+                return self._to_chat_models(db, [shared_chat])[0]
         except Exception:
             return None
 
     def delete_shared_chat_by_chat_id(self, chat_id: str) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == f"shared-{chat_id}")
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=f"shared-{chat_id}").delete()
                 db.commit()
 
@@ -398,8 +864,8 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
+        cursor: Optional[str] = None,
     ) -> list[ChatModel]:
-
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id, archived=True)
 
@@ -418,13 +884,11 @@ class ChatTable:
                         query = query.order_by(getattr(Chat, order_by).desc())
                     else:
                         raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
 
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
+                    # Cursors only apply to the default order
+                    cursor = None
+
+            query = self._paginate(query, cursor, skip, limit)
 
             all_chats = query.all()
             return [ChatModel.model_validate(chat) for chat in all_chats]
@@ -436,6 +900,7 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
+        cursor: Optional[str] = None,
     ) -> list[ChatModel]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id)
@@ -457,13 +922,11 @@ class ChatTable:
                         query = query.order_by(getattr(Chat, order_by).desc())
                     else:
                         raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
 
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
+                    # Cursors only apply to the default order
+                    cursor = None
+
+            query = self._paginate(query, cursor, skip, limit)
 
             all_chats = query.all()
             return [ChatModel.model_validate(chat) for chat in all_chats]
@@ -474,6 +937,7 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id).filter_by(folder_id=None)
@@ -482,15 +946,10 @@ class ChatTable:
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
+            query = self._paginate(query, cursor, skip, limit).with_entities(
                 Chat.id, Chat.title, Chat.updated_at, Chat.created_at
             )
 
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
-
             all_chats = query.all()
 
             # result has to be destructured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
@@ -517,13 +976,13 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_models(db, [chat])[0]
         except Exception:
             return None
 
@@ -545,7 +1004,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_models(db, [chat])[0]
         except Exception:
             return None
 
@@ -554,9 +1013,9 @@ class ChatTable:
             all_chats = (
                 db.query(Chat)
                 # .limit(limit).offset(skip)
-                .order_by(Chat.updated_at.desc())
+                .order_by(Chat.updated_at.desc()).all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -564,8 +1023,38 @@ class ChatTable:
                 db.query(Chat)
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
+                .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
+
+    def iter_chats(
+        self, user_id: Optional[str] = None, batch_size: int = 100
+    ) -> Iterator[ChatModel]:
+        """
+        Yields all the chats, or those of `user_id`, with their messages,
+        reading `batch_size` chats at a time by keyset on the id. Each batch
+        uses its own session, so that no connection is held while the chats
+        are consumed.
+        """
+        last_id = None
+        while True:
+            with get_db() as db:
+                query = db.query(Chat)
+                if user_id:
+                    query = query.filter(Chat.user_id == user_id)
+                if last_id is not None:
+                    query = query.filter(Chat.id > last_id)
+
+                chats = query.order_by(Chat.id).limit(batch_size).all()
+                if not chats:
+                    return
+
+                last_id = chats[-1].id
+                chat_models = self._to_chat_models(db, chats)
+
+            yield from chat_models
+            if len(chat_models) < batch_size:
+                return
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -582,8 +1071,9 @@ class ChatTable:
                 db.query(Chat)
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
+                .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -594,7 +1084,9 @@ class ChatTable:
         limit: int = 60,
     ) -> list[ChatModel]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Searches the chats of the user by title and message content, best
+        matches first, with every word matching as a prefix. `tag:name` words
+        filter the chats by tag. Paginated using skip and limit.
         """
         search_text = search_text.replace("\u0000", "").lower().strip()
 
@@ -616,7 +1108,7 @@ class ChatTable:
             word for word in search_text_words if not word.startswith("tag:")
         ]
 
-        search_text = " ".join(search_text_words)
+        terms = get_search_terms(" ".join(search_text_words))
 
         with get_db() as db:
             query = db.query(Chat).filter(Chat.user_id == user_id)
@@ -624,106 +1116,15 @@ class ChatTable:
             if not include_archived:
                 query = query.filter(Chat.archived == False)
 
-            query = query.order_by(Chat.updated_at.desc())
-
-            # Check if the database dialect is either 'sqlite' or 'postgresql'
-            dialect_name = db.bind.dialect.name
-            if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                sqlite_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_each(Chat.chat, '$.messages') AS message "
-                    "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
-                )
-                sqlite_content_clause = text(sqlite_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
-
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_each(Chat.meta, '$.tags') AS tag
-                            )
-                            """
-                        )
-                    )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_each(Chat.meta, '$.tags') AS tag
-                                        WHERE tag.value = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
-                    )
-
-            elif dialect_name == "postgresql":
-                # PostgreSQL relies on proper JSON query for search
-                postgres_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_array_elements(Chat.chat->'messages') AS message "
-                    "    WHERE LOWER(message->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
+            if terms:
+                ranked = self._get_ranked_chat_ids(db, user_id, terms)
+                query = query.join(ranked, ranked.c.chat_id == Chat.id).order_by(
+                    ranked.c.rank.desc(), Chat.updated_at.desc()
                 )
-                postgres_content_clause = text(postgres_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")),
-                        postgres_content_clause,
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
-
-                # Check if there are any tags to filter, it should have all the tags
-                if "none" in tag_ids:
-                    query = query.filter(
-                        text(
-                            """
-                            NOT EXISTS (
-                                SELECT 1
-                                FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                            )
-                            """
-                        )
-                    )
-                elif tag_ids:
-                    query = query.filter(
-                        and_(
-                            *[
-                                text(
-                                    f"""
-                                    EXISTS (
-                                        SELECT 1
-                                        FROM json_array_elements_text(Chat.meta->'tags') AS tag
-                                        WHERE tag = :tag_id_{tag_idx}
-                                    )
-                                    """
-                                ).params(**{f"tag_id_{tag_idx}": tag_id})
-                                for tag_idx, tag_id in enumerate(tag_ids)
-                            ]
-                        )
-                    )
             else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
-                )
+                query = query.order_by(Chat.updated_at.desc())
+
+            query = self._filter_by_tag_ids(query, tag_ids)
 
             # Perform pagination at the SQL level
             all_chats = query.offset(skip).limit(limit).all()
@@ -733,6 +1134,47 @@ class ChatTable:
             # Validate and return chats
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
+    def _get_ranked_chat_ids(self, db, user_id: str, terms: list[str]):
+        """Subquery of the matching chats of the user, with a higher rank first."""
+        dialect_name = db.bind.dialect.name
+        if dialect_name == "sqlite":
+            # bm25 is lower for better matches, title matches weigh more
+            statement = text(
+                """
+                SELECT chat_search.chat_id AS chat_id,
+                       -bm25(chat_search_fts, 10.0, 1.0) AS rank
+                FROM chat_search_fts
+                JOIN chat_search ON chat_search.id = chat_search_fts.rowid
+                WHERE chat_search_fts MATCH :search_query
+                  AND chat_search.user_id = :user_id
+                """
+            ).bindparams(search_query=get_fts5_query(terms), user_id=user_id)
+        elif dialect_name == "postgresql":
+            statement = text(
+                """
+                SELECT chat_id,
+                       ts_rank(search_vector, to_tsquery('simple', :search_query)) AS rank
+                FROM chat_search
+                WHERE user_id = :user_id
+                  AND search_vector @@ to_tsquery('simple', :search_query)
+                """
+            ).bindparams(search_query=get_tsquery(terms), user_id=user_id)
+        else:
+            raise NotImplementedError(f"Unsupported dialect: {dialect_name}")
+
+        return statement.columns(chat_id=Text, rank=Float).subquery("ranked")
+
+    def _filter_by_tag_ids(self, query, tag_ids: list[str]):
+        """Chats having all the tags, or no tag at all for the "none" tag."""
+        if "none" in tag_ids:
+            query = query.filter(~exists().where(ChatTag.chat_id == Chat.id))
+        else:
+            for tag_id in tag_ids:
+                query = query.filter(
+                    exists().where(ChatTag.chat_id == Chat.id, ChatTag.tag_id == tag_id)
+                )
+        return query
+
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
     ) -> list[ChatModel]:
@@ -744,7 +1186,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -759,7 +1201,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -786,28 +1228,12 @@ class ChatTable:
         self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
     ) -> list[ChatModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
             tag_id = tag_name.replace(" ", "_").lower()
-
-            log.info(f"DB dialect name: {db.bind.dialect.name}")
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 querying for tags within the meta JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSON query for tags within the meta JSON field (for `json` type)
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
-                )
+            query = (
+                db.query(Chat)
+                .join(ChatTag, ChatTag.chat_id == Chat.id)
+                .filter(ChatTag.user_id == user_id, ChatTag.tag_id == tag_id)
+            )
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
@@ -824,11 +1250,9 @@ class ChatTable:
                 chat = db.get(Chat, id)
 
                 tag_id = tag.id
-                if tag_id not in chat.meta.get("tags", []):
-                    chat.meta = {
-                        **chat.meta,
-                        "tags": list(set(chat.meta.get("tags", []) + [tag_id])),
-                    }
+                tags = chat.meta.get("tags", [])
+                if tag_id not in tags:
+                    self._set_chat_tags(db, chat, tags + [tag_id])
 
                 db.commit()
                 db.refresh(chat)
@@ -837,39 +1261,22 @@ class ChatTable:
             return None
 
     def count_chats_by_tag_name_and_user_id(self, tag_name: str, user_id: str) -> int:
-        with get_db() as db:  # Assuming `get_db()` returns a session object
-            query = db.query(Chat).filter_by(user_id=user_id, archived=False)
-
+        with get_db() as db:
             # Normalize the tag_name for consistency
             tag_id = tag_name.replace(" ", "_").lower()
 
-            if db.bind.dialect.name == "sqlite":
-                # SQLite JSON1 support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        f"EXISTS (SELECT 1 FROM json_each(Chat.meta, '$.tags') WHERE json_each.value = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            elif db.bind.dialect.name == "postgresql":
-                # PostgreSQL JSONB support for querying the tags inside the `meta` JSON field
-                query = query.filter(
-                    text(
-                        "EXISTS (SELECT 1 FROM json_array_elements_text(Chat.meta->'tags') elem WHERE elem = :tag_id)"
-                    )
-                ).params(tag_id=tag_id)
-
-            else:
-                raise NotImplementedError(
-                    f"Unsupported dialect: {db.bind.dialect.name}"
+            count = (
+                db.query(func.count(ChatTag.chat_id))
+                .join(Chat, Chat.id == ChatTag.chat_id)
+                .filter(
+                    ChatTag.user_id == user_id,
+                    ChatTag.tag_id == tag_id,
+                    Chat.archived == False,
                 )
+                .scalar()
+            )
 
-            # Get the count of matching records
-            count = query.count()
-
-            # Debugging output for inspection
-            log.info(f"Count of chats for tag '{tag_name}': {count}")
-
+            log.debug(f"Count of chats for tag '{tag_name}': {count}")
             return count
 
     def delete_tag_by_id_and_user_id_and_tag_name(
@@ -882,10 +1289,7 @@ class ChatTable:
                 tag_id = tag_name.replace(" ", "_").lower()
 
                 tags = [tag for tag in tags if tag != tag_id]
-                chat.meta = {
-                    **chat.meta,
-                    "tags": list(set(tags)),
-                }
+                self._set_chat_tags(db, chat, tags)
                 db.commit()
                 return True
         except Exception:
@@ -895,10 +1299,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                chat.meta = {
-                    **chat.meta,
-                    "tags": [],
-                }
+                self._set_chat_tags(db, chat, [])
                 db.commit()
 
                 return True
@@ -908,6 +1309,9 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter_by(chat_id=id).delete()
+                db.query(ChatSearch).filter_by(chat_id=id).delete()
+                db.query(ChatTag).filter_by(chat_id=id).delete()
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -918,7 +1322,10 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if db.query(Chat).filter_by(id=id, user_id=user_id).delete():
+                    db.query(ChatMessage).filter_by(chat_id=id).delete()
+                    db.query(ChatSearch).filter_by(chat_id=id).delete()
+                    db.query(ChatTag).filter_by(chat_id=id).delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -930,6 +1337,13 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id == user_id)
+                    )
+                ).delete(synchronize_session=False)
+                db.query(ChatSearch).filter_by(user_id=user_id).delete()
+                db.query(ChatTag).filter_by(user_id=user_id).delete()
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -942,6 +1356,27 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
+                db.query(ChatSearch).filter(
+                    ChatSearch.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
+                db.query(ChatTag).filter(
+                    ChatTag.chat_id.in_(
+                        select(Chat.id).where(
+                            Chat.user_id == user_id, Chat.folder_id == folder_id
+                        )
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
@@ -955,6 +1390,11 @@ class ChatTable:
                 chats_by_user = db.query(Chat).filter_by(user_id=user_id).all()
                 shared_chat_ids = [f"shared-{chat.id}" for chat in chats_by_user]
 
+                db.query(ChatMessage).filter(
+                    ChatMessage.chat_id.in_(
+                        select(Chat.id).where(Chat.user_id.in_(shared_chat_ids))
+                    )
+                ).delete(synchronize_session=False)
                 db.query(Chat).filter(Chat.user_id.in_(shared_chat_ids)).delete()
                 db.commit()
 
@@ -0,0 +1,229 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Index, Integer, String, Text, JSON
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Ingestion Job DB Schema
+####################
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_job"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+
+    type = Column(String, nullable=False)
+    # pending, running, completed or failed
+    status = Column(String, nullable=False)
+
+    payload = Column(JSON, nullable=True)
+    progress = Column(JSON, nullable=True)
+    # State a job resumes from when it is run again
+    checkpoint = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    # Pending jobs are not claimed before this time, to back off retries
+    run_at = Column(BigInteger, nullable=False)
+
+    created_at = Column(BigInteger, nullable=False)
+    updated_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("ix_ingestion_job_status_run_at", "status", "run_at"),
+        Index("ix_ingestion_job_user_id_created_at", "user_id", "created_at"),
+    )
+
+
+class IngestionJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    user_id: str
+
+    type: str
+    status: str
+
+    payload: Optional[dict] = None
+    progress: Optional[dict] = None
+    checkpoint: Optional[dict] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+    attempts: int = 0
+    run_at: int
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+class IngestionJobsTable:
+    def insert_new_job(
+        self, user_id: str, type: str, payload: Optional[dict] = None
+    ) -> IngestionJobModel:
+        now = int(time.time())
+        job = IngestionJobModel(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            type=type,
+            status="pending",
+            payload=payload,
+            attempts=0,
+            run_at=now,
+            created_at=now,
+            updated_at=now,
+        )
+
+        with get_db() as db:
+            db.add(IngestionJob(**job.model_dump()))
+            db.commit()
+        return job
+
+    def get_job_by_id(self, id: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = db.get(IngestionJob, id)
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def get_jobs(
+        self,
+        user_id: Optional[str] = None,
+        status: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+    ) -> list[IngestionJobModel]:
+        with get_db() as db:
+            query = db.query(IngestionJob)
+            if user_id:
+                query = query.filter_by(user_id=user_id)
+            if status:
+                query = query.filter_by(status=status)
+
+            return [
+                IngestionJobModel.model_validate(job)
+                for job in query.order_by(IngestionJob.created_at.desc())
+                .offset(skip)
+                .limit(limit)
+                .all()
+            ]
+
+    def claim_next_job(self) -> Optional[IngestionJobModel]:
+        """
+        Marks the oldest runnable pending job as running and returns it. The
+        conditional update makes sure that a job is claimed by one worker
+        only, across processes.
+        """
+        now = int(time.time())
+        with get_db() as db:
+            ids = [
+                id
+                for (id,) in db.query(IngestionJob.id)
+                .filter(IngestionJob.status == "pending", IngestionJob.run_at <= now)
+                .order_by(IngestionJob.run_at, IngestionJob.created_at)
+                .limit(5)
+            ]
+
+            for id in ids:
+                claimed = (
+                    db.query(IngestionJob)
+                    .filter_by(id=id, status="pending")
+                    .update(
+                        {
+                            IngestionJob.status: "running",
+                            IngestionJob.attempts: IngestionJob.attempts + 1,
+                            IngestionJob.updated_at: now,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+                if claimed:
+                    return IngestionJobModel.model_validate(db.get(IngestionJob, id))
+        return None
+
+    def update_job_progress(
+        self,
+        id: str,
+        progress: Optional[dict] = None,
+        checkpoint: Optional[dict] = None,
+    ):
+        """Records progress, and that the job is still alive."""
+        values = {IngestionJob.updated_at: int(time.time())}
+        if progress is not None:
+            values[IngestionJob.progress] = progress
+        if checkpoint is not None:
+            values[IngestionJob.checkpoint] = checkpoint
+
+        with get_db() as db:
+            db.query(IngestionJob).filter_by(id=id, status="running").update(values)
+            db.commit()
+
+    def complete_job(self, id: str, result: Optional[dict] = None):
+        with get_db() as db:
+            db.query(IngestionJob).filter_by(id=id).update(
+                {
+                    IngestionJob.status: "completed",
+                    IngestionJob.result: result,
+                    IngestionJob.error: None,
+                    IngestionJob.updated_at: int(time.time()),
+                }
+            )
+            db.commit()
+
+    def fail_job(self, id: str, error: str, retry_at: Optional[int] = None):
+        """Fails the job, or puts it back in the queue if `retry_at` is set."""
+        with get_db() as db:
+            db.query(IngestionJob).filter_by(id=id).update(
+                {
+                    IngestionJob.status: "pending" if retry_at else "failed",
+                    IngestionJob.error: error,
+                    IngestionJob.run_at: retry_at or IngestionJob.run_at,
+                    IngestionJob.updated_at: int(time.time()),
+                }
+            )
+            db.commit()
+
+    def requeue_stale_jobs(self, timeout: int, max_attempts: int) -> int:
+        """
+        Puts back in the queue the running jobs that were not updated for
+        `timeout` seconds, as the process running them is gone, and returns
+        their count. Jobs which already had `max_attempts` attempts are
+        failed instead, as they may well be what killed the process.
+        """
+        now = int(time.time())
+        with get_db() as db:
+            stale = db.query(IngestionJob).filter(
+                IngestionJob.status == "running",
+                IngestionJob.updated_at < now - timeout,
+            )
+
+            failed = stale.filter(IngestionJob.attempts >= max_attempts).update(
+                {
+                    IngestionJob.status: "failed",
+                    IngestionJob.error: f"Interrupted after {max_attempts} attempts",
+                    IngestionJob.updated_at: now,
+                },
+                synchronize_session=False,
+            )
+            count = stale.update(
+                {IngestionJob.status: "pending", IngestionJob.updated_at: now},
+                synchronize_session=False,
+            )
+            db.commit()
+
+            if failed:
+                log.warning(f"Failed {failed} ingestion jobs interrupted too often")
+            return count
+
+
+IngestionJobs = IngestionJobsTable()
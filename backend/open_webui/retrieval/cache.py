@@ -0,0 +1,241 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class Cache:
+    """
+    Base of the caches in front of the retrieval pipeline, counting their
+    lookups by outcome in `metrics`. Backend errors never fail the caller,
+    they are counted and logged and the cache behaves as empty.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        lookups: tuple[str, ...] = ("hits", "misses"),
+        hits: tuple[str, ...] = ("hits",),
+    ):
+        self.name = name
+        self.lookups = lookups
+        self.hits = hits
+
+        self.metrics = {counter: 0 for counter in [*lookups, "errors"]}
+
+    def get_metrics(self) -> dict:
+        lookups = sum(self.metrics[counter] for counter in self.lookups)
+        hits = sum(self.metrics[counter] for counter in self.hits)
+        return {**self.metrics, "hit_rate": hits / lookups if lookups else 0.0}
+
+    def call_backend(self, action: str, fn: Callable, default=None):
+        """Returns `fn()`, or `default` if it fails to `action` the cache."""
+        try:
+            return fn()
+        except Exception as e:
+            self.metrics["errors"] += 1
+            log.warning(f"Failed to {action} the {self.name}: {e}")
+            return default
+
+
+class SQLiteCacheStore:
+    """
+    Entries of a cache in a table of a local SQLite database, keyed by
+    namespace and key. The least recently used entries are evicted once the
+    table holds more than `max_entries` entries or `max_size` bytes, down to
+    90% of the limit so that eviction does not run on every write.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        max_entries: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ):
+        self.table = table
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+            "size INTEGER NOT NULL, accessed_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_accessed_at "
+            f"ON {table} (accessed_at)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.commit()
+
+        self.count, self.size = self._measure()
+
+    def _measure(self) -> tuple[int, int]:
+        return self.conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+
+    def _is_full(self) -> bool:
+        return (self.max_entries is not None and self.count > self.max_entries) or (
+            self.max_size is not None and self.size > self.max_size
+        )
+
+    def get_many(self, keys: list[str], namespace: str = "") -> dict[str, bytes]:
+        items = {}
+        with self.lock:
+            # Stay below the SQLite limit of bound parameters
+            for idx in range(0, len(keys), 500):
+                batch = keys[idx : idx + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, value FROM {self.table} "
+                    f"WHERE namespace = ? AND key IN ({','.join('?' * len(batch))})",
+                    [namespace, *batch],
+                ).fetchall()
+                items.update(rows)
+
+                if rows:
+                    self.conn.execute(
+                        f"UPDATE {self.table} SET accessed_at = ? "
+                        f"WHERE namespace = ? AND key IN ({','.join('?' * len(rows))})",
+                        [time.time(), namespace, *(key for key, _ in rows)],
+                    )
+            self.conn.commit()
+        return items
+
+    def set_many(self, items: dict[str, bytes], namespace: str = ""):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)",
+                [
+                    (namespace, key, value, len(value), now)
+                    for key, value in items.items()
+                ],
+            )
+            self.conn.commit()
+
+            self.count += len(items)
+            self.size += sum(len(value) for value in items.values())
+            if self._is_full():
+                self.evict()
+
+    def get(self, key: str, namespace: str = "") -> Optional[bytes]:
+        return self.get_many([key], namespace).get(key)
+
+    def set(self, key: str, value: bytes, namespace: str = ""):
+        self.set_many({key: value}, namespace)
+
+    def evict(self):
+        # Other processes share the database, measure before evicting
+        self.count, self.size = self._measure()
+        if not self._is_full():
+            return
+
+        conditions, params = [], []
+        if self.max_entries is not None:
+            conditions.append("kept_count > ?")
+            params.append(int(self.max_entries * 0.9))
+        if self.max_size is not None:
+            conditions.append("kept_size > ?")
+            params.append(int(self.max_size * 0.9))
+
+        # Keeps the most recently used entries that fit in the limits
+        self.conn.execute(
+            f"DELETE FROM {self.table} WHERE rowid IN ("
+            "SELECT rowid FROM (SELECT rowid, "
+            "ROW_NUMBER() OVER recent AS kept_count, "
+            "SUM(size) OVER recent AS kept_size "
+            f"FROM {self.table} WINDOW recent AS ("
+            "ORDER BY accessed_at DESC, rowid DESC ROWS UNBOUNDED PRECEDING)) "
+            f"WHERE {' OR '.join(conditions)})",
+            params,
+        )
+        self.conn.commit()
+        self.count, self.size = self._measure()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+            self.conn.commit()
+
+    def delete_other_namespaces(self, namespace: str):
+        with self.lock:
+            self.conn.execute(
+                f"DELETE FROM {self.table} WHERE namespace != ?", (namespace,)
+            )
+            self.conn.commit()
+            self.count, self.size = self._measure()
+
+
+class RedisCacheStore:
+    """
+    Entries of a cache in Redis under `redis_key_prefix`, shared by all
+    instances. Entries expire `ttl` seconds after they were written, or
+    after they were last read if `sliding`. Beyond that the size of the
+    cache is bounded by the eviction policy of the Redis server.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        redis_sentinels=[],
+        redis_key_prefix: str = "open-webui:cache",
+        ttl: int = 24 * 60 * 60,
+        sliding: bool = True,
+        decode_responses: bool = False,
+    ):
+        from open_webui.utils.redis import get_redis_connection
+
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=decode_responses
+        )
+        self.redis_key_prefix = redis_key_prefix
+        self.ttl = ttl
+        self.sliding = sliding
+
+    def get_redis_key(self, key: str) -> str:
+        return f"{self.redis_key_prefix}:{key}"
+
+    def get_many(self, keys: list[str]) -> dict:
+        with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                if self.sliding:
+                    pipe.getex(self.get_redis_key(key), ex=self.ttl)
+                else:
+                    pipe.get(self.get_redis_key(key))
+            values = pipe.execute()
+
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, items: dict):
+        with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self.get_redis_key(key), value, ex=self.ttl)
+            pipe.execute()
+
+    def get(self, key: str):
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value):
+        self.set_many({key: value})
@@ -0,0 +1,259 @@
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from typing import Callable, Optional
+
+from open_webui.config import (
+    RAG_EMBEDDING_CACHE,
+    RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+    RAG_EMBEDDING_CACHE_PATH,
+    RAG_EMBEDDING_CACHE_REDIS_URL,
+    RAG_EMBEDDING_CACHE_TTL,
+)
+from open_webui.retrieval.cache import Cache, RedisCacheStore, SQLiteCacheStore
+from open_webui.env import (
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def get_namespace(engine: str, model: str) -> str:
+    """Embeddings of different engines or models never share cache entries."""
+    return hashlib.sha256(f"{engine}\0{model}".encode()).hexdigest()[:16]
+
+
+def get_key(prefix: Optional[str], text: str) -> str:
+    return hashlib.sha256(f"{prefix or ''}\0{text}".encode()).hexdigest()
+
+
+def encode_embedding(embedding: list[float]) -> bytes:
+    # float32, the precision the vector databases store embeddings with
+    return array("f", embedding).tobytes()
+
+
+def decode_embedding(data: bytes) -> list[float]:
+    embedding = array("f")
+    embedding.frombytes(data)
+    return embedding.tolist()
+
+
+class EmbeddingCacheBackend(ABC):
+    """
+    Storage of the embedding cache, encoded embeddings keyed by namespace
+    and key.
+    """
+
+    @abstractmethod
+    def get_many(self, namespace: str, keys: list[str]) -> dict[str, bytes]:
+        """The cached embeddings of the keys, missing keys are left out."""
+        pass
+
+    @abstractmethod
+    def set_many(self, namespace: str, items: dict[str, bytes]):
+        pass
+
+    @abstractmethod
+    def get_active_namespace(self) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def set_active_namespace(self, namespace: str):
+        """Makes `namespace` the active one and drops the entries of the others."""
+        pass
+
+
+class SQLiteEmbeddingCache(EmbeddingCacheBackend):
+    """
+    Embeddings stored in a local SQLite database, the least recently used
+    entries are evicted once the cache holds more than `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1_000_000):
+        self.store = SQLiteCacheStore(path, "embedding", max_entries=max_entries)
+
+    def get_many(self, namespace: str, keys: list[str]) -> dict[str, bytes]:
+        return self.store.get_many(keys, namespace)
+
+    def set_many(self, namespace: str, items: dict[str, bytes]):
+        self.store.set_many(items, namespace)
+
+    def get_active_namespace(self) -> Optional[str]:
+        return self.store.get_meta("namespace")
+
+    def set_active_namespace(self, namespace: str):
+        self.store.set_meta("namespace", namespace)
+        self.store.delete_other_namespaces(namespace)
+
+
+class RedisEmbeddingCache(EmbeddingCacheBackend):
+    """
+    Embeddings stored in Redis, shared by all instances, each expiring `ttl`
+    seconds after it was last used.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        redis_sentinels=[],
+        redis_key_prefix: str = "open-webui:embedding_cache",
+        ttl: int = 30 * 24 * 60 * 60,
+    ):
+        self.store = RedisCacheStore(
+            redis_url, redis_sentinels, redis_key_prefix=redis_key_prefix, ttl=ttl
+        )
+
+    def get_many(self, namespace: str, keys: list[str]) -> dict[str, bytes]:
+        items = self.store.get_many([f"{namespace}:{key}" for key in keys])
+        return {key.split(":", 1)[1]: value for key, value in items.items()}
+
+    def set_many(self, namespace: str, items: dict[str, bytes]):
+        self.store.set_many(
+            {f"{namespace}:{key}": value for key, value in items.items()}
+        )
+
+    def get_active_namespace(self) -> Optional[str]:
+        namespace = self.store.redis.get(self.store.get_redis_key("namespace"))
+        return namespace.decode() if namespace else None
+
+    def set_active_namespace(self, namespace: str):
+        redis = self.store.redis
+        redis.set(self.store.get_redis_key("namespace"), namespace)
+
+        keys = []
+        for key in redis.scan_iter(match=self.store.get_redis_key("*:*"), count=1000):
+            if key.decode().split(":")[-2] != namespace:
+                keys.append(key)
+            if len(keys) >= 1000:
+                redis.unlink(*keys)
+                keys = []
+        if keys:
+            redis.unlink(*keys)
+
+
+class EmbeddingCache(Cache):
+    """
+    Content addressed cache in front of the embedding functions, keyed by
+    (engine, model, prefix, sha256(text)). Only the texts missing from the
+    cache are sent to the embedding engine, in a single call.
+    """
+
+    def __init__(self, backend: EmbeddingCacheBackend):
+        super().__init__("embedding cache")
+        self.backend = backend
+        self.namespace = None
+
+    def activate(self, namespace: str):
+        """Drops the cached embeddings of other models when the model changed."""
+        if namespace == self.namespace:
+            return
+        self.namespace = namespace
+
+        active_namespace = self.call_backend(
+            "check", self.backend.get_active_namespace, default=namespace
+        )
+        if active_namespace != namespace:
+            log.info("Embedding model changed, clearing the embedding cache")
+            # Clearing a large cache can take a while
+            threading.Thread(
+                target=self.call_backend,
+                args=("clear", lambda: self.backend.set_active_namespace(namespace)),
+                daemon=True,
+            ).start()
+
+    def get_many(self, namespace: str, keys: list[str]) -> dict[str, list[float]]:
+        return self.call_backend(
+            "read from",
+            lambda: {
+                key: decode_embedding(value)
+                for key, value in self.backend.get_many(namespace, keys).items()
+            },
+            default={},
+        )
+
+    def set_many(self, namespace: str, items: dict[str, list[float]]):
+        self.call_backend(
+            "write to",
+            lambda: self.backend.set_many(
+                namespace,
+                {key: encode_embedding(value) for key, value in items.items()},
+            ),
+        )
+
+    def wrap(self, embedding_function: Callable, engine: str, model: str) -> Callable:
+        namespace = get_namespace(engine, model)
+        self.activate(namespace)
+
+        def cached_embedding_function(query, prefix=None, user=None):
+            texts = query if isinstance(query, list) else [query]
+            keys = [get_key(prefix, text) for text in texts]
+
+            embeddings = self.get_many(namespace, keys)
+
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in embeddings:
+                    missing[key] = text
+
+            self.metrics["hits"] += len(texts) - len(missing)
+            self.metrics["misses"] += len(missing)
+
+            if missing:
+                missing_texts = list(missing.values())
+                result = embedding_function(
+                    missing_texts if isinstance(query, list) else query,
+                    prefix=prefix,
+                    user=user,
+                )
+                if result is None:
+                    return None
+
+                computed = result if isinstance(query, list) else [result]
+                if len(computed) != len(missing_texts) or any(
+                    embedding is None for embedding in computed
+                ):
+                    # Nothing to cache, let the caller handle the failure
+                    return result
+
+                computed = dict(zip(missing.keys(), computed))
+                self.set_many(namespace, computed)
+                embeddings.update(computed)
+
+            if isinstance(query, list):
+                return [embeddings[key] for key in keys]
+            return embeddings[keys[0]]
+
+        return cached_embedding_function
+
+
+def get_embedding_cache(cache_type: str) -> Optional[EmbeddingCache]:
+    match cache_type:
+        case "sqlite":
+            return EmbeddingCache(
+                SQLiteEmbeddingCache(
+                    RAG_EMBEDDING_CACHE_PATH,
+                    max_entries=RAG_EMBEDDING_CACHE_MAX_ENTRIES,
+                )
+            )
+        case "redis":
+            from open_webui.utils.redis import get_sentinels_from_env
+
+            return EmbeddingCache(
+                RedisEmbeddingCache(
+                    RAG_EMBEDDING_CACHE_REDIS_URL,
+                    get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+                    redis_key_prefix=f"{REDIS_KEY_PREFIX}:embedding_cache",
+                    ttl=RAG_EMBEDDING_CACHE_TTL,
+                )
+            )
+        case _:
+            return None
+
+
+EMBEDDING_CACHE = get_embedding_cache(RAG_EMBEDDING_CACHE)
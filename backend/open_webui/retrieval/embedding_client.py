@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import random
+import threading
+from typing import Awaitable, Callable, Optional
+
+import aiohttp
+
+from open_webui.config import (
+    RAG_EMBEDDING_BATCH_MAX_TOKENS,
+    RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    RAG_EMBEDDING_MAX_RETRIES,
+)
+from open_webui.env import (
+    AIOHTTP_CLIENT_SESSION_SSL,
+    AIOHTTP_CLIENT_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_DELAY = 30
+
+
+class EmbeddingBatchTooLarge(Exception):
+    pass
+
+
+def estimate_tokens(text: str) -> int:
+    # About four characters per token, without depending on a tokenizer
+    return len(text) // 4 + 1
+
+
+def get_batches(texts: list[str], batch_size: int, max_tokens: int) -> list[list[str]]:
+    """
+    Splits `texts` into batches of at most `batch_size` texts and, unless a
+    single text exceeds it, `max_tokens` estimated tokens.
+    """
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def get_retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+    return min(2**attempt, MAX_RETRY_DELAY) * (0.5 + random.random() / 2)
+
+
+class EmbeddingClient:
+    """
+    Client of the embedding APIs shared by ingestion and retrieval. Requests
+    run on a background event loop over one keep-alive connection pool, with
+    at most `concurrency` batches in flight across the process. Rate limited
+    and failed requests are retried with backoff, and batches the server
+    rejects as too large are split in half.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        max_batch_tokens: int = 100_000,
+    ):
+        self.concurrency = max(concurrency, 1)
+        self.max_retries = max_retries
+        self.max_batch_tokens = max_batch_tokens
+
+        self.lock = threading.Lock()
+        self.loop = None
+        self.session = None
+        self.semaphore = None
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self.loop.run_forever,
+                    name="embedding-client",
+                    daemon=True,
+                ).start()
+        return self.loop
+
+    def run(self, coroutine: Awaitable):
+        """Runs `coroutine` on the client loop, for synchronous callers."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.get_loop()).result()
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency * 2),
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+                trust_env=True,
+            )
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        return self.session
+
+    async def post(self, url: str, headers: dict, json: dict) -> dict:
+        session = self.get_session()
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self.semaphore:
+                    async with session.post(
+                        url, headers=headers, json=json, ssl=AIOHTTP_CLIENT_SESSION_SSL
+                    ) as r:
+                        if r.status in (400, 413):
+                            error = await r.text()
+                            if r.status == 413 or any(
+                                word in error.lower() for word in ("token", "context")
+                            ):
+                                raise EmbeddingBatchTooLarge(error)
+
+                        if (
+                            r.status not in RETRY_STATUSES
+                            or attempt == self.max_retries
+                        ):
+                            r.raise_for_status()
+                            return await r.json()
+                        retry_after = r.headers.get("Retry-After")
+                        log.warning(f"Embedding request failed with {r.status}")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise
+                log.warning(f"Embedding request failed: {e}")
+
+            await asyncio.sleep(get_retry_delay(attempt, retry_after))
+
+    async def embed_batch(
+        self, embed: Callable[[list[str]], Awaitable[list]], texts: list[str]
+    ) -> list:
+        try:
+            return await embed(texts)
+        except EmbeddingBatchTooLarge:
+            if len(texts) == 1:
+                raise
+            log.info(f"Embedding batch of {len(texts)} texts too large, splitting")
+            middle = len(texts) // 2
+            first, second = await asyncio.gather(
+                self.embed_batch(embed, texts[:middle]),
+                self.embed_batch(embed, texts[middle:]),
+            )
+            return first + second
+
+    async def embed(
+        self,
+        embed: Callable[[list[str]], Awaitable[list]],
+        texts: list[str],
+        batch_size: int,
+    ) -> list:
+        """
+        Embeds `texts` with `embed`, a coroutine embedding one batch, running
+        the batches concurrently. Returns the embeddings in order.
+        """
+        batches = get_batches(texts, max(batch_size, 1), self.max_batch_tokens)
+        results = await asyncio.gather(
+            *(self.embed_batch(embed, batch) for batch in batches)
+        )
+        return [embedding for result in results for embedding in result]
+
+
+EMBEDDING_CLIENT = EmbeddingClient(
+    concurrency=RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    max_retries=RAG_EMBEDDING_MAX_RETRIES,
+    max_batch_tokens=RAG_EMBEDDING_BATCH_MAX_TOKENS,
+)
@@ -0,0 +1,121 @@
+import logging
+import threading
+from collections import deque
+from typing import Callable, Iterable, Iterator
+
+from langchain_core.documents import Document
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def get_size(docs: list[Document]) -> int:
+    return sum(len(doc.page_content) for doc in docs)
+
+
+def batch_docs(
+    docs: Iterable[Document], batch_size: int, max_batch_size: int
+) -> Iterator[list[Document]]:
+    """
+    Groups `docs` into batches of at most `batch_size` documents and
+    `max_batch_size` characters.
+    """
+    batch = []
+    size = 0
+    for doc in docs:
+        if batch and (
+            len(batch) >= batch_size or size + len(doc.page_content) > max_batch_size
+        ):
+            yield batch
+            batch = []
+            size = 0
+        batch.append(doc)
+        size += len(doc.page_content)
+    if batch:
+        yield batch
+
+
+class BoundedBuffer:
+    """
+    Queue of document batches holding at most `max_size` characters, a
+    batch larger than that is let through on its own. `put` blocks while
+    the buffer is full, which holds the producer back to the pace of the
+    consumer.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self.items = deque()
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, item) -> bool:
+        """Returns False once the buffer is closed."""
+        size = get_size(item) if isinstance(item, list) else 0
+        with self.condition:
+            while not self.closed and self.items and self.size + size > self.max_size:
+                self.condition.wait()
+            if self.closed:
+                return False
+            self.items.append((item, size))
+            self.size += size
+            self.condition.notify_all()
+            return True
+
+    def get(self):
+        with self.condition:
+            while not self.items:
+                self.condition.wait()
+            item, size = self.items.popleft()
+            self.size -= size
+            self.condition.notify_all()
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class _Done:
+    pass
+
+
+def run_pipeline(
+    batches: Iterable[list[Document]],
+    consume: Callable[[list[Document]], None],
+    max_buffer_size: int,
+):
+    """
+    Produces `batches` (loading and splitting) on a background thread and
+    consumes them (embedding and inserting) on the calling thread as they
+    arrive, with at most `max_buffer_size` characters waiting in between.
+    Errors of either side stop both and are raised.
+    """
+    buffer = BoundedBuffer(max_buffer_size)
+
+    def produce():
+        try:
+            for batch in batches:
+                if not buffer.put(batch):
+                    return
+            buffer.put(_Done())
+        except Exception as e:
+            buffer.put(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, _Done):
+                break
+            if isinstance(item, Exception):
+                raise item
+            consume(item)
+    finally:
+        buffer.close()
+        producer.join()
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request
+from starlette.datastructures import Headers
+
+from open_webui.config import (
+    RAG_INGESTION_JOB_MAX_ATTEMPTS,
+    RAG_INGESTION_JOB_POLL_INTERVAL,
+    RAG_INGESTION_JOB_STALE_TIMEOUT,
+    RAG_INGESTION_JOB_WORKERS,
+)
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.models.ingestion_jobs import IngestionJobModel, IngestionJobs
+from open_webui.models.users import UserModel, Users
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# handler(request, user, job, progress) -> result, where
+# progress(done, total, checkpoint=None, **stats) records the progress and,
+# if given, the checkpoint the job resumes from when it is run again
+JobHandler = Callable[
+    [Request, UserModel, IngestionJobModel, Callable[..., None]], Optional[dict]
+]
+
+
+def get_request(app) -> Request:
+    # Handlers run outside of any request, as the user who created the job
+    return Request(
+        {
+            "type": "http",
+            "asgi.version": "3.0",
+            "asgi.spec_version": "2.0",
+            "method": "POST",
+            "path": "/internal",
+            "query_string": b"",
+            "headers": Headers({}).raw,
+            "client": ("127.0.0.1", 12345),
+            "server": ("127.0.0.1", 80),
+            "scheme": "http",
+            "app": app,
+        }
+    )
+
+
+def get_retry_delay(attempts: int) -> int:
+    return min(30 * 4 ** (attempts - 1), 3600)
+
+
+class IngestionJobQueue:
+    """
+    Durable queue of background ingestion jobs, stored in the database so
+    that they survive restarts and are shared by all instances. Every
+    process runs `concurrency` workers which claim pending jobs, run their
+    handler in a thread and report progress to the user over socket.io.
+    Failed jobs are retried with backoff up to `max_attempts` times, and
+    jobs left running by a process that is gone are put back in the queue,
+    up to `max_attempts` times as well.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        max_attempts: int = 3,
+        poll_interval: int = 5,
+        stale_timeout: int = 300,
+    ):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+
+        self.handlers: dict[str, JobHandler] = {}
+        self.app = None
+        self.emit = None
+        self.loop = None
+        self.wakeup = None
+        self.tasks = []
+
+    def register(self, type: str):
+        def decorator(handler: JobHandler) -> JobHandler:
+            self.handlers[type] = handler
+            return handler
+
+        return decorator
+
+    def enqueue(
+        self, user_id: str, type: str, payload: Optional[dict] = None
+    ) -> IngestionJobModel:
+        if type not in self.handlers:
+            raise ValueError(f"Unknown ingestion job type: {type}")
+
+        job = IngestionJobs.insert_new_job(user_id, type, payload)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        return job
+
+    def start(
+        self,
+        app,
+        emit: Optional[Callable[[str, str, dict], Awaitable]] = None,
+    ):
+        self.app = app
+        self.emit = emit
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+
+        self.tasks = [
+            asyncio.create_task(self.worker()) for _ in range(self.concurrency)
+        ]
+        self.tasks.append(asyncio.create_task(self.periodic_requeue_stale_jobs()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.loop = None
+
+    async def worker(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(IngestionJobs.claim_next_job)
+            except Exception as e:
+                log.exception(f"Error claiming an ingestion job: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                continue
+
+            await self.run(job)
+
+    async def periodic_requeue_stale_jobs(self):
+        while True:
+            try:
+                count = await asyncio.to_thread(
+                    IngestionJobs.requeue_stale_jobs,
+                    self.stale_timeout,
+                    self.max_attempts,
+                )
+                if count:
+                    log.info(f"Requeued {count} stale ingestion jobs")
+                    self.wakeup.set()
+            except Exception as e:
+                log.exception(f"Error requeuing stale ingestion jobs: {e}")
+            await asyncio.sleep(self.stale_timeout)
+
+    async def heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.stale_timeout / 3)
+            await asyncio.to_thread(IngestionJobs.update_job_progress, job_id)
+
+    async def emit_job(self, job_id: str):
+        if self.emit is None:
+            return
+        try:
+            job = IngestionJobs.get_job_by_id(job_id)
+            await self.emit(
+                job.user_id,
+                "ingestion-job",
+                job.model_dump(exclude={"payload", "checkpoint"}),
+            )
+        except Exception as e:
+            log.debug(f"Error emitting ingestion job {job_id}: {e}")
+
+    async def run(self, job: IngestionJobModel):
+        log.info(f"Running ingestion job {job.id} ({job.type}), attempt {job.attempts}")
+
+        handler = self.handlers.get(job.type)
+        user = Users.get_user_by_id(job.user_id)
+        if handler is None or user is None:
+            IngestionJobs.fail_job(job.id, f"Cannot run job of type {job.type}")
+            await self.emit_job(job.id)
+            return
+
+        loop = asyncio.get_running_loop()
+
+        def progress(done: int, total: int, checkpoint: Optional[dict] = None, **stats):
+            IngestionJobs.update_job_progress(
+                job.id, {"done": done, "total": total, **stats}, checkpoint
+            )
+            asyncio.run_coroutine_threadsafe(self.emit_job(job.id), loop)
+
+        await self.emit_job(job.id)
+        heartbeat = asyncio.create_task(self.heartbeat(job.id))
+        try:
+            result = await asyncio.to_thread(
+                handler, get_request(self.app), user, job, progress
+            )
+            IngestionJobs.complete_job(job.id, result)
+        except Exception as e:
+            log.exception(f"Ingestion job {job.id} failed: {e}")
+            retry_at = None
+            if job.attempts < self.max_attempts:
+                retry_at = int(time.time()) + get_retry_delay(job.attempts)
+            IngestionJobs.fail_job(
+                job.id, str(e.detail) if hasattr(e, "detail") else str(e), retry_at
+            )
+        finally:
+            heartbeat.cancel()
+
+        await self.emit_job(job.id)
+
+
+INGESTION_JOB_QUEUE = IngestionJobQueue(
+    concurrency=RAG_INGESTION_JOB_WORKERS,
+    max_attempts=RAG_INGESTION_JOB_MAX_ATTEMPTS,
+    poll_interval=RAG_INGESTION_JOB_POLL_INTERVAL,
+    stale_timeout=RAG_INGESTION_JOB_STALE_TIMEOUT,
+)
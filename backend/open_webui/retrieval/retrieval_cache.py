@@ -0,0 +1,234 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from open_webui.config import (
+    RAG_RETRIEVAL_CACHE,
+    RAG_RETRIEVAL_CACHE_MAX_ENTRIES,
+    RAG_RETRIEVAL_CACHE_REDIS_URL,
+    RAG_RETRIEVAL_CACHE_TTL,
+)
+from open_webui.retrieval.cache import Cache, RedisCacheStore
+from open_webui.env import (
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def to_json(value):
+    # Scores computed with numpy
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+class RetrievalCacheBackend(ABC):
+    """
+    Storage of the retrieval cache, serialized results keyed by the hash of
+    the lookup, and a version counter per collection.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str):
+        pass
+
+    @abstractmethod
+    def get_versions(self, collection_names: list[str]) -> list[int]:
+        """The versions of the collections, 0 for those never written to."""
+        pass
+
+    @abstractmethod
+    def bump_version(self, collection_name: str):
+        pass
+
+
+class MemoryRetrievalCache(RetrievalCacheBackend):
+    """
+    Results kept in the memory of the process, the least recently used ones
+    are evicted once the cache holds more than `max_entries`. Writes only
+    invalidate the results of the process, use Redis with several workers.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: int = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.lock = threading.Lock()
+
+        self.items: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.versions: dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self.items[key]
+                return None
+
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self.lock:
+            self.items[key] = (time.monotonic() + self.ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_entries:
+                self.items.popitem(last=False)
+
+    def get_versions(self, collection_names: list[str]) -> list[int]:
+        with self.lock:
+            return [self.versions.get(name, 0) for name in collection_names]
+
+    def bump_version(self, collection_name: str):
+        with self.lock:
+            self.versions[collection_name] = self.versions.get(collection_name, 0) + 1
+
+
+class RedisRetrievalCache(RetrievalCacheBackend):
+    """
+    Results stored in Redis, shared by all instances, each expiring `ttl`
+    seconds after it was computed. Collection versions are Redis counters,
+    so a write on any instance invalidates the results of all of them.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        redis_sentinels=[],
+        redis_key_prefix: str = "open-webui:retrieval_cache",
+        ttl: int = 300,
+    ):
+        self.store = RedisCacheStore(
+            redis_url,
+            redis_sentinels,
+            redis_key_prefix=redis_key_prefix,
+            ttl=ttl,
+            sliding=False,
+            decode_responses=True,
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        return self.store.get(f"result:{key}")
+
+    def set(self, key: str, value: str):
+        self.store.set(f"result:{key}", value)
+
+    def get_versions(self, collection_names: list[str]) -> list[int]:
+        if not collection_names:
+            return []
+        versions = self.store.redis.mget(
+            [self.store.get_redis_key(f"version:{name}") for name in collection_names]
+        )
+        return [int(version or 0) for version in versions]
+
+    def bump_version(self, collection_name: str):
+        self.store.redis.incr(self.store.get_redis_key(f"version:{collection_name}"))
+
+
+class RetrievalCache(Cache):
+    """
+    Cache of the results of searching collections, keyed by the collections
+    and their versions, the normalized queries and the search parameters.
+    Writes to a collection bump its version, so that results are never
+    served from a collection that changed since.
+    """
+
+    def __init__(self, backend: RetrievalCacheBackend):
+        super().__init__("retrieval cache")
+        self.backend = backend
+
+    def get_key(
+        self, collection_names: list[str], queries: list[str], params: dict
+    ) -> Optional[str]:
+        # The version of "*" is bumped when all the collections change
+        collection_names = ["*", *sorted(collection_names)]
+        versions = self.call_backend(
+            "read the versions of",
+            lambda: self.backend.get_versions(collection_names),
+        )
+        if versions is None:
+            return None
+
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "collections": list(zip(collection_names, versions)),
+                    "queries": [normalize_query(query) for query in queries],
+                    "params": params,
+                },
+                sort_keys=True,
+                default=str,
+            ).encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self.call_backend("read from", lambda: self.backend.get(key))
+        if value is None:
+            self.metrics["misses"] += 1
+            return None
+
+        self.metrics["hits"] += 1
+        return json.loads(value)
+
+    def set(self, key: str, result: dict):
+        self.call_backend(
+            "write to",
+            lambda: self.backend.set(key, json.dumps(result, default=to_json)),
+        )
+
+    def invalidate(self, collection_name: str):
+        self.call_backend(
+            f"invalidate {collection_name} in",
+            lambda: self.backend.bump_version(collection_name),
+        )
+
+    def invalidate_all(self):
+        self.invalidate("*")
+
+
+def get_retrieval_cache(cache_type: str) -> Optional[RetrievalCache]:
+    match cache_type:
+        case "memory":
+            return RetrievalCache(
+                MemoryRetrievalCache(
+                    max_entries=RAG_RETRIEVAL_CACHE_MAX_ENTRIES,
+                    ttl=RAG_RETRIEVAL_CACHE_TTL,
+                )
+            )
+        case "redis":
+            from open_webui.utils.redis import get_sentinels_from_env
+
+            return RetrievalCache(
+                RedisRetrievalCache(
+                    RAG_RETRIEVAL_CACHE_REDIS_URL,
+                    get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+                    redis_key_prefix=f"{REDIS_KEY_PREFIX}:retrieval_cache",
+                    ttl=RAG_RETRIEVAL_CACHE_TTL,
+                )
+            )
+        case _:
+            return None
+
+
+RETRIEVAL_CACHE = get_retrieval_cache(RAG_RETRIEVAL_CACHE)
@@ -1,17 +1,15 @@
 import logging
+import operator
 import os
+import uuid
 from typing import Optional, Union
 
-import requests
+import numpy as np
 import hashlib
 from concurrent.futures import ThreadPoolExecutor
-import time
 
 from urllib.parse import quote
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
-from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
@@ -20,8 +18,12 @@ from open_webui.models.users import UserModel
 from open_webui.models.files import Files
 from open_webui.models.knowledge import Knowledges
 from open_webui.models.notes import Notes
+from open_webui.models.bm25 import BM25Index
 
 from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
+from open_webui.retrieval.embedding_client import EMBEDDING_CLIENT
+from open_webui.retrieval.retrieval_cache import RETRIEVAL_CACHE
 from open_webui.utils.access_control import has_access
 
 
@@ -40,42 +42,41 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-from typing import Any
-
-from langchain_core.callbacks import CallbackManagerForRetrieverRun
-from langchain_core.retrievers import BaseRetriever
-
-
-class VectorSearchRetriever(BaseRetriever):
-    collection_name: Any
-    embedding_function: Any
-    top_k: int
-
-    def _get_relevant_documents(
-        self,
-        query: str,
-        *,
-        run_manager: CallbackManagerForRetrieverRun,
-    ) -> list[Document]:
-        result = VECTOR_DB_CLIENT.search(
-            collection_name=self.collection_name,
-            vectors=[self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)],
-            limit=self.top_k,
-        )
-
-        ids = result.ids[0]
-        metadatas = result.metadatas[0]
-        documents = result.documents[0]
-
-        results = []
-        for idx in range(len(ids)):
-            results.append(
-                Document(
-                    metadata=metadatas[idx],
-                    page_content=documents[idx],
-                )
-            )
-        return results
+def get_cosine_scores(query_embedding, document_embeddings) -> np.ndarray:
+    """Cosine similarity of one query to many documents in one matrix op."""
+    query = np.asarray(query_embedding, dtype=np.float32)
+    documents = np.asarray(document_embeddings, dtype=np.float32).reshape(
+        -1, query.shape[0]
+    )
+    norms = np.linalg.norm(documents, axis=1) * np.linalg.norm(query)
+    return documents @ query / np.maximum(norms, 1e-12)
+
+
+def reciprocal_rank_fusion(
+    result_lists: list[list[dict]], weights: list[float], c: int = 60
+) -> list[dict]:
+    """
+    Weighted reciprocal rank fusion of ranked candidates, deduplicated by
+    text as LangChain's EnsembleRetriever does.
+    """
+    scores = {}
+    candidates = {}
+    for results, weight in zip(result_lists, weights):
+        for rank, candidate in enumerate(results, start=1):
+            key = candidate["text"]
+            scores[key] = scores.get(key, 0.0) + weight / (rank + c)
+            if candidates.get(key, {}).get("vector") is None:
+                candidates[key] = candidate
+
+    return [candidates[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+def ensure_bm25_index(collection_name: str) -> bool:
+    """Indexes the collection for BM25 search unless already done."""
+    return BM25Index.ensure_collection(
+        collection_name,
+        lambda: VECTOR_DB_CLIENT.get(collection_name=collection_name),
+    )
 
 
 def query_doc(
@@ -112,75 +113,186 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
-def query_doc_with_hybrid_search(
+def get_hybrid_search_candidates(
     collection_name: str,
-    collection_result: GetResult,
     query: str,
-    embedding_function,
+    query_embedding: list[float],
     k: int,
-    reranking_function,
-    k_reranker: int,
-    r: float,
     hybrid_bm25_weight: float,
-) -> dict:
-    try:
-        log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=collection_result.documents[0],
-            metadatas=collection_result.metadatas[0],
+) -> list[dict]:
+    """
+    Top `k` vector search and BM25 results of the collection, fused. Vector
+    search results carry their stored vector when the vector DB returns it.
+    """
+    result_lists = []
+    weights = []
+
+    if hybrid_bm25_weight > 0:
+        result_lists.append(
+            [
+                {"text": result["text"], "metadata": result["metadata"], "vector": None}
+                for result in BM25Index.search(collection_name, query, k)
+            ]
         )
-        bm25_retriever.k = k
+        weights.append(min(hybrid_bm25_weight, 1.0))
 
-        vector_search_retriever = VectorSearchRetriever(
+    if hybrid_bm25_weight < 1:
+        result = VECTOR_DB_CLIENT.search(
             collection_name=collection_name,
-            embedding_function=embedding_function,
-            top_k=k,
+            vectors=[query_embedding],
+            limit=k,
         )
-
-        if hybrid_bm25_weight <= 0:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[vector_search_retriever], weights=[1.0]
-            )
-        elif hybrid_bm25_weight >= 1:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever], weights=[1.0]
+        if result:
+            vectors = result.vectors[0] if result.vectors else None
+            result_lists.append(
+                [
+                    {
+                        "text": text,
+                        "metadata": metadata,
+                        "vector": vectors[idx] if vectors else None,
+                    }
+                    for idx, (text, metadata) in enumerate(
+                        zip(result.documents[0], result.metadatas[0])
+                    )
+                ]
             )
         else:
-            ensemble_retriever = EnsembleRetriever(
-                retrievers=[bm25_retriever, vector_search_retriever],
-                weights=[hybrid_bm25_weight, 1.0 - hybrid_bm25_weight],
-            )
+            result_lists.append([])
+        weights.append(1.0 - max(hybrid_bm25_weight, 0.0))
+
+    return reciprocal_rank_fusion(result_lists, weights)
 
-        compressor = RerankCompressor(
-            embedding_function=embedding_function,
-            top_n=k_reranker,
-            reranking_function=reranking_function,
-            r_score=r,
+
+def score_hybrid_search_candidates(
+    searches: list[tuple[str, list[float], list[dict]]],
+    embedding_function,
+    reranking_function,
+) -> list[list[float]]:
+    """
+    Relevance scores of the candidates of all (query, query embedding,
+    candidates) searches of a request.
+
+    With a reranker, each distinct query is reranked once against all of its
+    candidates. Otherwise the candidates are scored by cosine similarity to
+    the query, using their stored vectors and embedding the others in a
+    single call.
+    """
+    if reranking_function is not None:
+        # Rerankers score the documents of a single query per call
+        texts_by_query = {}
+        for query, _, candidates in searches:
+            texts = texts_by_query.setdefault(query, {})
+            for candidate in candidates:
+                texts.setdefault(candidate["text"], len(texts))
+
+        scores_by_query = {}
+        for query, texts in texts_by_query.items():
+            if not texts:
+                continue
+            scores = reranking_function([(query, text) for text in texts])
+            if scores is None:
+                raise Exception("Reranking failed")
+            scores_by_query[query] = np.asarray(scores, dtype=np.float32).reshape(-1)
+
+        return [
+            [
+                float(scores_by_query[query][texts_by_query[query][candidate["text"]]])
+                for candidate in candidates
+            ]
+            for query, _, candidates in searches
+        ]
+
+    missing_texts = list(
+        dict.fromkeys(
+            candidate["text"]
+            for _, _, candidates in searches
+            for candidate in candidates
+            if candidate["vector"] is None
+        )
+    )
+    embeddings = {}
+    if missing_texts:
+        embeddings = dict(
+            zip(
+                missing_texts,
+                embedding_function(missing_texts, RAG_EMBEDDING_CONTENT_PREFIX),
+            )
         )
 
-        compression_retriever = ContextualCompressionRetriever(
-            base_compressor=compressor, base_retriever=ensemble_retriever
+    return [
+        (
+            get_cosine_scores(
+                query_embedding,
+                [
+                    (
+                        candidate["vector"]
+                        if candidate["vector"] is not None
+                        else embeddings[candidate["text"]]
+                    )
+                    for candidate in candidates
+                ],
+            ).tolist()
+            if candidates
+            else []
         )
+        for _, query_embedding, candidates in searches
+    ]
+
 
-        result = compression_retriever.invoke(query)
+def get_hybrid_search_result(
+    candidates: list[dict], scores: list[float], k: int, k_reranker: int, r: float
+) -> dict:
+    scored_candidates = list(zip(candidates, scores))
+    if r:
+        scored_candidates = [(c, s) for c, s in scored_candidates if s >= r]
 
-        distances = [d.metadata.get("score") for d in result]
-        documents = [d.page_content for d in result]
-        metadatas = [d.metadata for d in result]
+    scored_candidates = sorted(
+        scored_candidates, key=operator.itemgetter(1), reverse=True
+    )
+    # retrieve only min(k, k_reranker) items
+    scored_candidates = scored_candidates[: min(k, k_reranker)]
 
-        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
-        if k < k_reranker:
-            sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
-            )
-            sorted_items = sorted_items[:k]
-            distances, documents, metadatas = map(list, zip(*sorted_items))
+    distances = []
+    documents = []
+    metadatas = []
+    for candidate, score in scored_candidates:
+        metadata = candidate["metadata"]
+        metadata["score"] = score
 
-        result = {
-            "distances": [distances],
-            "documents": [documents],
-            "metadatas": [metadatas],
-        }
+        distances.append(score)
+        documents.append(candidate["text"])
+        metadatas.append(metadata)
+
+    return {
+        "distances": [distances],
+        "documents": [documents],
+        "metadatas": [metadatas],
+    }
+
+
+def query_doc_with_hybrid_search(
+    collection_name: str,
+    query: str,
+    embedding_function,
+    k: int,
+    reranking_function,
+    k_reranker: int,
+    r: float,
+    hybrid_bm25_weight: float,
+) -> dict:
+    try:
+        log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
+        query_embedding = embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
+
+        candidates = get_hybrid_search_candidates(
+            collection_name, query, query_embedding, k, hybrid_bm25_weight
+        )
+        [scores] = score_hybrid_search_candidates(
+            [(query, query_embedding, candidates)],
+            embedding_function,
+            reranking_function,
+        )
+        result = get_hybrid_search_result(candidates, scores, k, k_reranker, r)
 
         log.info(
             "query_doc_with_hybrid_search:result "
@@ -270,6 +382,68 @@ def get_all_items_from_collections(collection_names: list[str]) -> dict:
     return merge_get_results(results)
 
 
+def get_chunk_id(
+    collection_name: str,
+    embedding_config: str,
+    text: str,
+    source: Optional[str] = None,
+) -> str:
+    """
+    Deterministic ID of a chunk, so that storing the same chunk again
+    updates it in place. IDs are unique across collections, as some vector
+    DBs store all collections in one index, and across sources (files) of a
+    collection, so that removing a file never removes the chunks of another.
+    """
+    digest = hashlib.sha256(
+        "\0".join([collection_name, embedding_config, source or "", text]).encode()
+    ).hexdigest()
+    # UUID formatted, the IDs some vector DBs require
+    return str(uuid.UUID(digest[:32]))
+
+
+def get_stored_vectors(
+    collection_name: str,
+    embedding_config: str,
+    chunks: dict[str, tuple[str, Optional[str]]],
+) -> dict[str, list[float]]:
+    """
+    Vectors already stored for `chunks`, the (text, source) of chunks of
+    `collection_name` by ID: chunks already in the collection, and chunks of
+    files already embedded in the collection of the file, are reused instead
+    of being embedded again.
+    """
+    vectors = {}
+
+    collection_names = [collection_name] + sorted(
+        {f"file-{source}" for _, source in chunks.values() if source}
+        - {collection_name}
+    )
+    for name in collection_names:
+        missing = {id: chunk for id, chunk in chunks.items() if id not in vectors}
+        if not missing:
+            break
+
+        if not VECTOR_DB_CLIENT.has_collection(collection_name=name):
+            continue
+
+        ids = {
+            get_chunk_id(name, embedding_config, text, source): id
+            for id, (text, source) in missing.items()
+            if name == collection_name or name == f"file-{source}"
+        }
+        try:
+            found = VECTOR_DB_CLIENT.get_vectors(name, list(ids))
+        except Exception as e:
+            log.debug(f"Error getting the stored vectors of {name}: {e}")
+            continue
+
+        for stored_id, vector in found.items():
+            if stored_id in ids:
+                vectors[ids[stored_id]] = vector
+
+    return vectors
+
+
 def query_collection(
     collection_names: list[str],
     queries: list[str],
@@ -334,61 +508,68 @@ def query_collection_with_hybrid_search(
 ) -> dict:
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
-    collection_results = {}
+    # Index collections for BM25 search once, only collections that were
+    # never searched before are read from the vector DB
+    indexed_collections = {}
     for collection_name in collection_names:
         try:
             log.debug(
-                f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
-            )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
+                f"query_collection_with_hybrid_search:ensure_bm25_index:collection {collection_name}"
             )
+            indexed_collections[collection_name] = ensure_bm25_index(collection_name)
         except Exception as e:
-            log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            log.exception(f"Failed to index collection {collection_name}: {e}")
+            indexed_collections[collection_name] = False
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
 
-    def process_query(collection_name, query):
+    # Embed all queries at once
+    query_embeddings = embedding_function(queries, RAG_EMBEDDING_QUERY_PREFIX)
+
+    def get_candidates(collection_name, idx):
         try:
-            result = query_doc_with_hybrid_search(
+            candidates = get_hybrid_search_candidates(
                 collection_name=collection_name,
-                collection_result=collection_results[collection_name],
-                query=query,
-                embedding_function=embedding_function,
+                query=queries[idx],
+                query_embedding=query_embeddings[idx],
                 k=k,
-                reranking_function=reranking_function,
-                k_reranker=k_reranker,
-                r=r,
                 hybrid_bm25_weight=hybrid_bm25_weight,
             )
-            return result, None
+            return (queries[idx], query_embeddings[idx], candidates), None
         except Exception as e:
             log.exception(f"Error when querying the collection with hybrid_search: {e}")
             return None, e
 
     # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
+    # Avoid running any tasks for collections that failed to be indexed
     tasks = [
-        (cn, q)
+        (cn, idx)
         for cn in collection_names
-        if collection_results[cn] is not None
-        for q in queries
+        if indexed_collections[cn]
+        for idx in range(len(queries))
     ]
 
     with ThreadPoolExecutor() as executor:
-        future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
+        future_results = [executor.submit(get_candidates, cn, idx) for cn, idx in tasks]
         task_results = [future.result() for future in future_results]
 
-    for result, err in task_results:
+    searches = []
+    for search, err in task_results:
         if err is not None:
             error = True
-        elif result is not None:
-            results.append(result)
+        elif search is not None:
+            searches.append(search)
+
+    # Score the candidates of all searches together
+    scores = score_hybrid_search_candidates(
+        searches, embedding_function, reranking_function
+    )
+    for (_, _, candidates), candidate_scores in zip(searches, scores):
+        results.append(
+            get_hybrid_search_result(candidates, candidate_scores, k, k_reranker, r)
+        )
 
     if error and not results:
         raise Exception(
@@ -408,11 +589,12 @@ def get_embedding_function(
     azure_api_version=None,
 ):
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
+        embed = lambda query, prefix=None, user=None: embedding_function.encode(
             query, **({"prompt": prefix} if prefix else {})
         ).tolist()
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
-        func = lambda query, prefix=None, user=None: generate_embeddings(
+        # Batches are sent concurrently by the shared embedding client
+        embed = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
             model=embedding_model,
             text=query,
@@ -421,29 +603,15 @@ def get_embedding_function(
             key=key,
             user=user,
             azure_api_version=azure_api_version,
-        )
-
-        def generate_multiple(query, prefix, user, func):
-            if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
-                        )
-                    )
-                return embeddings
-            else:
-                return func(query, prefix, user)
-
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
+            batch_size=embedding_batch_size,
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    if EMBEDDING_CACHE:
+        return EMBEDDING_CACHE.wrap(embed, embedding_engine, embedding_model)
+    return embed
+
 
 def get_reranking_function(reranking_engine, reranking_model, reranking_function):
     if reranking_function is None:
@@ -456,6 +624,30 @@ def get_reranking_function(reranking_engine, reranking_model, reranking_function
         return lambda sentences, user=None: reranking_function.predict(sentences)
 
 
+def get_retrieval_cache_params(
+    request, k, k_reranker, r, hybrid_bm25_weight, hybrid_search
+) -> dict:
+    """Everything besides the collections and queries the results depend on."""
+    config = request.app.state.config
+    params = {
+        "embedding_engine": config.RAG_EMBEDDING_ENGINE,
+        "embedding_model": config.RAG_EMBEDDING_MODEL,
+        "k": k,
+        "hybrid_search": hybrid_search,
+    }
+    if hybrid_search:
+        params.update(
+            {
+                "reranking_engine": config.RAG_RERANKING_ENGINE,
+                "reranking_model": config.RAG_RERANKING_MODEL,
+                "k_reranker": k_reranker,
+                "r": r,
+                "hybrid_bm25_weight": hybrid_bm25_weight,
+            }
+        )
+    return params
+
+
 def get_sources_from_items(
     request,
     items,
@@ -623,11 +815,24 @@ def get_sources_from_items(
                 log.debug(f"skipping {item} as it has already been extracted")
                 continue
 
+            cache_key = None
+            if RETRIEVAL_CACHE and not full_context:
+                cache_key = RETRIEVAL_CACHE.get_key(
+                    list(collection_names),
+                    queries,
+                    get_retrieval_cache_params(
+                        request, k, k_reranker, r, hybrid_bm25_weight, hybrid_search
+                    ),
+                )
+                if cache_key:
+                    query_result = RETRIEVAL_CACHE.get(cache_key)
+
             try:
-                if full_context:
+                if query_result is not None:
+                    log.debug(f"using cached results of {collection_names}")
+                elif full_context:
                     query_result = get_all_items_from_collections(collection_names)
                 else:
-                    query_result = None  # Initialize to None
                     if hybrid_search:
                         try:
                             query_result = query_collection_with_hybrid_search(
@@ -653,6 +858,9 @@ def get_sources_from_items(
                             embedding_function=embedding_function,
                             k=k,
                         )
+
+                    if cache_key and query_result is not None:
+                        RETRIEVAL_CACHE.set(cache_key, query_result)
             except Exception as e:
                 log.exception(e)
 
@@ -724,52 +932,46 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
-def generate_openai_batch_embeddings(
+async def generate_openai_batch_embeddings(
     model: str,
     texts: list[str],
     url: str = "https://api.openai.com/v1",
     key: str = "",
     prefix: str = None,
     user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        log.debug(
-            f"generate_openai_batch_embeddings:model {model} batch size: {len(texts)}"
-        )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            json=json_data,
-        )
-        r.raise_for_status()
-        data = r.json()
-        if "data" in data:
-            return [elem["embedding"] for elem in data["data"]]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        log.exception(f"Error generating openai batch embeddings: {e}")
-        return None
+) -> list[list[float]]:
+    log.debug(
+        f"generate_openai_batch_embeddings:model {model} batch size: {len(texts)}"
+    )
+    json_data = {"input": texts, "model": model}
+    if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
+        json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+    data = await EMBEDDING_CLIENT.post(
+        f"{url}/embeddings",
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+            **(
+                {
+                    "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                else {}
+            ),
+        },
+        json=json_data,
+    )
+    if "data" in data:
+        return [elem["embedding"] for elem in data["data"]]
+    else:
+        raise Exception("Something went wrong :/")
 
 
-def generate_azure_openai_batch_embeddings(
+async def generate_azure_openai_batch_embeddings(
     model: str,
     texts: list[str],
     url: str,
@@ -777,99 +979,78 @@ def generate_azure_openai_batch_embeddings(
     version: str = "",
     prefix: str = None,
     user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        log.debug(
-            f"generate_azure_openai_batch_embeddings:deployment {model} batch size: {len(texts)}"
-        )
-        json_data = {"input": texts}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        url = f"{url}/openai/deployments/{model}/embeddings?api-version={version}"
-
-        for _ in range(5):
-            r = requests.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": key,
-                    **(
-                        {
-                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                            "X-OpenWebUI-User-Id": user.id,
-                            "X-OpenWebUI-User-Email": user.email,
-                            "X-OpenWebUI-User-Role": user.role,
-                        }
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                        else {}
-                    ),
-                },
-                json=json_data,
-            )
-            if r.status_code == 429:
-                retry = float(r.headers.get("Retry-After", "1"))
-                time.sleep(retry)
-                continue
-            r.raise_for_status()
-            data = r.json()
-            if "data" in data:
-                return [elem["embedding"] for elem in data["data"]]
-            else:
-                raise Exception("Something went wrong :/")
-        return None
-    except Exception as e:
-        log.exception(f"Error generating azure openai batch embeddings: {e}")
-        return None
+) -> list[list[float]]:
+    log.debug(
+        f"generate_azure_openai_batch_embeddings:deployment {model} batch size: {len(texts)}"
+    )
+    json_data = {"input": texts}
+    if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
+        json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+    data = await EMBEDDING_CLIENT.post(
+        f"{url}/openai/deployments/{model}/embeddings?api-version={version}",
+        headers={
+            "Content-Type": "application/json",
+            "api-key": key,
+            **(
+                {
+                    "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                else {}
+            ),
+        },
+        json=json_data,
+    )
+    if "data" in data:
+        return [elem["embedding"] for elem in data["data"]]
+    else:
+        raise Exception("Something went wrong :/")
 
 
-def generate_ollama_batch_embeddings(
+async def generate_ollama_batch_embeddings(
     model: str,
     texts: list[str],
     url: str,
     key: str = "",
     prefix: str = None,
     user: UserModel = None,
-) -> Optional[list[list[float]]]:
-    try:
-        log.debug(
-            f"generate_ollama_batch_embeddings:model {model} batch size: {len(texts)}"
-        )
-        json_data = {"input": texts, "model": model}
-        if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
-            json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
-
-        r = requests.post(
-            f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {key}",
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
-                ),
-            },
-            json=json_data,
-        )
-        r.raise_for_status()
-        data = r.json()
-
-        if "embeddings" in data:
-            return data["embeddings"]
-        else:
-            raise "Something went wrong :/"
-    except Exception as e:
-        log.exception(f"Error generating ollama batch embeddings: {e}")
-        return None
+) -> list[list[float]]:
+    log.debug(
+        f"generate_ollama_batch_embeddings:model {model} batch size: {len(texts)}"
+    )
+    json_data = {"input": texts, "model": model}
+    if isinstance(RAG_EMBEDDING_PREFIX_FIELD_NAME, str) and isinstance(prefix, str):
+        json_data[RAG_EMBEDDING_PREFIX_FIELD_NAME] = prefix
+
+    data = await EMBEDDING_CLIENT.post(
+        f"{url}/api/embed",
+        headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {key}",
+            **(
+                {
+                    "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                    "X-OpenWebUI-User-Id": user.id,
+                    "X-OpenWebUI-User-Email": user.email,
+                    "X-OpenWebUI-User-Role": user.role,
+                }
+                if ENABLE_FORWARD_USER_INFO_HEADERS
+                else {}
+            ),
+        },
+        json=json_data,
+    )
+    if "embeddings" in data:
+        return data["embeddings"]
+    else:
+        raise Exception("Something went wrong :/")
 
 
-def generate_embeddings(
+async def agenerate_embeddings(
     engine: str,
     model: str,
     text: Union[str, list[str]],
@@ -879,6 +1060,7 @@ def generate_embeddings(
     url = kwargs.get("url", "")
     key = kwargs.get("key", "")
     user = kwargs.get("user")
+    batch_size = kwargs.get("batch_size") or 1
 
     if prefix is not None and RAG_EMBEDDING_PREFIX_FIELD_NAME is None:
         if isinstance(text, list):
@@ -887,90 +1069,38 @@ def generate_embeddings(
             text = f"{prefix}{text}"
 
     if engine == "ollama":
-        embeddings = generate_ollama_batch_embeddings(
-            **{
-                "model": model,
-                "texts": text if isinstance(text, list) else [text],
-                "url": url,
-                "key": key,
-                "prefix": prefix,
-                "user": user,
-            }
+        embed = lambda texts: generate_ollama_batch_embeddings(
+            model, texts, url, key, prefix, user
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
     elif engine == "openai":
-        embeddings = generate_openai_batch_embeddings(
-            model, text if isinstance(text, list) else [text], url, key, prefix, user
+        embed = lambda texts: generate_openai_batch_embeddings(
+            model, texts, url, key, prefix, user
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
     elif engine == "azure_openai":
         azure_api_version = kwargs.get("azure_api_version", "")
-        embeddings = generate_azure_openai_batch_embeddings(
-            model,
-            text if isinstance(text, list) else [text],
-            url,
-            key,
-            azure_api_version,
-            prefix,
-            user,
+        embed = lambda texts: generate_azure_openai_batch_embeddings(
+            model, texts, url, key, azure_api_version, prefix, user
         )
-        return embeddings[0] if isinstance(text, str) else embeddings
-
-
-import operator
-from typing import Optional, Sequence
-
-from langchain_core.callbacks import Callbacks
-from langchain_core.documents import BaseDocumentCompressor, Document
-
-
-class RerankCompressor(BaseDocumentCompressor):
-    embedding_function: Any
-    top_n: int
-    reranking_function: Any
-    r_score: float
-
-    class Config:
-        extra = "forbid"
-        arbitrary_types_allowed = True
-
-    def compress_documents(
-        self,
-        documents: Sequence[Document],
-        query: str,
-        callbacks: Optional[Callbacks] = None,
-    ) -> Sequence[Document]:
-        reranking = self.reranking_function is not None
-
-        if reranking:
-            scores = self.reranking_function(
-                [(query, doc.page_content) for doc in documents]
-            )
-        else:
-            from sentence_transformers import util
-
-            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
-            )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+    else:
+        raise ValueError(f"Unknown embedding engine: {engine}")
 
-        docs_with_scores = list(
-            zip(documents, scores.tolist() if not isinstance(scores, list) else scores)
+    try:
+        embeddings = await EMBEDDING_CLIENT.embed(
+            embed, text if isinstance(text, list) else [text], batch_size
         )
-        if self.r_score:
-            docs_with_scores = [
-                (d, s) for d, s in docs_with_scores if s >= self.r_score
-            ]
+    except Exception as e:
+        log.exception(f"Error generating {engine} embeddings: {e}")
+        return None
+    return embeddings[0] if isinstance(text, str) else embeddings
 
-        result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
-        final_results = []
-        for doc, doc_score in result[: self.top_n]:
-            metadata = doc.metadata
-            metadata["score"] = doc_score
-            doc = Document(
-                page_content=doc.page_content,
-                metadata=metadata,
-            )
-            final_results.append(doc)
-        return final_results
+
+def generate_embeddings(
+    engine: str,
+    model: str,
+    text: Union[str, list[str]],
+    prefix: Union[str, None] = None,
+    **kwargs,
+):
+    return EMBEDDING_CLIENT.run(
+        agenerate_embeddings(engine, model, text, prefix, **kwargs)
+    )
@@ -0,0 +1,124 @@
+import logging
+from typing import Dict, List, Optional, Union
+
+from open_webui.models.bm25 import BM25Index
+from open_webui.retrieval.retrieval_cache import RETRIEVAL_CACHE
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    SearchResult,
+    VectorDBBase,
+    VectorItem,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class BM25IndexedVectorDB(VectorDBBase):
+    """
+    Vector DB client that mirrors the writes to collections indexed by the
+    BM25 index. If mirroring fails, the collection's BM25 index is dropped so
+    that it is rebuilt from the vector DB on next use. Writes also invalidate
+    the cached retrieval results of the collection.
+    """
+
+    def __init__(self, client: VectorDBBase):
+        self.client = client
+
+    def __getattr__(self, name):
+        # Client specific attributes and methods
+        return getattr(self.client, name)
+
+    def _get_items(self, items: List[Union[VectorItem, Dict]]) -> List[Dict]:
+        return [item if isinstance(item, dict) else dict(item) for item in items]
+
+    def _mirror(self, collection_name: str, update):
+        if RETRIEVAL_CACHE:
+            RETRIEVAL_CACHE.invalidate(collection_name)
+
+        try:
+            if BM25Index.has_collection(collection_name):
+                update()
+        except Exception as e:
+            log.exception(f"Failed to update BM25 index of {collection_name}: {e}")
+            try:
+                BM25Index.delete_collection(collection_name)
+            except Exception:
+                pass
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(collection_name)
+
+    def delete_collection(self, collection_name: str) -> None:
+        result = self.client.delete_collection(collection_name)
+        self._mirror(
+            collection_name, lambda: BM25Index.delete_collection(collection_name)
+        )
+        return result
+
+    def insert(
+        self, collection_name: str, items: List[Union[VectorItem, Dict]]
+    ) -> None:
+        result = self.client.insert(collection_name, items)
+        self._mirror(
+            collection_name,
+            lambda: BM25Index.upsert(collection_name, self._get_items(items)),
+        )
+        return result
+
+    def upsert(
+        self, collection_name: str, items: List[Union[VectorItem, Dict]]
+    ) -> None:
+        result = self.client.upsert(collection_name, items)
+        self._mirror(
+            collection_name,
+            lambda: BM25Index.upsert(collection_name, self._get_items(items)),
+        )
+        return result
+
+    def search(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        return self.client.search(collection_name, vectors, limit)
+
+    def query(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return self.client.query(collection_name, filter, limit)
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self.client.get(collection_name)
+
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, List[float]]:
+        return self.client.get_vectors(collection_name, ids)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+        **kwargs,
+    ) -> None:
+        result = self.client.delete(collection_name, ids=ids, filter=filter, **kwargs)
+
+        if ids or filter:
+            update = lambda: BM25Index.delete(collection_name, ids=ids, filter=filter)
+        else:
+            # Unknown scope, rebuild the index on next use
+            update = lambda: BM25Index.delete_collection(collection_name)
+        self._mirror(collection_name, update)
+        return result
+
+    def reset(self) -> None:
+        result = self.client.reset()
+        if RETRIEVAL_CACHE:
+            RETRIEVAL_CACHE.invalidate_all()
+
+        try:
+            BM25Index.reset()
+        except Exception as e:
+            log.exception(f"Failed to reset BM25 index: {e}")
+        return result
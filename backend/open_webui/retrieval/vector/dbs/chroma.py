@@ -1,4 +1,5 @@
 import chromadb
+import numpy as np
 import logging
 from chromadb import Settings
 from chromadb.utils.batch_utils import create_batches
@@ -78,6 +79,7 @@ class ChromaClient(VectorDBBase):
                 result = collection.query(
                     query_embeddings=vectors,
                     n_results=limit,
+                    include=["documents", "metadatas", "distances", "embeddings"],
                 )
 
                 # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
@@ -92,6 +94,12 @@ class ChromaClient(VectorDBBase):
                         "distances": distances,
                         "documents": result["documents"],
                         "metadatas": result["metadatas"],
+                        "vectors": [
+                            [
+                                np.asarray(embedding).tolist()
+                                for embedding in result["embeddings"][0]
+                            ]
+                        ],
                     }
                 )
             return None
@@ -135,6 +143,20 @@ class ChromaClient(VectorDBBase):
             )
         return None
 
+    def get_vectors(
+        self, collection_name: str, ids: list[str]
+    ) -> dict[str, list[float]]:
+        # Get the stored vectors of the items with these ids.
+        try:
+            collection = self.client.get_collection(name=collection_name)
+            result = collection.get(ids=ids, include=["embeddings"])
+            return {
+                id: np.asarray(embedding).tolist()
+                for id, embedding in zip(result["ids"], result["embeddings"])
+            }
+        except Exception:
+            return {}
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection = self.client.get_or_create_collection(
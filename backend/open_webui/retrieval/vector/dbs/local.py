@@ -0,0 +1,772 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from typing import Optional
+
+import numpy as np
+
+from open_webui.retrieval.vector.main import (
+    VectorDBBase,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
+from open_webui.config import (
+    LOCAL_VECTOR_DB_COMPACT_RATIO,
+    LOCAL_VECTOR_DB_DTYPE,
+    LOCAL_VECTOR_DB_IVF_MIN_SIZE,
+    LOCAL_VECTOR_DB_IVF_PROBE_RATIO,
+    LOCAL_VECTOR_DB_PATH,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Rows read per matrix product when scanning vectors
+CHUNK_SIZE = 65536
+
+# Keys of metadata filters that are inlined in the SQL, matching the indexes
+FILTER_KEY = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, highest first."""
+    if k < len(scores):
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid of each vector."""
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), CHUNK_SIZE):
+        chunk = np.asarray(vectors[start : start + CHUNK_SIZE], dtype=np.float32)
+        lists[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return lists
+
+
+def train_centroids(
+    vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means over normalized vectors."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)]
+
+    for _ in range(iterations):
+        lists = assign_lists(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, lists, vectors)
+
+        # Empty lists restart from a random vector
+        empty = np.bincount(lists, minlength=nlist) == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize(sums)
+
+    return centroids
+
+
+class MappedArray:
+    """
+    Growable array memory-mapped from a file, holding `capacity` rows of
+    `width` values, or single values if `width` is None.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dtype,
+        width: Optional[int] = None,
+        capacity: int = 256,
+        create: bool = False,
+    ):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.row_size = self.dtype.itemsize * (width or 1)
+
+        if create or not os.path.exists(path):
+            open(path, "wb").close()
+        self._map(max(capacity, os.path.getsize(path) // self.row_size))
+
+    def _map(self, capacity: int):
+        with open(self.path, "r+b") as f:
+            if os.path.getsize(self.path) < capacity * self.row_size:
+                f.truncate(capacity * self.row_size)
+        shape = (capacity, self.width) if self.width else (capacity,)
+        self.array = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=shape)
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def reserve(self, capacity: int):
+        if capacity > len(self.array):
+            self.array.flush()
+            self._map(max(capacity, 2 * len(self.array)))
+
+    def flush(self):
+        self.array.flush()
+
+
+class LocalCollection:
+    """
+    Normalized vectors of a collection in a memory-mapped array, in insertion
+    order, with the sequence number of their item in SQLite and the IVF list
+    they belong to in parallel arrays. Updated and deleted items leave
+    tombstones that are dropped by compaction, which runs in the background
+    and also trains the IVF centroids once the collection is large enough.
+    """
+
+    def __init__(self, client: "LocalVectorClient", name: str, info: dict):
+        self.client = client
+        self.name = name
+        self.path = client.get_collection_path(name)
+
+        self.dimension = info["dimension"]
+        self.dtype = info["dtype"]
+        self.generation = info["generation"]
+        self.rows = info["rows"]
+        self.trained = info["trained"]
+
+        self.lock = threading.RLock()
+        self.compacting = False
+        self.closed = False
+
+        os.makedirs(self.path, exist_ok=True)
+        self._remove_stale_files()
+
+        self.vectors = MappedArray(
+            self._get_file("vectors"), self.dtype, self.dimension
+        )
+        self.seqs = MappedArray(self._get_file("seqs"), np.int64)
+        self.lists = MappedArray(self._get_file("lists"), np.int32)
+
+        self.centroids = None
+        if self.trained:
+            self.centroids = np.load(self._get_file("centroids") + ".npy")
+        self.list_index = None
+
+        # Rows whose item was updated or deleted are tombstones
+        live_seqs = client.get_live_seqs(name)
+        self.alive = np.zeros(len(self.vectors), dtype=bool)
+        self.alive[: self.rows] = np.isin(self.seqs.array[: self.rows], live_seqs)
+
+    def _get_file(self, name: str, generation: Optional[int] = None) -> str:
+        if generation is None:
+            generation = self.generation
+        return os.path.join(self.path, f"{name}.{generation}")
+
+    def _remove_stale_files(self):
+        """Files of other generations, left by an interrupted compaction."""
+        for file in os.listdir(self.path):
+            if file.split(".")[1] != str(self.generation):
+                os.remove(os.path.join(self.path, file))
+
+    def _reserve(self, capacity: int):
+        for array in [self.vectors, self.seqs, self.lists]:
+            array.reserve(capacity)
+        if len(self.alive) < len(self.vectors):
+            alive = np.zeros(len(self.vectors), dtype=bool)
+            alive[: len(self.alive)] = self.alive
+            self.alive = alive
+
+    def _tombstone(self, seqs: list[int]):
+        if not seqs:
+            return
+        seqs = np.asarray(seqs, dtype=np.int64)
+        # Rows are appended and compacted in sequence order
+        rows = np.searchsorted(self.seqs.array[: self.rows], seqs)
+        rows = rows[rows < self.rows]
+        rows = rows[np.isin(self.seqs.array[rows], seqs)]
+        self.alive[rows] = False
+
+    def _get_rows(self, seqs: list[int]) -> np.ndarray:
+        seqs = np.asarray(seqs, dtype=np.int64)
+        rows = np.searchsorted(self.seqs.array[: self.rows], seqs)
+        rows[rows >= self.rows] = 0
+        return rows
+
+    def get_tombstones(self) -> int:
+        return self.rows - int(self.alive[: self.rows].sum())
+
+    def upsert(self, items: list[VectorItem]):
+        # The last item of the batch wins for duplicate ids
+        items = list({item["id"]: item for item in items}.values())
+        vectors = normalize(np.asarray([item["vector"] for item in items], np.float32))
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Expected vectors of dimension {self.dimension}, got {vectors.shape[1]}"
+            )
+
+        # Items are committed once their vectors are written
+        with self.lock, self.client.db_lock:
+            start, end = self.rows, self.rows + len(items)
+            self._reserve(end)
+
+            old_seqs, seqs = self.client.write_items(self.name, items, end)
+
+            self.vectors.array[start:end] = vectors
+            self.seqs.array[start:end] = seqs
+            if self.centroids is not None:
+                self.lists.array[start:end] = assign_lists(vectors, self.centroids)
+            for array in [self.vectors, self.seqs, self.lists]:
+                array.flush()
+            self.client.commit()
+
+            self._tombstone(old_seqs)
+            self.alive[start:end] = True
+            self.rows = end
+            self.list_index = None
+
+            self.maybe_compact()
+
+    def delete(self, seqs: list[int]):
+        with self.lock:
+            self._tombstone(seqs)
+            self.maybe_compact()
+
+    def get_vectors(self, seqs: list[int]) -> np.ndarray:
+        with self.lock:
+            return np.asarray(self.vectors.array[self._get_rows(seqs)], np.float32)
+
+    def _get_list_index(self) -> tuple[np.ndarray, np.ndarray]:
+        """Rows sorted by IVF list, and the bounds of each list."""
+        if self.list_index is None:
+            lists = self.lists.array[: self.rows]
+            order = np.argsort(lists, kind="stable")
+            bounds = np.searchsorted(lists[order], np.arange(len(self.centroids) + 1))
+            self.list_index = (order, bounds)
+        return self.list_index
+
+    def _get_candidates(self, vector: np.ndarray) -> np.ndarray:
+        """Live rows of the IVF lists nearest to the vector."""
+        order, bounds = self._get_list_index()
+        nprobe = min(
+            max(int(np.ceil(self.client.probe_ratio * len(self.centroids))), 1),
+            len(self.centroids),
+        )
+        probes = top_k(self.centroids @ vector, nprobe)
+
+        rows = np.sort(
+            np.concatenate([order[bounds[idx] : bounds[idx + 1]] for idx in probes])
+        )
+        return rows[self.alive[rows]]
+
+    def search(self, vector: np.ndarray, limit: int) -> tuple[list[int], list[float]]:
+        """Sequence numbers of the nearest items, with their cosine similarity."""
+        with self.lock:
+            if self.centroids is not None:
+                rows = self._get_candidates(vector)
+                scores = np.asarray(self.vectors.array[rows], np.float32) @ vector
+                best = top_k(scores, limit)
+                rows, scores = rows[best], scores[best]
+            else:
+                rows = np.empty(0, dtype=np.int64)
+                scores = np.empty(0, dtype=np.float32)
+                for start in range(0, self.rows, CHUNK_SIZE):
+                    end = min(start + CHUNK_SIZE, self.rows)
+                    chunk = np.asarray(self.vectors.array[start:end], np.float32)
+                    chunk_scores = chunk @ vector
+                    chunk_scores[~self.alive[start:end]] = -np.inf
+
+                    best = top_k(chunk_scores, limit)
+                    rows = np.concatenate([rows, best + start])
+                    scores = np.concatenate([scores, chunk_scores[best]])
+
+                best = top_k(scores, limit)
+                rows, scores = rows[best], scores[best]
+                rows, scores = rows[scores > -np.inf], scores[scores > -np.inf]
+
+            return self.seqs.array[rows].tolist(), scores.tolist()
+
+    def maybe_compact(self):
+        """Starts compacting in the background if it is due."""
+        if self.compacting or self.closed:
+            return
+
+        tombstones = self.get_tombstones()
+        size = self.rows - tombstones
+        train = size >= self.client.ivf_min_size and (
+            self.centroids is None or size >= 4 * self.trained
+        )
+        if not train and tombstones <= self.client.compact_ratio * self.rows:
+            return
+
+        self.compacting = True
+        threading.Thread(target=self.compact, args=(train,), daemon=True).start()
+
+    def compact(self, train: bool = False):
+        """
+        Rewrites the live rows into the files of the next generation, and
+        retrains the centroids if `train`. Writes and searches go on during
+        the rewrite, the rows written meanwhile are carried over at the end.
+        """
+        try:
+            with self.lock:
+                rows = self.rows
+                keep = np.flatnonzero(self.alive[:rows])
+                vectors, seqs = self.vectors.array, self.seqs.array
+                centroids, trained = self.centroids, self.trained
+                generation = self.generation + 1
+
+            new_vectors = MappedArray(
+                self._get_file("vectors", generation),
+                self.dtype,
+                self.dimension,
+                capacity=len(keep),
+                create=True,
+            )
+            new_seqs = MappedArray(
+                self._get_file("seqs", generation),
+                np.int64,
+                capacity=len(keep),
+                create=True,
+            )
+            new_lists = MappedArray(
+                self._get_file("lists", generation),
+                np.int32,
+                capacity=len(keep),
+                create=True,
+            )
+
+            for start in range(0, len(keep), CHUNK_SIZE):
+                chunk = keep[start : start + CHUNK_SIZE]
+                new_vectors.array[start : start + len(chunk)] = vectors[chunk]
+                new_seqs.array[start : start + len(chunk)] = seqs[chunk]
+
+            if train:
+                # sqrt(n) lists, trained on a sample of 64 vectors per list
+                nlist = max(1, int(np.sqrt(len(keep))))
+                sample = np.random.default_rng(0).choice(
+                    len(keep), min(len(keep), 64 * nlist), replace=False
+                )
+                centroids = train_centroids(
+                    np.asarray(new_vectors.array[np.sort(sample)], np.float32), nlist
+                )
+                trained = len(keep)
+            if centroids is not None:
+                new_lists.array[: len(keep)] = assign_lists(
+                    new_vectors.array[: len(keep)], centroids
+                )
+
+            with self.lock:
+                if self.closed:
+                    return
+
+                # Rows written during the rewrite
+                added = np.arange(rows, self.rows)
+                size = len(keep) + len(added)
+                for array in [new_vectors, new_seqs, new_lists]:
+                    array.reserve(size)
+
+                new_vectors.array[len(keep) : size] = self.vectors.array[added]
+                new_seqs.array[len(keep) : size] = self.seqs.array[added]
+                if centroids is not None:
+                    new_lists.array[len(keep) : size] = assign_lists(
+                        new_vectors.array[len(keep) : size], centroids
+                    )
+                    np.save(self._get_file("centroids", generation) + ".npy", centroids)
+                for array in [new_vectors, new_seqs, new_lists]:
+                    array.flush()
+
+                alive = np.zeros(len(new_vectors), dtype=bool)
+                alive[:size] = np.concatenate(
+                    [self.alive[keep], self.alive[rows : self.rows]]
+                )
+
+                self.client.update_collection(
+                    self.name, generation=generation, rows=size, trained=trained
+                )
+
+                self.vectors, self.seqs, self.lists = new_vectors, new_seqs, new_lists
+                self.alive = alive
+                self.rows = size
+                self.centroids, self.trained = centroids, trained
+                self.generation = generation
+                self.list_index = None
+                self._remove_stale_files()
+
+            log.info(
+                f"Compacted collection {self.name}: {size} rows, "
+                f"{len(centroids) if centroids is not None else 0} lists"
+            )
+        except Exception as e:
+            log.exception(f"Failed to compact collection {self.name}: {e}")
+        finally:
+            self.compacting = False
+
+
+class LocalVectorClient(VectorDBBase):
+    """
+    Embedded vector database for single node deployments, without another
+    service to run. Vectors are searched from memory-mapped files by cosine
+    similarity, exhaustively for small collections and through an IVF index
+    once they hold `ivf_min_size` vectors. Items and their metadata are
+    stored in SQLite. The files must be used by a single process.
+    """
+
+    def __init__(
+        self,
+        path: str = LOCAL_VECTOR_DB_PATH,
+        dtype: str = LOCAL_VECTOR_DB_DTYPE,
+        ivf_min_size: int = LOCAL_VECTOR_DB_IVF_MIN_SIZE,
+        probe_ratio: float = LOCAL_VECTOR_DB_IVF_PROBE_RATIO,
+        compact_ratio: float = LOCAL_VECTOR_DB_COMPACT_RATIO,
+    ):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+        self.path = path
+        self.dtype = dtype
+        self.ivf_min_size = ivf_min_size
+        self.probe_ratio = probe_ratio
+        self.compact_ratio = compact_ratio
+
+        os.makedirs(os.path.join(path, "collections"), exist_ok=True)
+
+        self.db_lock = threading.RLock()
+        self.conn = sqlite3.connect(
+            os.path.join(path, "items.db"), check_same_thread=False, timeout=30
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS collection (
+                name TEXT PRIMARY KEY,
+                dimension INTEGER NOT NULL,
+                dtype TEXT NOT NULL,
+                generation INTEGER NOT NULL,
+                rows INTEGER NOT NULL,
+                trained INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS item (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection TEXT NOT NULL,
+                id TEXT NOT NULL,
+                text TEXT,
+                metadata TEXT,
+                UNIQUE (collection, id)
+            );
+            CREATE INDEX IF NOT EXISTS ix_item_file_id
+                ON item (collection, json_extract(metadata, '$.file_id'));
+            CREATE INDEX IF NOT EXISTS ix_item_hash
+                ON item (collection, json_extract(metadata, '$.hash'));
+            """
+        )
+        self.conn.commit()
+
+        self.lock = threading.Lock()
+        self.collections: dict[str, LocalCollection] = {}
+
+    def get_collection_path(self, collection_name: str) -> str:
+        return os.path.join(
+            self.path,
+            "collections",
+            hashlib.sha256(collection_name.encode()).hexdigest()[:32],
+        )
+
+    def get_live_seqs(self, collection_name: str) -> np.ndarray:
+        with self.db_lock:
+            rows = self.conn.execute(
+                "SELECT seq FROM item WHERE collection = ? ORDER BY seq",
+                (collection_name,),
+            ).fetchall()
+        return np.asarray([row[0] for row in rows], dtype=np.int64)
+
+    def write_items(
+        self, collection_name: str, items: list[VectorItem], rows: int
+    ) -> tuple[list[int], list[int]]:
+        """
+        Replaces the items, without committing. Returns the sequence numbers
+        of the replaced items and of the new ones.
+        """
+        ids = [item["id"] for item in items]
+        with self.db_lock:
+            old_seqs = []
+            for idx in range(0, len(ids), 500):
+                batch = ids[idx : idx + 500]
+                old_seqs += [
+                    row[0]
+                    for row in self.conn.execute(
+                        f"DELETE FROM item WHERE collection = ? "
+                        f"AND id IN ({','.join('?' * len(batch))}) RETURNING seq",
+                        [collection_name, *batch],
+                    ).fetchall()
+                ]
+
+            seqs = [
+                self.conn.execute(
+                    "INSERT INTO item (collection, id, text, metadata) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        collection_name,
+                        item["id"],
+                        item["text"],
+                        json.dumps(item["metadata"], default=str),
+                    ),
+                ).lastrowid
+                for item in items
+            ]
+            self.conn.execute(
+                "UPDATE collection SET rows = ? WHERE name = ?", (rows, collection_name)
+            )
+        return old_seqs, seqs
+
+    def commit(self):
+        with self.db_lock:
+            self.conn.commit()
+
+    def update_collection(self, collection_name: str, **values):
+        with self.db_lock:
+            self.conn.execute(
+                f"UPDATE collection SET {', '.join(f'{key} = ?' for key in values)} "
+                "WHERE name = ?",
+                [*values.values(), collection_name],
+            )
+            self.conn.commit()
+
+    def _get_collection(
+        self, collection_name: str, dimension: Optional[int] = None
+    ) -> Optional[LocalCollection]:
+        """Opens the collection, creating it with `dimension` if it is given."""
+        with self.lock:
+            collection = self.collections.get(collection_name)
+            if collection is not None:
+                return collection
+
+            with self.db_lock:
+                row = self.conn.execute(
+                    "SELECT dimension, dtype, generation, rows, trained "
+                    "FROM collection WHERE name = ?",
+                    (collection_name,),
+                ).fetchone()
+                if row is None:
+                    if dimension is None:
+                        return None
+
+                    row = (dimension, self.dtype, 0, 0, 0)
+                    self.conn.execute(
+                        "INSERT INTO collection VALUES (?, ?, ?, ?, ?, ?)",
+                        (collection_name, *row),
+                    )
+                    self.conn.commit()
+                    shutil.rmtree(
+                        self.get_collection_path(collection_name), ignore_errors=True
+                    )
+
+            collection = LocalCollection(
+                self,
+                collection_name,
+                dict(zip(["dimension", "dtype", "generation", "rows", "trained"], row)),
+            )
+            self.collections[collection_name] = collection
+            return collection
+
+    def _get_items(self, collection_name: str, seqs: list[int]) -> dict[int, tuple]:
+        items = {}
+        with self.db_lock:
+            for idx in range(0, len(seqs), 500):
+                batch = seqs[idx : idx + 500]
+                for seq, id, text, metadata in self.conn.execute(
+                    f"SELECT seq, id, text, metadata FROM item "
+                    f"WHERE seq IN ({','.join('?' * len(batch))})",
+                    batch,
+                ):
+                    items[seq] = (id, text, json.loads(metadata))
+        return items
+
+    def _filter_items(
+        self, collection_name: str, filter: dict, columns: str, limit=None
+    ) -> list[tuple]:
+        conditions = ["collection = ?"]
+        params = [collection_name]
+        for key, value in (filter or {}).items():
+            if FILTER_KEY.match(key):
+                # Inlined to match the indexes on json_extract
+                conditions.append(f"json_extract(metadata, '$.{key}') = ?")
+            else:
+                conditions.append("json_extract(metadata, ?) = ?")
+                params.append(f'$."{key}"')
+            params.append(value)
+
+        where = " AND ".join(conditions)
+        sql = f"SELECT {columns} FROM item WHERE {where} ORDER BY seq"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self.db_lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def has_collection(self, collection_name: str) -> bool:
+        with self.db_lock:
+            return (
+                self.conn.execute(
+                    "SELECT 1 FROM collection WHERE name = ?", (collection_name,)
+                ).fetchone()
+                is not None
+            )
+
+    def delete_collection(self, collection_name: str):
+        with self.lock:
+            collection = self.collections.pop(collection_name, None)
+            if collection is not None:
+                with collection.lock:
+                    collection.closed = True
+
+            with self.db_lock:
+                self.conn.execute(
+                    "DELETE FROM item WHERE collection = ?", (collection_name,)
+                )
+                self.conn.execute(
+                    "DELETE FROM collection WHERE name = ?", (collection_name,)
+                )
+                self.conn.commit()
+
+            shutil.rmtree(self.get_collection_path(collection_name), ignore_errors=True)
+
+    def search(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return None
+
+        result = {
+            "ids": [],
+            "documents": [],
+            "metadatas": [],
+            "distances": [],
+            "vectors": [],
+        }
+        for vector in normalize(np.asarray(vectors, dtype=np.float32)):
+            seqs, scores = collection.search(vector, limit)
+            items = self._get_items(collection_name, seqs)
+            matches = [
+                (items[seq], score, seq)
+                for seq, score in zip(seqs, scores)
+                if seq in items
+            ]
+
+            result["ids"].append([item[0] for item, _, _ in matches])
+            result["documents"].append([item[1] for item, _, _ in matches])
+            result["metadatas"].append([item[2] for item, _, _ in matches])
+            # Cosine similarity, -1 (worst) -> 1 (best). Re-ordering to 0 -> 1
+            result["distances"].append([(1 + score) / 2 for _, score, _ in matches])
+            result["vectors"].append(
+                collection.get_vectors([seq for _, _, seq in matches]).tolist()
+            )
+
+        return SearchResult(**result)
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not self.has_collection(collection_name):
+            return None
+
+        rows = self._filter_items(collection_name, filter, "id, text, metadata", limit)
+        return GetResult(
+            **{
+                "ids": [[row[0] for row in rows]],
+                "documents": [[row[1] for row in rows]],
+                "metadatas": [[json.loads(row[2]) for row in rows]],
+            }
+        )
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self.query(collection_name, filter={})
+
+    def get_vectors(
+        self, collection_name: str, ids: list[str]
+    ) -> dict[str, list[float]]:
+        collection = self._get_collection(collection_name)
+        if collection is None or not ids:
+            return {}
+
+        with self.db_lock:
+            rows = self.conn.execute(
+                f"SELECT id, seq FROM item WHERE collection = ? "
+                f"AND id IN ({','.join('?' * len(ids))})",
+                [collection_name, *ids],
+            ).fetchall()
+
+        vectors = collection.get_vectors([seq for _, seq in rows])
+        return {id: vector.tolist() for (id, _), vector in zip(rows, vectors)}
+
+    def insert(self, collection_name: str, items: list[VectorItem]):
+        self.upsert(collection_name, items)
+
+    def upsert(self, collection_name: str, items: list[VectorItem]):
+        if not items:
+            return
+        collection = self._get_collection(
+            collection_name, dimension=len(items[0]["vector"])
+        )
+        collection.upsert(items)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        collection = self._get_collection(collection_name)
+        if collection is None or not (ids or filter):
+            return
+
+        with self.db_lock:
+            if ids:
+                seqs = []
+                for idx in range(0, len(ids), 500):
+                    batch = ids[idx : idx + 500]
+                    seqs += [
+                        row[0]
+                        for row in self.conn.execute(
+                            f"DELETE FROM item WHERE collection = ? "
+                            f"AND id IN ({','.join('?' * len(batch))}) RETURNING seq",
+                            [collection_name, *batch],
+                        ).fetchall()
+                    ]
+            else:
+                seqs = [
+                    row[0] for row in self._filter_items(collection_name, filter, "seq")
+                ]
+                for idx in range(0, len(seqs), 500):
+                    batch = seqs[idx : idx + 500]
+                    self.conn.execute(
+                        f"DELETE FROM item WHERE seq IN ({','.join('?' * len(batch))})",
+                        batch,
+                    )
+            self.conn.commit()
+
+        collection.delete(seqs)
+
+    def reset(self):
+        with self.lock:
+            for collection in self.collections.values():
+                with collection.lock:
+                    collection.closed = True
+            self.collections = {}
+
+            with self.db_lock:
+                self.conn.execute("DELETE FROM item")
+                self.conn.execute("DELETE FROM collection")
+                self.conn.commit()
+
+            shutil.rmtree(os.path.join(self.path, "collections"), ignore_errors=True)
+            os.makedirs(os.path.join(self.path, "collections"), exist_ok=True)
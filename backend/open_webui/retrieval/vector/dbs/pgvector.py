@@ -523,6 +523,26 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during get: {e}")
             return None
 
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, List[float]]:
+        try:
+            results = self.session.execute(
+                select(DocumentChunk.id, DocumentChunk.vector).where(
+                    DocumentChunk.collection_name == collection_name,
+                    DocumentChunk.id.in_(ids),
+                )
+            ).all()
+            return {
+                row.id: [float(value) for value in row.vector]
+                for row in results
+                if row.vector is not None
+            }
+        except Exception as e:
+            self.session.rollback()
+            log.debug(f"Error getting vectors from '{collection_name}': {e}")
+            return {}
+
     def delete(
         self,
         collection_name: str,
@@ -1,4 +1,5 @@
 from open_webui.retrieval.vector.main import VectorDBBase
+from open_webui.retrieval.vector.bm25 import BM25IndexedVectorDB
 from open_webui.retrieval.vector.type import VectorType
 from open_webui.config import VECTOR_DB, ENABLE_QDRANT_MULTITENANCY_MODE
 
@@ -48,8 +49,12 @@ class Vector:
                 from open_webui.retrieval.vector.dbs.chroma import ChromaClient
 
                 return ChromaClient()
+            case VectorType.LOCAL:
+                from open_webui.retrieval.vector.dbs.local import LocalVectorClient
+
+                return LocalVectorClient()
             case _:
                 raise ValueError(f"Unsupported vector type: {vector_type}")
 
 
-VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+VECTOR_DB_CLIENT = BM25IndexedVectorDB(Vector.get_vector(VECTOR_DB))
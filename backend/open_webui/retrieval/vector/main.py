@@ -18,6 +18,8 @@ class GetResult(BaseModel):
 
 class SearchResult(GetResult):
     distances: Optional[List[List[float | int]]]
+    # Stored vectors of the results, for backends that return them
+    vectors: Optional[List[List[List[float]]]] = None
 
 
 class VectorDBBase(ABC):
@@ -80,6 +82,15 @@ class VectorDBBase(ABC):
         """Delete vectors by ID or filter from a collection."""
         pass
 
+    def get_vectors(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, List[float]]:
+        """
+        Get the stored vectors of the items with these IDs, for backends that
+        return them. Items without a returned vector are embedded again.
+        """
+        return {}
+
     @abstractmethod
     def reset(self) -> None:
         """Reset the vector database by removing all collections or those matching a condition."""
@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import urllib.parse
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Mapping, Optional
+
+from open_webui.config import (
+    WEB_LOADER_CACHE,
+    WEB_LOADER_CACHE_MAX_AGE,
+    WEB_LOADER_CACHE_MAX_SIZE,
+    WEB_LOADER_CACHE_PATH,
+    WEB_LOADER_CACHE_REDIS_URL,
+    WEB_LOADER_CACHE_TTL,
+)
+from open_webui.retrieval.cache import Cache, RedisCacheStore, SQLiteCacheStore
+from open_webui.env import (
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Spellings of the same URL share cache entries."""
+    parsed = urllib.parse.urlsplit(url.strip())
+    scheme = parsed.scheme.lower()
+
+    netloc = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parsed.port}"
+
+    query = urllib.parse.urlencode(
+        sorted(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+    )
+    return urllib.parse.urlunsplit((scheme, netloc, parsed.path or "/", query, ""))
+
+
+def get_key(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+
+def get_max_age(headers: Mapping, max_age: int) -> Optional[int]:
+    """
+    Seconds the page is served without revalidation, at most `max_age`, or
+    None if it must not be stored.
+    """
+    cache_control = {
+        directive.strip().split("=", 1)[0].lower(): directive.strip()
+        for directive in headers.get("Cache-Control", "").split(",")
+        if directive.strip()
+    }
+    if "no-store" in cache_control or "private" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    if "max-age" in cache_control:
+        try:
+            return min(max_age, int(cache_control["max-age"].split("=", 1)[1]))
+        except ValueError:
+            pass
+    return max_age
+
+
+class WebPageCacheBackend(ABC):
+    """Storage of the web page cache, serialized pages keyed by URL hash."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes):
+        pass
+
+
+class SQLiteWebPageCache(WebPageCacheBackend):
+    """
+    Pages stored in a local SQLite database, the least recently used ones
+    are evicted once the cache holds more than `max_size` bytes.
+    """
+
+    def __init__(self, path: str, max_size: int = 512 * 1024 * 1024):
+        self.store = SQLiteCacheStore(path, "page", max_size=max_size)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.store.get(key)
+
+    def set(self, key: str, value: bytes):
+        self.store.set(key, value)
+
+
+class RedisWebPageCache(WebPageCacheBackend):
+    """
+    Pages stored in Redis, shared by all instances, each expiring `ttl`
+    seconds after it was last used.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        redis_sentinels=[],
+        redis_key_prefix: str = "open-webui:web_page_cache",
+        ttl: int = 7 * 24 * 60 * 60,
+    ):
+        self.store = RedisCacheStore(
+            redis_url, redis_sentinels, redis_key_prefix=redis_key_prefix, ttl=ttl
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.store.get(key)
+
+    def set(self, key: str, value: bytes):
+        self.store.set(key, value)
+
+
+class WebPageCache(Cache):
+    """
+    Cache of the text and metadata extracted from web pages, keyed by the
+    normalized URL. Pages are served as they are for up to `max_age`
+    seconds, then revalidated with their ETag or Last-Modified date.
+    """
+
+    def __init__(self, backend: WebPageCacheBackend, max_age: int = 3600):
+        # Revalidated pages are served from the cache as well
+        super().__init__(
+            "web page cache",
+            lookups=("hits", "revalidated", "misses"),
+            hits=("hits", "revalidated"),
+        )
+        self.backend = backend
+        self.max_age = max_age
+
+    def get(self, url: str) -> Optional[dict]:
+        def get_entry():
+            value = self.backend.get(get_key(url))
+            return json.loads(value) if value is not None else None
+
+        return self.call_backend("read from", get_entry)
+
+    def set(self, url: str, entry: dict):
+        self.call_backend(
+            "write to",
+            lambda: self.backend.set(get_key(url), json.dumps(entry).encode()),
+        )
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] < entry["max_age"]
+
+    def get_revalidation_headers(self, entry: dict) -> dict:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(
+        self, url: str, content: str, metadata: dict, headers: Mapping
+    ) -> Optional[dict]:
+        """Caches a fetched page, unless its response forbids it."""
+        max_age = get_max_age(headers, self.max_age)
+        if max_age is None:
+            return None
+
+        entry = {
+            "content": content,
+            "metadata": metadata,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "max_age": max_age,
+        }
+        self.set(url, entry)
+        return entry
+
+    def refresh(self, url: str, entry: dict, headers: Mapping):
+        """Extends the freshness of a page the server said was not modified."""
+        max_age = get_max_age(headers, self.max_age)
+        self.set(
+            url,
+            {
+                **entry,
+                "etag": headers.get("ETag", entry.get("etag")),
+                "fetched_at": time.time(),
+                "max_age": entry["max_age"] if max_age is None else max_age,
+            },
+        )
+
+    async def aload(
+        self,
+        url: str,
+        fetch: Callable[[dict], Awaitable[tuple[int, str, Mapping]]],
+        parse: Callable[[str], tuple[str, dict]],
+    ) -> tuple[str, dict]:
+        """
+        Returns the content and metadata of the page at `url`, from the
+        cache while it is fresh. Otherwise the page is fetched with
+        `fetch(headers)`, returning the status, text and headers of the
+        response, conditionally if it is cached, and parsed with `parse`.
+        """
+        # The backends block, keep them off the event loop
+        entry = await asyncio.to_thread(self.get, url)
+        if entry and self.is_fresh(entry):
+            self.metrics["hits"] += 1
+            return entry["content"], entry["metadata"]
+
+        status, text, headers = await fetch(
+            self.get_revalidation_headers(entry) if entry else {}
+        )
+        if status == 304 and entry:
+            self.metrics["revalidated"] += 1
+            await asyncio.to_thread(self.refresh, url, entry, headers)
+            return entry["content"], entry["metadata"]
+
+        self.metrics["misses"] += 1
+        content, metadata = parse(text)
+        if status == 200:
+            await asyncio.to_thread(self.store, url, content, metadata, headers)
+        return content, metadata
+
+
+def get_web_page_cache(cache_type: str) -> Optional[WebPageCache]:
+    match cache_type:
+        case "sqlite":
+            return WebPageCache(
+                SQLiteWebPageCache(
+                    WEB_LOADER_CACHE_PATH, max_size=WEB_LOADER_CACHE_MAX_SIZE
+                ),
+                max_age=WEB_LOADER_CACHE_MAX_AGE,
+            )
+        case "redis":
+            from open_webui.utils.redis import get_sentinels_from_env
+
+            return WebPageCache(
+                RedisWebPageCache(
+                    WEB_LOADER_CACHE_REDIS_URL,
+                    get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+                    redis_key_prefix=f"{REDIS_KEY_PREFIX}:web_page_cache",
+                    ttl=WEB_LOADER_CACHE_TTL,
+                ),
+                max_age=WEB_LOADER_CACHE_MAX_AGE,
+            )
+        case _:
+            return None
+
+
+WEB_PAGE_CACHE = get_web_page_cache(WEB_LOADER_CACHE)
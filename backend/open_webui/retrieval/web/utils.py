@@ -26,6 +26,7 @@ from langchain_community.document_loaders.base import BaseLoader
 from langchain_core.documents import Document
 from open_webui.retrieval.loaders.tavily import TavilyLoader
 from open_webui.retrieval.loaders.external_web import ExternalWebLoader
+from open_webui.retrieval.web.page_cache import WEB_PAGE_CACHE
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.config import (
     ENABLE_RAG_LOCAL_WEB_FETCH,
@@ -38,6 +39,8 @@ from open_webui.config import (
     TAVILY_EXTRACT_DEPTH,
     EXTERNAL_WEB_LOADER_URL,
     EXTERNAL_WEB_LOADER_API_KEY,
+    WEB_LOADER_CONCURRENT_REQUESTS_PER_HOST,
+    WEB_LOADER_PAGE_TIMEOUT,
 )
 from open_webui.env import SRC_LOG_LEVELS, AIOHTTP_CLIENT_SESSION_SSL
 
@@ -492,46 +495,91 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader, RateLimitMixin, URLProcessing
 class SafeWebBaseLoader(WebBaseLoader):
     """WebBaseLoader with enhanced error handling for URLs."""
 
-    def __init__(self, trust_env: bool = False, *args, **kwargs):
+    def __init__(
+        self,
+        trust_env: bool = False,
+        page_timeout: Optional[float] = None,
+        requests_per_host: int = 0,
+        *args,
+        **kwargs,
+    ):
         """Initialize SafeWebBaseLoader
         Args:
             trust_env (bool, optional): set to True if using proxy to make web requests, for example
                 using http(s)_proxy environment variables. Defaults to False.
+            page_timeout (float, optional): seconds to fetch a page before giving up on it.
+                Defaults to None (the aiohttp timeout).
+            requests_per_host (int, optional): pages of the same host fetched at once.
+                Defaults to 0 (no limit).
         """
         super().__init__(*args, **kwargs)
         self.trust_env = trust_env
+        self.page_timeout = page_timeout
+        self.requests_per_host = requests_per_host
 
-    async def _fetch(
-        self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
-    ) -> str:
-        async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
-            for i in range(retries):
-                try:
-                    kwargs: Dict = dict(
-                        headers=self.session.headers,
-                        cookies=self.session.cookies.get_dict(),
+    async def _arequest(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        headers: Optional[Dict] = None,
+        retries: int = 3,
+        cooldown: int = 2,
+        backoff: float = 1.5,
+    ) -> tuple[int, str, Any]:
+        """Fetches `url`, returning the status, text and headers of the response."""
+        for i in range(retries):
+            try:
+                kwargs: Dict = dict(
+                    headers={**self.session.headers, **(headers or {})},
+                    cookies=self.session.cookies.get_dict(),
+                )
+                if not self.session.verify:
+                    kwargs["ssl"] = False
+                if self.page_timeout:
+                    # Slow pages are given up on, not retried
+                    kwargs["timeout"] = aiohttp.ClientTimeout(total=self.page_timeout)
+
+                async with session.get(
+                    url,
+                    **(self.requests_kwargs | kwargs),
+                ) as response:
+                    if response.status == 304:
+                        return response.status, "", response.headers.copy()
+                    if self.raise_for_status:
+                        response.raise_for_status()
+                    return (
+                        response.status,
+                        await response.text(),
+                        response.headers.copy(),
                     )
-                    if not self.session.verify:
-                        kwargs["ssl"] = False
-
-                    async with session.get(
-                        url,
-                        **(self.requests_kwargs | kwargs),
-                    ) as response:
-                        if self.raise_for_status:
-                            response.raise_for_status()
-                        return await response.text()
-                except aiohttp.ClientConnectionError as e:
-                    if i == retries - 1:
-                        raise
-                    else:
-                        log.warning(
-                            f"Error fetching {url} with attempt "
-                            f"{i + 1}/{retries}: {e}. Retrying..."
-                        )
-                        await asyncio.sleep(cooldown * backoff**i)
+            except aiohttp.ClientConnectionError as e:
+                if i == retries - 1:
+                    raise
+                else:
+                    log.warning(
+                        f"Error fetching {url} with attempt "
+                        f"{i + 1}/{retries}: {e}. Retrying..."
+                    )
+                    await asyncio.sleep(cooldown * backoff**i)
         raise ValueError("retry count exceeded")
 
+    async def _fetch(
+        self,
+        url: str,
+        retries: int = 3,
+        cooldown: int = 2,
+        backoff: float = 1.5,
+        session: Optional[aiohttp.ClientSession] = None,
+    ) -> str:
+        if session is None:
+            async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
+                return await self._fetch(url, retries, cooldown, backoff, session)
+
+        _, text, _ = await self._arequest(
+            session, url, retries=retries, cooldown=cooldown, backoff=backoff
+        )
+        return text
+
     def _unpack_fetch_results(
         self, results: Any, urls: List[str], parser: Union[str, None] = None
     ) -> List[Any]:
@@ -572,21 +620,68 @@ class SafeWebBaseLoader(WebBaseLoader):
                 # Log the error and continue with the next URL
                 log.exception(f"Error loading {path}: {e}")
 
+    def _parse_page(self, path: str, result: str) -> tuple[str, dict]:
+        soup = self._unpack_fetch_results([result], [path])[0]
+
+        text = soup.get_text(**self.bs_get_text_kwargs)
+        metadata = {"source": path}
+        if title := soup.find("title"):
+            metadata["title"] = title.get_text()
+        if description := soup.find("meta", attrs={"name": "description"}):
+            metadata["description"] = description.get(
+                "content", "No description found."
+            )
+        if html := soup.find("html"):
+            metadata["language"] = html.get("lang", "No language found.")
+        return text, metadata
+
+    async def _afetch_document(
+        self, session: aiohttp.ClientSession, path: str
+    ) -> Document:
+        if WEB_PAGE_CACHE:
+            text, metadata = await WEB_PAGE_CACHE.aload(
+                path,
+                lambda headers: self._arequest(session, path, headers=headers),
+                lambda result: self._parse_page(path, result),
+            )
+            # The page may be cached under another spelling of its URL
+            return Document(page_content=text, metadata={**metadata, "source": path})
+
+        result = await self._fetch(path, session=session)
+        text, metadata = self._parse_page(path, result)
+        return Document(page_content=text, metadata=metadata)
+
     async def alazy_load(self) -> AsyncIterator[Document]:
-        """Async lazy load text from the url(s) in web_path."""
-        results = await self.ascrape_all(self.web_paths)
-        for path, soup in zip(self.web_paths, results):
-            text = soup.get_text(**self.bs_get_text_kwargs)
-            metadata = {"source": path}
-            if title := soup.find("title"):
-                metadata["title"] = title.get_text()
-            if description := soup.find("meta", attrs={"name": "description"}):
-                metadata["description"] = description.get(
-                    "content", "No description found."
-                )
-            if html := soup.find("html"):
-                metadata["language"] = html.get("lang", "No language found.")
-            yield Document(page_content=text, metadata=metadata)
+        """
+        Async lazy load text from the url(s) in web_path. Pages are fetched
+        concurrently, at most requests_per_second at once and
+        requests_per_host per host, and yielded as they arrive. Pages still
+        being fetched are cancelled when the iteration is stopped.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.requests_per_second, limit_per_host=self.requests_per_host
+        )
+        async with aiohttp.ClientSession(
+            connector=connector, trust_env=self.trust_env
+        ) as session:
+            tasks = [
+                asyncio.create_task(self._afetch_document(session, path))
+                for path in self.web_paths
+            ]
+            try:
+                for task in asyncio.as_completed(tasks):
+                    try:
+                        document = await task
+                    except Exception as e:
+                        if not self.continue_on_failure:
+                            raise
+                        log.warning(f"Error loading web page: {e}")
+                        continue
+                    yield document
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
 
     async def aload(self) -> list[Document]:
         """Load data into Document objects."""
@@ -612,6 +707,8 @@ def get_web_loader(
 
     if WEB_LOADER_ENGINE.value == "" or WEB_LOADER_ENGINE.value == "safe_web":
         WebLoaderClass = SafeWebBaseLoader
+        web_loader_args["page_timeout"] = WEB_LOADER_PAGE_TIMEOUT
+        web_loader_args["requests_per_host"] = WEB_LOADER_CONCURRENT_REQUESTS_PER_HOST
     if WEB_LOADER_ENGINE.value == "playwright":
         WebLoaderClass = SafePlaywrightURLLoader
         web_loader_args["playwright_timeout"] = PLAYWRIGHT_TIMEOUT.value * 1000
@@ -648,3 +745,42 @@ def get_web_loader(
             f"Invalid WEB_LOADER_ENGINE: {WEB_LOADER_ENGINE.value}. "
             "Please set it to 'safe_web', 'playwright', 'firecrawl', or 'tavily'."
         )
+
+
+async def aload_with_limits(
+    docs: AsyncIterator[Document], max_size: int = 0, timeout: float = 0
+) -> AsyncIterator[Document]:
+    """
+    Yields `docs` until `max_size` characters were loaded or `timeout`
+    seconds passed, 0 for no limit. `docs` is closed when stopping early,
+    which cancels the pages still being loaded.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout else None
+    size = 0
+
+    try:
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    log.info(f"Stopped loading web pages after {timeout}s")
+                    break
+
+            try:
+                doc = await asyncio.wait_for(anext(docs), remaining)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                log.info(f"Stopped loading web pages after {timeout}s")
+                break
+
+            yield doc
+            size += len(doc.page_content)
+            if max_size and size >= max_size:
+                log.info(f"Stopped loading web pages after {size} characters")
+                break
+    finally:
+        if hasattr(docs, "aclose"):
+            await docs.aclose()
@@ -1,6 +1,7 @@
+import asyncio
 import json
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 
 
 from open_webui.socket.main import get_event_emitter
@@ -14,21 +15,54 @@ from open_webui.models.chats import (
 from open_webui.models.tags import TagModel, Tags
 from open_webui.models.folders import Folders
 
-from open_webui.config import ENABLE_ADMIN_CHAT_ACCESS, ENABLE_ADMIN_EXPORT
+from open_webui.config import (
+    CHAT_EXPORT_BATCH_SIZE,
+    CHAT_IMPORT_BATCH_SIZE,
+    ENABLE_ADMIN_CHAT_ACCESS,
+    ENABLE_ADMIN_EXPORT,
+)
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_permission
+from open_webui.utils.ndjson import decode_ndjson, encode_ndjson
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+
+def insert_missing_tags(tags: list[str], user_id: str):
+    for tag_id in tags:
+        tag_id = tag_id.replace(" ", "_").lower()
+        tag_name = " ".join([word.capitalize() for word in tag_id.split("_")])
+        if (
+            tag_id != "none"
+            and Tags.get_tag_by_name_and_user_id(tag_name, user_id) is None
+        ):
+            Tags.insert_new_tag(tag_name, user_id)
+
+
+def get_chats_export_response(chats: Iterator, gzip: bool = False) -> StreamingResponse:
+    """
+    Streams the chats as NDJSON, one `ChatResponse` per line, as they are
+    read from the database.
+    """
+    lines = (ChatResponse(**chat.model_dump()).model_dump_json() for chat in chats)
+    filename = "chats.ndjson.gz" if gzip else "chats.ndjson"
+    return StreamingResponse(
+        encode_ndjson(lines, gzip=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 ############################
 # GetChatList
 ############################
@@ -37,10 +71,20 @@ router = APIRouter()
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
+    """
+    Pass the `cursor` of the last chat of a page, `{updated_at}_{id}`, to get
+    the next one. Unlike `page`, it stays fast however deep the page is.
+    """
     try:
-        if page is not None:
+        if cursor is not None:
+            return Chats.get_chat_title_id_list_by_user_id(
+                user.id, cursor=cursor, limit=60
+            )
+        elif page is not None:
             limit = 60
             skip = (page - 1) * limit
 
@@ -85,6 +129,7 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
 async def get_user_chat_list_by_user_id(
     user_id: str,
     page: Optional[int] = None,
+    cursor: Optional[str] = None,
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
@@ -110,9 +155,19 @@ async def get_user_chat_list_by_user_id(
     if direction:
         filter["direction"] = direction
 
-    return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, filter=filter, skip=skip, limit=limit
-    )
+    try:
+        return Chats.get_chat_list_by_user_id(
+            user_id,
+            include_archived=True,
+            filter=filter,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_MESSAGES.DEFAULT(e)
+        )
 
 
 ############################
@@ -142,15 +197,7 @@ async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)
     try:
         chat = Chats.import_chat(user.id, form_data)
         if chat:
-            tags = chat.meta.get("tags", [])
-            for tag_id in tags:
-                tag_id = tag_id.replace(" ", "_").lower()
-                tag_name = " ".join([word.capitalize() for word in tag_id.split("_")])
-                if (
-                    tag_id != "none"
-                    and Tags.get_tag_by_name_and_user_id(tag_name, user.id) is None
-                ):
-                    Tags.insert_new_tag(tag_name, user.id)
+            insert_missing_tags(chat.meta.get("tags", []), user.id)
 
         return ChatResponse(**chat.model_dump())
     except Exception as e:
@@ -160,6 +207,48 @@ async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)
         )
 
 
+############################
+# ImportChats
+############################
+
+
+@router.post("/import/stream")
+async def import_chats_stream(request: Request, user=Depends(get_verified_user)):
+    """
+    Imports chats from an NDJSON body, optionally gzipped, such as the one
+    exported by `/all?stream=true`. Chats are committed in batches as the
+    body is read, those of the batches before a failure stay imported.
+    """
+
+    def import_batch(forms: list[ChatImportForm]) -> int:
+        count = Chats.import_chats(user.id, forms)
+        insert_missing_tags(
+            list({tag for form in forms for tag in (form.meta or {}).get("tags", [])}),
+            user.id,
+        )
+        return count
+
+    count = 0
+    forms = []
+    try:
+        async for item in decode_ndjson(request.stream()):
+            forms.append(ChatImportForm(**item))
+            if len(forms) >= CHAT_IMPORT_BATCH_SIZE:
+                count += await asyncio.to_thread(import_batch, forms)
+                forms = []
+
+        if forms:
+            count += await asyncio.to_thread(import_batch, forms)
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(f"Imported {count} chats before: {e}"),
+        )
+
+    return {"count": count}
+
+
 ############################
 # GetChats
 ############################
@@ -233,7 +322,14 @@ async def get_user_pinned_chats(user=Depends(get_verified_user)):
 
 
 @router.get("/all", response_model=list[ChatResponse])
-async def get_user_chats(user=Depends(get_verified_user)):
+async def get_user_chats(
+    stream: bool = False, gzip: bool = False, user=Depends(get_verified_user)
+):
+    if stream:
+        return get_chats_export_response(
+            Chats.iter_chats(user.id, batch_size=CHAT_EXPORT_BATCH_SIZE), gzip
+        )
+
     return [
         ChatResponse(**chat.model_dump())
         for chat in Chats.get_chats_by_user_id(user.id)
@@ -276,12 +372,19 @@ async def get_all_user_tags(user=Depends(get_verified_user)):
 
 
 @router.get("/all/db", response_model=list[ChatResponse])
-async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
+async def get_all_user_chats_in_db(
+    stream: bool = False, gzip: bool = False, user=Depends(get_admin_user)
+):
     if not ENABLE_ADMIN_EXPORT:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
+
+    if stream:
+        return get_chats_export_response(
+            Chats.iter_chats(batch_size=CHAT_EXPORT_BATCH_SIZE), gzip
+        )
     return [ChatResponse(**chat.model_dump()) for chat in Chats.get_chats()]
 
 
@@ -293,6 +396,7 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
 @router.get("/archived", response_model=list[ChatTitleIdResponse])
 async def get_archived_session_user_chat_list(
     page: Optional[int] = None,
+    cursor: Optional[str] = None,
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
@@ -312,15 +416,21 @@ async def get_archived_session_user_chat_list(
     if direction:
         filter["direction"] = direction
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_archived_chat_list_by_user_id(
-            user.id,
-            filter=filter,
-            skip=skip,
-            limit=limit,
+    try:
+        chat_list = [
+            ChatTitleIdResponse(**chat.model_dump())
+            for chat in Chats.get_archived_chat_list_by_user_id(
+                user.id,
+                filter=filter,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        ]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_MESSAGES.DEFAULT(e)
         )
-    ]
 
     return chat_list
 
@@ -452,7 +562,7 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
@@ -481,6 +591,7 @@ async def update_chat_message_by_id(
             }
         )
 
+    chat = Chats.get_chat_by_id(id)
     return ChatResponse(**chat.model_dump())
 
 
@@ -35,6 +35,7 @@ from open_webui.models.knowledge import Knowledges
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
 from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
+from open_webui.retrieval.jobs import INGESTION_JOB_QUEUE
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from pydantic import BaseModel
@@ -83,12 +84,62 @@ def has_access_to_file(
 ############################
 
 
+def process_uploaded_file(
+    request: Request, file_item: FileModel, file_metadata: dict, user
+):
+    content_type = file_item.meta.get("content_type")
+    if content_type:
+        stt_supported_content_types = getattr(
+            request.app.state.config, "STT_SUPPORTED_CONTENT_TYPES", []
+        )
+
+        if any(
+            fnmatch(content_type, pattern)
+            for pattern in (
+                stt_supported_content_types
+                if stt_supported_content_types
+                and any(t.strip() for t in stt_supported_content_types)
+                else ["audio/*", "video/webm"]
+            )
+        ):
+            file_path = Storage.get_file(file_item.path)
+            result = transcribe(request, file_path, file_metadata)
+
+            process_file(
+                request,
+                ProcessFileForm(file_id=file_item.id, content=result.get("text", "")),
+                user=user,
+            )
+        elif (not content_type.startswith(("image/", "video/"))) or (
+            request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
+        ):
+            process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+    else:
+        log.info(
+            f"File type {content_type} is not provided, but trying to process anyway"
+        )
+        process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+
+
+@INGESTION_JOB_QUEUE.register("process_uploaded_file")
+def process_uploaded_file_job(request: Request, user, job, progress):
+    file_item = Files.get_file_by_id(job.payload["file_id"])
+    if not file_item:
+        raise ValueError(ERROR_MESSAGES.NOT_FOUND)
+
+    progress(0, 1)
+    process_uploaded_file(request, file_item, job.payload.get("metadata") or {}, user)
+    progress(1, 1)
+    return {"file_id": file_item.id}
+
+
 @router.post("/", response_model=FileModelResponse)
 def upload_file(
     request: Request,
     file: UploadFile = File(...),
     metadata: Optional[dict | str] = Form(None),
     process: bool = Query(True),
+    process_in_background: bool = Query(False),
     internal: bool = False,
     user=Depends(get_verified_user),
 ):
@@ -153,40 +204,16 @@ def upload_file(
                 }
             ),
         )
-        if process:
+        if process and process_in_background:
+            job = INGESTION_JOB_QUEUE.enqueue(
+                user.id,
+                "process_uploaded_file",
+                {"file_id": id, "metadata": file_metadata},
+            )
+            file_item = FileModelResponse(**file_item.model_dump(), job_id=job.id)
+        elif process:
             try:
-                if file.content_type:
-                    stt_supported_content_types = getattr(
-                        request.app.state.config, "STT_SUPPORTED_CONTENT_TYPES", []
-                    )
-
-                    if any(
-                        fnmatch(file.content_type, content_type)
-                        for content_type in (
-                            stt_supported_content_types
-                            if stt_supported_content_types
-                            and any(t.strip() for t in stt_supported_content_types)
-                            else ["audio/*", "video/webm"]
-                        )
-                    ):
-                        file_path = Storage.get_file(file_path)
-                        result = transcribe(request, file_path, file_metadata)
-
-                        process_file(
-                            request,
-                            ProcessFileForm(file_id=id, content=result.get("text", "")),
-                            user=user,
-                        )
-                    elif (not file.content_type.startswith(("image/", "video/"))) or (
-                        request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
-                    ):
-                        process_file(request, ProcessFileForm(file_id=id), user=user)
-                else:
-                    log.info(
-                        f"File type {file.content_type} is not provided, but trying to process anyway"
-                    )
-                    process_file(request, ProcessFileForm(file_id=id), user=user)
-
+                process_uploaded_file(request, file_item, file_metadata, user)
                 file_item = Files.get_file_by_id(id=id)
             except Exception as e:
                 log.exception(e)
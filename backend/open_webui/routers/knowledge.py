@@ -1,7 +1,9 @@
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
 import logging
+import time
 
 from open_webui.models.knowledge import (
     Knowledges,
@@ -16,8 +18,11 @@ from open_webui.routers.retrieval import (
     ProcessFileForm,
     process_files_batch,
     BatchProcessFilesForm,
+    get_chunk_embedding_config,
 )
+from open_webui.retrieval.jobs import INGESTION_JOB_QUEUE
 from open_webui.storage.provider import Storage
+from open_webui.config import RAG_REINDEX_CONCURRENCY
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
@@ -33,6 +38,9 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+# Files processed at once by background knowledge jobs
+KNOWLEDGE_JOB_BATCH_SIZE = 10
+
 ############################
 # getKnowledgeBases
 ############################
@@ -166,20 +174,131 @@ async def create_new_knowledge(
 ############################
 
 
-@router.post("/reindex", response_model=bool)
-async def reindex_knowledge_files(request: Request, user=Depends(get_verified_user)):
-    if user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=ERROR_MESSAGES.UNAUTHORIZED,
+def is_file_indexed(request: Request, knowledge_id: str, file: FileModel) -> bool:
+    """
+    Whether the collection has the chunks of the file embedded from its
+    current content, with the current embedding model.
+    """
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=knowledge_id, filter={"file_id": file.id}, limit=1
+    )
+    if not result or not result.metadatas or not result.metadatas[0]:
+        return False
+
+    metadata = result.metadatas[0][0] or {}
+    return metadata.get("hash") == file.hash and metadata.get(
+        "embedding_config"
+    ) == get_chunk_embedding_config(request)
+
+
+def get_collection_embedding(
+    knowledge_id: str, files: list[FileModel]
+) -> Optional[tuple[Optional[str], Optional[int]]]:
+    """
+    The embedding config and vector dimension of the chunks in the collection,
+    sampled from the first file with chunks, or None if it has none. The
+    dimension is None for vector databases that do not return vectors.
+    """
+    for file in files:
+        result = VECTOR_DB_CLIENT.query(
+            collection_name=knowledge_id, filter={"file_id": file.id}, limit=1
         )
+        if not result or not result.ids or not result.ids[0]:
+            continue
+
+        id = result.ids[0][0]
+        metadata = result.metadatas[0][0] or {}
+        vector = VECTOR_DB_CLIENT.get_vectors(knowledge_id, [id]).get(id)
+        return metadata.get("embedding_config"), (
+            len(vector) if vector is not None else None
+        )
+    return None
 
-    knowledge_bases = Knowledges.get_knowledge_bases()
 
+def is_collection_outdated(
+    request: Request,
+    knowledge_id: str,
+    files: list[FileModel],
+    get_dimension: Callable[[], int],
+) -> bool:
+    """
+    Whether the collection holds chunks of another embedding model, or
+    vectors of another dimension. Those cannot be replaced file by file, as
+    the collection would mix vectors that cannot be compared, or reject the
+    new ones.
+    """
+    if not VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_id):
+        return False
+
+    embedding = get_collection_embedding(knowledge_id, files)
+    if embedding is None:
+        return False
+
+    embedding_config, dimension = embedding
+    if embedding_config != get_chunk_embedding_config(request):
+        return True
+    return dimension is not None and dimension != get_dimension()
+
+
+def reindex_knowledge_file(
+    request: Request, knowledge_id: str, file: FileModel, user, force: bool = False
+) -> Optional[int]:
+    """Returns the number of chunks indexed, or None if the file is unchanged."""
+    if not force and is_file_indexed(request, knowledge_id, file):
+        return None
+
+    if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_id):
+        VECTOR_DB_CLIENT.delete(
+            collection_name=knowledge_id, filter={"file_id": file.id}
+        )
+
+    process_file(
+        request,
+        ProcessFileForm(file_id=file.id, collection_name=knowledge_id),
+        user=user,
+    )
+
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=knowledge_id, filter={"file_id": file.id}
+    )
+    return len(result.ids[0]) if result and result.ids else 0
+
+
+@INGESTION_JOB_QUEUE.register("reindex_knowledge")
+def reindex_knowledge_job(request: Request, user, job, progress):
+    """
+    Reindexes the files of every knowledge base across a pool of threads.
+    Files whose content and embedding model did not change are skipped, and
+    the files done are checkpointed, so that a job that was interrupted
+    resumes where it stopped. Collections of another embedding model are
+    dropped and rebuilt from all their files, changed files are replaced in
+    place otherwise.
+    """
+    force = (job.payload or {}).get("force", False)
+    checkpoint = job.checkpoint or {}
+
+    completed = set(checkpoint.get("completed", []))
+    deleted_knowledge_bases = checkpoint.get("deleted_knowledge_bases", [])
+    rebuilt_knowledge_bases = checkpoint.get("rebuilt_knowledge_bases", [])
+    failed_files = checkpoint.get("failed_files", [])
+    skipped = checkpoint.get("skipped", 0)
+    chunks = checkpoint.get("chunks", 0)
+
+    knowledge_bases = Knowledges.get_knowledge_bases()
     log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
 
-    deleted_knowledge_bases = []
+    dimension = None
+
+    def get_dimension() -> int:
+        nonlocal dimension
+        if dimension is None:
+            dimension = len(
+                request.app.state.EMBEDDING_FUNCTION("dimension", user=user)
+            )
+        return dimension
 
+    pending = []
+    outdated = []
     for knowledge_base in knowledge_bases:
         # -- Robust error handling for missing or invalid data
         if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
@@ -195,50 +314,122 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
                 )
             continue
 
-        try:
-            file_ids = knowledge_base.data.get("file_ids", [])
-            files = Files.get_files_by_ids(file_ids)
+        files = Files.get_files_by_ids(knowledge_base.data.get("file_ids", []))
+        if is_collection_outdated(request, knowledge_base.id, files, get_dimension):
+            # Files done before the rebuild are dropped with the collection
+            completed -= {f"{knowledge_base.id}/{file.id}" for file in files}
+            outdated.append(knowledge_base.id)
+            if knowledge_base.id not in rebuilt_knowledge_bases:
+                rebuilt_knowledge_bases.append(knowledge_base.id)
+
+        for file in files:
+            if f"{knowledge_base.id}/{file.id}" not in completed:
+                pending.append((knowledge_base.id, file))
+
+    total = len(completed) + len(pending)
+    started_at = time.time()
+    run_chunks = 0
+    reported_at = 0
+
+    def report(final: bool = False):
+        nonlocal reported_at
+        # Checkpoints are rewritten whole, do it at most once a second
+        if not final and time.time() - reported_at < 1:
+            return
+        reported_at = time.time()
+
+        progress(
+            len(completed),
+            total,
+            checkpoint={
+                "completed": list(completed),
+                "deleted_knowledge_bases": deleted_knowledge_bases,
+                "rebuilt_knowledge_bases": rebuilt_knowledge_bases,
+                "failed_files": failed_files,
+                "skipped": skipped,
+                "chunks": chunks,
+            },
+            skipped=skipped,
+            failed=len(failed_files),
+            chunks=chunks,
+            chunks_per_second=round(
+                run_chunks / max(time.time() - started_at, 1e-3), 1
+            ),
+        )
+
+    # Checkpointed first, so that a job interrupted after dropping a
+    # collection does not skip the files it held on resume
+    report(final=True)
+    for knowledge_id in outdated:
+        log.info(f"Rebuilding knowledge base {knowledge_id} for the embedding model")
+        VECTOR_DB_CLIENT.delete_collection(collection_name=knowledge_id)
+
+    with ThreadPoolExecutor(max_workers=RAG_REINDEX_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(
+                reindex_knowledge_file, request, knowledge_id, file, user, force
+            ): (knowledge_id, file)
+            for knowledge_id, file in pending
+        }
+
+        for future in as_completed(futures):
+            knowledge_id, file = futures[future]
             try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
-                    )
+                count = future.result()
+                if count is None:
+                    skipped += 1
+                else:
+                    chunks += count
+                    run_chunks += count
             except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                continue  # Skip, don't raise
-
-            failed_files = []
-            for file in files:
-                try:
-                    process_file(
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
-                    )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
-                    )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
+                log.error(
+                    f"Error processing file {file.filename} (ID: {file.id}) in knowledge base {knowledge_id}: {str(e)}"
+                )
+                failed_files.append(
+                    {"knowledge_id": knowledge_id, "file_id": file.id, "error": str(e)}
+                )
 
-        except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            # Don't raise, just continue
-            continue
+            completed.add(f"{knowledge_id}/{file.id}")
+            report()
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
+    report(final=True)
 
     log.info(
-        f"Reindexing completed. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
+        f"Reindexing completed. {total - skipped - len(failed_files)} files reindexed, "
+        f"{skipped} unchanged, {len(failed_files)} failed, {chunks} chunks "
+        f"({run_chunks / max(time.time() - started_at, 1e-3):.1f} chunks/s)"
+    )
+    log.info(
+        f"Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
     )
+    log.info(
+        f"Rebuilt {len(rebuilt_knowledge_bases)} knowledge bases: {rebuilt_knowledge_bases}"
+    )
+    return {
+        "deleted_knowledge_bases": deleted_knowledge_bases,
+        "rebuilt_knowledge_bases": rebuilt_knowledge_bases,
+        "failed_files": failed_files,
+        "skipped": skipped,
+        "chunks": chunks,
+    }
+
+
+@router.post("/reindex", response_model=bool)
+async def reindex_knowledge_files(
+    request: Request,
+    force: bool = Query(False),
+    user=Depends(get_verified_user),
+):
+    if user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.UNAUTHORIZED,
+        )
+
+    # Reindexing every knowledge base takes a while, run it in the background
+    # Unless forced, files which did not change since they were indexed are
+    # skipped
+    INGESTION_JOB_QUEUE.enqueue(user.id, "reindex_knowledge", {"force": force})
     return True
 
 
@@ -249,6 +440,7 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
 
 class KnowledgeFilesResponse(KnowledgeResponse):
     files: list[FileMetadataResponse]
+    job_id: Optional[str] = None
 
 
 @router.get("/{id}", response_model=Optional[KnowledgeFilesResponse])
@@ -677,11 +869,57 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
 ############################
 
 
+def add_processed_files_to_knowledge(id: str, result):
+    knowledge = Knowledges.get_knowledge_by_id(id=id)
+    if not knowledge:
+        raise ValueError(ERROR_MESSAGES.NOT_FOUND)
+
+    data = knowledge.data or {}
+    existing_file_ids = data.get("file_ids", [])
+
+    # Only add files that were successfully processed
+    successful_file_ids = [r.file_id for r in result.results if r.status == "completed"]
+    for file_id in successful_file_ids:
+        if file_id not in existing_file_ids:
+            existing_file_ids.append(file_id)
+
+    data["file_ids"] = existing_file_ids
+    return Knowledges.update_knowledge_data_by_id(id=id, data=data)
+
+
+@INGESTION_JOB_QUEUE.register("add_files_to_knowledge")
+def add_files_to_knowledge_job(request: Request, user, job, progress):
+    id = job.payload["knowledge_id"]
+    file_ids = job.payload["file_ids"]
+
+    errors = []
+    # Files become searchable batch by batch
+    for idx in range(0, len(file_ids), KNOWLEDGE_JOB_BATCH_SIZE):
+        progress(idx, len(file_ids))
+
+        result = process_files_batch(
+            request=request,
+            form_data=BatchProcessFilesForm(
+                files=Files.get_files_by_ids(
+                    file_ids[idx : idx + KNOWLEDGE_JOB_BATCH_SIZE]
+                ),
+                collection_name=id,
+            ),
+            user=user,
+        )
+        add_processed_files_to_knowledge(id, result)
+        errors.extend(f"{err.file_id}: {err.error}" for err in result.errors)
+
+    progress(len(file_ids), len(file_ids))
+    return {"errors": errors}
+
+
 @router.post("/{id}/files/batch/add", response_model=Optional[KnowledgeFilesResponse])
 def add_files_to_knowledge_batch(
     request: Request,
     id: str,
     form_data: list[KnowledgeFileIdForm],
+    process_in_background: bool = Query(False),
     user=Depends(get_verified_user),
 ):
     """
@@ -716,6 +954,20 @@ def add_files_to_knowledge_batch(
             )
         files.append(file)
 
+    if process_in_background:
+        job = INGESTION_JOB_QUEUE.enqueue(
+            user.id,
+            "add_files_to_knowledge",
+            {"knowledge_id": id, "file_ids": [file.id for file in files]},
+        )
+        return KnowledgeFilesResponse(
+            **knowledge.model_dump(),
+            files=Files.get_file_metadatas_by_ids(
+                (knowledge.data or {}).get("file_ids", [])
+            ),
+            job_id=job.id,
+        )
+
     # Process files
     try:
         result = process_files_batch(
@@ -729,18 +981,8 @@ def add_files_to_knowledge_batch(
         )
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # Add successful files to knowledge base
-    data = knowledge.data or {}
-    existing_file_ids = data.get("file_ids", [])
-
-    # Only add files that were successfully processed
-    successful_file_ids = [r.file_id for r in result.results if r.status == "completed"]
-    for file_id in successful_file_ids:
-        if file_id not in existing_file_ids:
-            existing_file_ids.append(file_id)
-
-    data["file_ids"] = existing_file_ids
-    knowledge = Knowledges.update_knowledge_data_by_id(id=id, data=data)
+    knowledge = add_processed_files_to_knowledge(id, result)
+    existing_file_ids = knowledge.data.get("file_ids", [])
 
     # If there were any errors, include them in the response
     if result.errors:
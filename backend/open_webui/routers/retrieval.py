@@ -6,10 +6,9 @@ import shutil
 import asyncio
 
 
-import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Iterator, List, Optional, Sequence, Union
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Sequence, Union
 
 from fastapi import (
     Depends,
@@ -21,6 +20,7 @@ from fastapi import (
     Request,
     status,
     APIRouter,
+    Query,
 )
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.concurrency import run_in_threadpool
@@ -33,6 +33,7 @@ from langchain_text_splitters import MarkdownHeaderTextSplitter
 from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, Files
+from open_webui.models.ingestion_jobs import IngestionJobModel, IngestionJobs
 from open_webui.models.knowledge import Knowledges
 from open_webui.storage.provider import Storage
 
@@ -40,12 +41,13 @@ from open_webui.storage.provider import Storage
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 # Document loaders
+from open_webui.retrieval.ingestion import BoundedBuffer, batch_docs, run_pipeline
 from open_webui.retrieval.loaders.main import Loader
 from open_webui.retrieval.loaders.youtube import YoutubeLoader
 
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
-from open_webui.retrieval.web.utils import get_web_loader
+from open_webui.retrieval.web.utils import aload_with_limits, get_web_loader
 from open_webui.retrieval.web.brave import search_brave
 from open_webui.retrieval.web.kagi import search_kagi
 from open_webui.retrieval.web.mojeek import search_mojeek
@@ -69,7 +71,10 @@ from open_webui.retrieval.web.firecrawl import search_firecrawl
 from open_webui.retrieval.web.external import search_external
 
 from open_webui.retrieval.utils import (
+    ensure_bm25_index,
+    get_chunk_id,
     get_embedding_function,
+    get_stored_vectors,
     get_reranking_function,
     get_model_path,
     query_collection,
@@ -92,6 +97,10 @@ from open_webui.config import (
     DEFAULT_LOCALE,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_QUERY_PREFIX,
+    RAG_INGESTION_BATCH_SIZE,
+    RAG_INGESTION_MAX_BUFFER_SIZE,
+    WEB_SEARCH_LOAD_TIMEOUT,
+    WEB_SEARCH_MAX_CONTENT_SIZE,
 )
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -1108,6 +1117,236 @@ async def update_rag_config(
 ####################################
 
 
+def split_docs(request: Request, docs: list[Document]) -> list[Document]:
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+        return text_splitter.split_documents(docs)
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        text_splitter = TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+        return text_splitter.split_documents(docs)
+    elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
+        log.info("Using markdown header text splitter")
+
+        # Define headers to split on - covering most common markdown header levels
+        headers_to_split_on = [
+            ("#", "Header 1"),
+            ("##", "Header 2"),
+            ("###", "Header 3"),
+            ("####", "Header 4"),
+            ("#####", "Header 5"),
+            ("######", "Header 6"),
+        ]
+
+        markdown_splitter = MarkdownHeaderTextSplitter(
+            headers_to_split_on=headers_to_split_on,
+            strip_headers=False,  # Keep headers in content for context
+        )
+
+        md_split_docs = []
+        for doc in docs:
+            md_header_splits = markdown_splitter.split_text(doc.page_content)
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=request.app.state.config.CHUNK_SIZE,
+                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+                add_start_index=True,
+            )
+            md_header_splits = text_splitter.split_documents(md_header_splits)
+
+            # Convert back to Document objects, preserving original metadata
+            for split_chunk in md_header_splits:
+                headings_list = []
+                # Extract header values in order based on headers_to_split_on
+                for _, header_meta_key_name in headers_to_split_on:
+                    if header_meta_key_name in split_chunk.metadata:
+                        headings_list.append(split_chunk.metadata[header_meta_key_name])
+
+                md_split_docs.append(
+                    Document(
+                        page_content=split_chunk.page_content,
+                        metadata={**doc.metadata, "headings": headings_list},
+                    )
+                )
+
+        return md_split_docs
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+
+def get_ingestion_embedding_function(request: Request):
+    return get_embedding_function(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.ef,
+        (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_BASE_URL
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
+            )
+        ),
+        (
+            request.app.state.config.RAG_OPENAI_API_KEY
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_API_KEY
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
+            )
+        ),
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+        azure_api_version=(
+            request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+            else None
+        ),
+    )
+
+
+def get_chunk_embedding_config(request: Request) -> str:
+    """The embedding config stored with the chunks, to tell the embedding model."""
+    return json.dumps(
+        {
+            "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+            "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+        }
+    )
+
+
+def insert_docs_to_vector_db(
+    request: Request,
+    docs: list[Document],
+    collection_name: str,
+    metadata: Optional[dict],
+    embedding_function,
+    user=None,
+) -> list[str]:
+    """
+    Upserts the chunks `docs` in the collection and returns their IDs. Chunks
+    have deterministic IDs, and only the ones without a stored vector, in
+    the collection or in the collection of their file, are embedded.
+    """
+    embedding_config = get_chunk_embedding_config(request)
+
+    chunks = {}
+    for doc in docs:
+        doc_metadata = {
+            **doc.metadata,
+            **(metadata if metadata else {}),
+            "embedding_config": embedding_config,
+        }
+        source = doc_metadata.get("file_id")
+        id = get_chunk_id(collection_name, embedding_config, doc.page_content, source)
+        # Chunks repeated in the document are stored once
+        chunks.setdefault(id, (doc.page_content, doc_metadata, source))
+
+    # ChromaDB does not like datetime formats
+    # for meta-data so convert them to string.
+    for _, doc_metadata, _ in chunks.values():
+        for key, value in doc_metadata.items():
+            if (
+                isinstance(value, datetime)
+                or isinstance(value, list)
+                or isinstance(value, dict)
+            ):
+                doc_metadata[key] = str(value)
+
+    vectors = get_stored_vectors(
+        collection_name,
+        embedding_config,
+        {id: (text, source) for id, (text, _, source) in chunks.items()},
+    )
+
+    missing = [id for id in chunks if id not in vectors]
+    if missing:
+        embeddings = embedding_function(
+            [chunks[id][0].replace("\n", " ") for id in missing],
+            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+            user=user,
+        )
+        vectors.update(zip(missing, embeddings))
+
+    log.debug(
+        f"insert_docs_to_vector_db: {len(chunks)} chunks in {collection_name}, "
+        f"{len(chunks) - len(missing)} reused"
+    )
+
+    items = [
+        {
+            "id": id,
+            "text": text,
+            "vector": vectors[id],
+            "metadata": doc_metadata,
+        }
+        for id, (text, doc_metadata, _) in chunks.items()
+    ]
+
+    VECTOR_DB_CLIENT.upsert(
+        collection_name=collection_name,
+        items=items,
+    )
+    return list(chunks)
+
+
+def replace_file_docs_in_vector_db(
+    request: Request,
+    docs: list[Document],
+    collection_name: str,
+    metadata: dict,
+    user=None,
+) -> bool:
+    """
+    Replaces the chunks of the file `metadata["file_id"]` in the collection
+    with the chunks of `docs`. Chunks which did not change keep their
+    vectors, so that only the changed ones are embedded, and chunks which
+    are gone are removed.
+    """
+    log.info(f"replace_file_docs_in_vector_db: {collection_name}")
+
+    docs = split_docs(request, docs)
+    if len(docs) == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    embedding_function = get_ingestion_embedding_function(request)
+
+    ids = set()
+    for idx in range(0, len(docs), RAG_INGESTION_BATCH_SIZE):
+        ids.update(
+            insert_docs_to_vector_db(
+                request,
+                docs[idx : idx + RAG_INGESTION_BATCH_SIZE],
+                collection_name,
+                metadata,
+                embedding_function,
+                user=user,
+            )
+        )
+
+    result = VECTOR_DB_CLIENT.query(
+        collection_name=collection_name, filter={"file_id": metadata["file_id"]}
+    )
+    if result is not None and result.ids:
+        stale_ids = [id for id in result.ids[0] if id not in ids]
+        if stale_ids:
+            VECTOR_DB_CLIENT.delete(collection_name=collection_name, ids=stale_ids)
+    return True
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -1152,104 +1391,11 @@ def save_docs_to_vector_db(
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
-            log.info("Using markdown header text splitter")
-
-            # Define headers to split on - covering most common markdown header levels
-            headers_to_split_on = [
-                ("#", "Header 1"),
-                ("##", "Header 2"),
-                ("###", "Header 3"),
-                ("####", "Header 4"),
-                ("#####", "Header 5"),
-                ("######", "Header 6"),
-            ]
-
-            markdown_splitter = MarkdownHeaderTextSplitter(
-                headers_to_split_on=headers_to_split_on,
-                strip_headers=False,  # Keep headers in content for context
-            )
-
-            md_split_docs = []
-            for doc in docs:
-                md_header_splits = markdown_splitter.split_text(doc.page_content)
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=request.app.state.config.CHUNK_SIZE,
-                    chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                    add_start_index=True,
-                )
-                md_header_splits = text_splitter.split_documents(md_header_splits)
-
-                # Convert back to Document objects, preserving original metadata
-                for split_chunk in md_header_splits:
-                    headings_list = []
-                    # Extract header values in order based on headers_to_split_on
-                    for _, header_meta_key_name in headers_to_split_on:
-                        if header_meta_key_name in split_chunk.metadata:
-                            headings_list.append(
-                                split_chunk.metadata[header_meta_key_name]
-                            )
-
-                    md_split_docs.append(
-                        Document(
-                            page_content=split_chunk.page_content,
-                            metadata={**doc.metadata, "headings": headings_list},
-                        )
-                    )
-
-            docs = md_split_docs
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+        docs = split_docs(request, docs)
 
     if len(docs) == 0:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
-    texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
-            **doc.metadata,
-            **(metadata if metadata else {}),
-            "embedding_config": json.dumps(
-                {
-                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-                }
-            ),
-        }
-        for doc in docs
-    ]
-
-    # ChromaDB does not like datetime formats
-    # for meta-data so convert them to string.
-    for metadata in metadatas:
-        for key, value in metadata.items():
-            if (
-                isinstance(value, datetime)
-                or isinstance(value, list)
-                or isinstance(value, dict)
-            ):
-                metadata[key] = str(value)
-
     try:
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
             log.info(f"collection {collection_name} already exists")
@@ -1264,62 +1410,168 @@ def save_docs_to_vector_db(
                 return True
 
         log.info(f"adding to collection {collection_name}")
-        embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-            request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_BASE_URL
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
-                )
-            ),
-            (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_API_KEY
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
-                )
-            ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-            azure_api_version=(
-                request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
-                else None
-            ),
-        )
+        embedding_function = get_ingestion_embedding_function(request)
 
-        embeddings = embedding_function(
-            list(map(lambda x: x.replace("\n", " "), texts)),
-            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
-            user=user,
-        )
+        for idx in range(0, len(docs), RAG_INGESTION_BATCH_SIZE):
+            insert_docs_to_vector_db(
+                request,
+                docs[idx : idx + RAG_INGESTION_BATCH_SIZE],
+                collection_name,
+                metadata,
+                embedding_function,
+                user=user,
+            )
 
-        items = [
-            {
-                "id": str(uuid.uuid4()),
-                "text": text,
-                "vector": embeddings[idx],
-                "metadata": metadatas[idx],
-            }
-            for idx, text in enumerate(texts)
-        ]
+        return True
+    except Exception as e:
+        log.exception(e)
+        raise e
 
-        VECTOR_DB_CLIENT.insert(
-            collection_name=collection_name,
-            items=items,
+
+def stream_docs_to_vector_db(
+    request: Request,
+    docs: Iterable[Document],
+    collection_name: str,
+    metadata: Optional[dict] = None,
+    user=None,
+) -> bool:
+    """
+    Saves `docs` to a new collection as they are loaded: they are split and
+    embedded and inserted in batches, while the next ones are loaded, with
+    at most RAG_INGESTION_MAX_BUFFER_SIZE characters of chunks waiting.
+    The collection is removed if ingestion fails.
+    """
+    log.info(f"stream_docs_to_vector_db: {collection_name}")
+
+    embedding_function = get_ingestion_embedding_function(request)
+    chunks = (chunk for doc in docs for chunk in split_docs(request, [doc]))
+
+    count = 0
+
+    def insert(batch: list[Document]):
+        nonlocal count
+        insert_docs_to_vector_db(
+            request, batch, collection_name, metadata, embedding_function, user=user
         )
+        count += len(batch)
+        log.debug(f"stream_docs_to_vector_db: {count} chunks in {collection_name}")
 
-        return True
+    try:
+        run_pipeline(
+            batch_docs(
+                chunks,
+                RAG_INGESTION_BATCH_SIZE,
+                # Leave room for the batch being embedded and the next one
+                RAG_INGESTION_MAX_BUFFER_SIZE // 3,
+            ),
+            insert,
+            RAG_INGESTION_MAX_BUFFER_SIZE // 3,
+        )
     except Exception as e:
         log.exception(e)
+        if count:
+            VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
         raise e
 
+    if count == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    return True
+
+
+def stream_file_to_vector_db(
+    request: Request,
+    file: FileModel,
+    docs: Iterable[Document],
+    collection_name: str,
+    user=None,
+) -> dict:
+    """
+    Saves the loaded pages of a file to its new collection as they are
+    loaded, then stores the content and the hash of the file.
+    """
+    pages = []
+
+    def collect_pages():
+        for doc in docs:
+            pages.append(doc.page_content)
+            yield doc
+
+    # The hash of the content is only known once the whole file is loaded
+    stream_docs_to_vector_db(
+        request,
+        collect_pages(),
+        collection_name,
+        metadata={"file_id": file.id, "name": file.filename},
+        user=user,
+    )
+
+    text_content = " ".join(pages)
+    log.debug(f"text_content: {text_content}")
+    Files.update_file_data_by_id(
+        file.id,
+        {"content": text_content},
+    )
+    Files.update_file_hash_by_id(file.id, calculate_sha256_string(text_content))
+    Files.update_file_metadata_by_id(
+        file.id,
+        {
+            "collection_name": collection_name,
+        },
+    )
+
+    return {
+        "status": True,
+        "collection_name": collection_name,
+        "filename": file.filename,
+        "content": text_content,
+    }
+
+
+async def stream_web_docs_to_vector_db(
+    request: Request,
+    docs: AsyncIterator[Document],
+    collection_name: str,
+    user=None,
+) -> list[str]:
+    """
+    Saves web pages to a new collection as they are loaded: each page is
+    split and embedded while the next ones are still being fetched. Returns
+    the sources of the loaded pages.
+    """
+    buffer = BoundedBuffer(RAG_INGESTION_MAX_BUFFER_SIZE // 3)
+
+    def pages():
+        while (batch := buffer.get()) is not None:
+            yield from batch
+
+    def ingest():
+        try:
+            if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+                VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+            stream_docs_to_vector_db(request, pages(), collection_name, user=user)
+        finally:
+            # Stops loading pages if ingestion failed
+            buffer.close()
+
+    ingestion = asyncio.ensure_future(run_in_threadpool(ingest))
+
+    sources = []
+    try:
+        async for doc in docs:
+            if not await run_in_threadpool(buffer.put, [doc]):
+                break
+            if doc.metadata.get("source"):
+                sources.append(doc.metadata["source"])
+    finally:
+        await docs.aclose()
+        await run_in_threadpool(buffer.put, None)
+
+    try:
+        await ingestion
+    except Exception as e:
+        log.debug(f"error saving docs: {e}")
+    return sources
+
 
 class ProcessFileForm(BaseModel):
     file_id: str
@@ -1345,13 +1597,6 @@ def process_file(
             # Update the content in the file
             # Usage: /files/{file_id}/data/content/update, /files/ (audio file upload pipeline)
 
-            try:
-                # /files/{file_id}/data/content/update
-                VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
-            except:
-                # Audio file upload pipeline
-                pass
-
             docs = [
                 Document(
                     page_content=form_data.content.replace("<br/>", "\n"),
@@ -1431,11 +1676,7 @@ def process_file(
                     DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
                     MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
                 )
-                docs = loader.load(
-                    file.filename, file.meta.get("content_type"), file_path
-                )
-
-                docs = [
+                docs = (
                     Document(
                         page_content=doc.page_content,
                         metadata={
@@ -1446,8 +1687,19 @@ def process_file(
                             "source": file.filename,
                         },
                     )
-                    for doc in docs
-                ]
+                    for doc in loader.lazy_load(
+                        file.filename, file.meta.get("content_type"), file_path
+                    )
+                )
+
+                if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL and (
+                    not VECTOR_DB_CLIENT.has_collection(collection_name=collection_name)
+                ):
+                    return stream_file_to_vector_db(
+                        request, file, docs, collection_name, user=user
+                    )
+
+                docs = list(docs)
             else:
                 docs = [
                     Document(
@@ -1474,18 +1726,33 @@ def process_file(
 
         if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
             try:
-                result = save_docs_to_vector_db(
-                    request,
-                    docs=docs,
-                    collection_name=collection_name,
-                    metadata={
-                        "file_id": file.id,
-                        "name": file.filename,
-                        "hash": hash,
-                    },
-                    add=(True if form_data.collection_name else False),
-                    user=user,
-                )
+                metadata = {
+                    "file_id": file.id,
+                    "name": file.filename,
+                    "hash": hash,
+                }
+
+                if form_data.content and VECTOR_DB_CLIENT.has_collection(
+                    collection_name=collection_name
+                ):
+                    # /files/{file_id}/data/content/update
+                    # Only the chunks of the content which changed are embedded
+                    result = replace_file_docs_in_vector_db(
+                        request,
+                        docs=docs,
+                        collection_name=collection_name,
+                        metadata=metadata,
+                        user=user,
+                    )
+                else:
+                    result = save_docs_to_vector_db(
+                        request,
+                        docs=docs,
+                        collection_name=collection_name,
+                        metadata=metadata,
+                        add=(True if form_data.collection_name else False),
+                        user=user,
+                    )
 
                 if result:
                     Files.update_file_metadata_by_id(
@@ -1970,13 +2237,21 @@ async def process_web_search(
                 requests_per_second=request.app.state.config.WEB_SEARCH_CONCURRENT_REQUESTS,
                 trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
             )
-            docs = await loader.aload()
-
-        urls = [
-            doc.metadata.get("source") for doc in docs if doc.metadata.get("source")
-        ]  # only keep the urls returned by the loader
+            # Pages are loaded until the content budget or deadline is reached
+            docs = aload_with_limits(
+                loader.alazy_load(),
+                max_size=WEB_SEARCH_MAX_CONTENT_SIZE,
+                timeout=WEB_SEARCH_LOAD_TIMEOUT,
+            )
 
         if request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
+            if not isinstance(docs, list):
+                docs = [doc async for doc in docs]
+
+            urls = [
+                doc.metadata.get("source") for doc in docs if doc.metadata.get("source")
+            ]  # only keep the urls returned by the loader
+
             return {
                 "status": True,
                 "collection_name": None,
@@ -1998,23 +2273,37 @@ async def process_web_search(
                 ]
             )
 
-            try:
-                await run_in_threadpool(
-                    save_docs_to_vector_db,
-                    request,
-                    docs,
-                    collection_name,
-                    overwrite=True,
-                    user=user,
+            if isinstance(docs, list):
+                try:
+                    await run_in_threadpool(
+                        save_docs_to_vector_db,
+                        request,
+                        docs,
+                        collection_name,
+                        overwrite=True,
+                        user=user,
+                    )
+                except Exception as e:
+                    log.debug(f"error saving docs: {e}")
+
+                urls = [
+                    doc.metadata.get("source")
+                    for doc in docs
+                    if doc.metadata.get("source")
+                ]
+                loaded_count = len(docs)
+            else:
+                # Pages are embedded as they arrive
+                urls = await stream_web_docs_to_vector_db(
+                    request, docs, collection_name, user=user
                 )
-            except Exception as e:
-                log.debug(f"error saving docs: {e}")
+                loaded_count = len(urls)
 
             return {
                 "status": True,
                 "collection_names": [collection_name],
                 "filenames": urls,
-                "loaded_count": len(docs),
+                "loaded_count": loaded_count,
             }
     except Exception as e:
         log.exception(e)
@@ -2041,13 +2330,9 @@ def query_doc_handler(
 ):
     try:
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
-            collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
-            )
+            ensure_bm25_index(form_data.collection_name)
             return query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
-                collection_result=collection_results[form_data.collection_name],
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                     query, prefix=prefix, user=user
@@ -2319,3 +2604,37 @@ def process_files_batch(
                 )
 
     return BatchProcessFilesResponse(results=results, errors=errors)
+
+
+####################################
+#
+# Ingestion jobs
+#
+####################################
+
+
+@router.get("/jobs", response_model=list[IngestionJobModel])
+def get_ingestion_jobs(
+    job_status: Optional[str] = Query(None, alias="status"),
+    skip: int = 0,
+    limit: int = 50,
+    user=Depends(get_verified_user),
+):
+    # Admins see the jobs of every user
+    return IngestionJobs.get_jobs(
+        user_id=None if user.role == "admin" else user.id,
+        status=job_status,
+        skip=skip,
+        limit=min(limit, 500),
+    )
+
+
+@router.get("/jobs/{id}", response_model=IngestionJobModel)
+def get_ingestion_job_by_id(id: str, user=Depends(get_verified_user)):
+    job = IngestionJobs.get_job_by_id(id)
+    if job is None or (job.user_id != user.id and user.role != "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return job
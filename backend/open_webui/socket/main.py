@@ -19,17 +19,28 @@ from open_webui.utils.redis import (
 )
 
 from open_webui.env import (
+    CHAT_EVENT_BATCH_INTERVAL,
+    ENABLE_CHAT_EVENT_BATCHING,
     ENABLE_WEBSOCKET_SUPPORT,
     WEBSOCKET_MANAGER,
     WEBSOCKET_REDIS_URL,
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
+    YDOC_COMPACT_UPDATE_BYTES,
+    YDOC_COMPACT_UPDATE_COUNT,
+    YDOC_RECONCILE_INTERVAL,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
+from open_webui.socket.utils import (
+    AsyncRedisDict,
+    ChatEventBatcher,
+    RedisLock,
+    YdocManager,
+)
 from open_webui.tasks import create_task, stop_item_tasks
 from open_webui.utils.redis import get_redis_connection
+from open_webui.utils.write_buffer import CHAT_MESSAGE_WRITE_BUFFER
 from open_webui.utils.access_control import has_access, get_users_with_access
 
 
@@ -91,17 +102,17 @@ if WEBSOCKET_MANAGER == "redis":
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
+    SESSION_POOL = AsyncRedisDict(
         "open-webui:session_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
-    USER_POOL = RedisDict(
+    USER_POOL = AsyncRedisDict(
         "open-webui:user_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
-    USAGE_POOL = RedisDict(
+    USAGE_POOL = AsyncRedisDict(
         "open-webui:usage_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
@@ -117,16 +128,62 @@ if WEBSOCKET_MANAGER == "redis":
     renew_func = clean_up_lock.renew_lock
     release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+    SESSION_POOL = AsyncRedisDict("open-webui:session_pool")
+    USER_POOL = AsyncRedisDict("open-webui:user_pool")
+    USAGE_POOL = AsyncRedisDict("open-webui:usage_pool")
 
     aquire_func = release_func = renew_func = lambda: True
 
 
 YDOC_MANAGER = YdocManager(
-    redis=REDIS,
+    # Yjs updates are stored as raw bytes
+    redis=(
+        get_redis_connection(
+            redis_url=WEBSOCKET_REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
+            ),
+            async_mode=True,
+            decode_responses=False,
+        )
+        if WEBSOCKET_MANAGER == "redis"
+        else None
+    ),
     redis_key_prefix="open-webui:ydoc:documents",
+    compact_count=YDOC_COMPACT_UPDATE_COUNT,
+    compact_bytes=YDOC_COMPACT_UPDATE_BYTES,
+)
+
+
+async def emit_chat_event(session_ids, chat_id, message_id, event_data):
+    await asyncio.gather(
+        *[
+            sio.emit(
+                "chat-events",
+                {
+                    "chat_id": chat_id,
+                    "message_id": message_id,
+                    "data": event_data,
+                },
+                to=session_id,
+            )
+            for session_id in session_ids
+        ]
+    )
+
+
+async def emit_to_user(user_id, event, data):
+    session_ids = await USER_POOL.get(user_id, [])
+    await asyncio.gather(
+        *[sio.emit(event, data, to=session_id) for session_id in session_ids]
+    )
+
+
+CHAT_EVENT_BATCHER = ChatEventBatcher(
+    emit=emit_chat_event,
+    interval=CHAT_EVENT_BATCH_INTERVAL,
+    redis=REDIS,
+    redis_key_prefix="open-webui:chat-events",
 )
 
 
@@ -151,6 +208,7 @@ async def periodic_usage_pool_cleanup():
                 return
 
     log.debug("Running periodic_cleanup")
+    last_reconciled_at = int(time.time())
     try:
         while True:
             if not renew_func():
@@ -159,7 +217,7 @@ async def periodic_usage_pool_cleanup():
 
             now = int(time.time())
             send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
+            for model_id, connections in await USAGE_POOL.items():
                 # Creating a list of sids to remove if they have timed out
                 expired_sids = [
                     sid
@@ -172,11 +230,21 @@ async def periodic_usage_pool_cleanup():
 
                 if not connections:
                     log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
+                    await USAGE_POOL.delete(model_id)
                 else:
-                    USAGE_POOL[model_id] = connections
+                    await USAGE_POOL.set(model_id, connections)
 
                 send_usage = True
+
+            if now - last_reconciled_at >= YDOC_RECONCILE_INTERVAL:
+                last_reconciled_at = now
+                try:
+                    cleared = await YDOC_MANAGER.reconcile(SESSION_POOL.contains)
+                    if cleared:
+                        log.debug(f"Cleared {cleared} orphaned documents")
+                except Exception as e:
+                    log.error(f"Error reconciling documents: {e}")
+
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
         release_func()
@@ -188,24 +256,24 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
+    models_in_use = await USAGE_POOL.keys()
     return models_in_use
 
 
-def get_active_user_ids():
+async def get_active_user_ids():
     """Get the list of active user IDs."""
-    return list(USER_POOL.keys())
+    return await USER_POOL.keys()
 
 
-def get_user_active_status(user_id):
+async def get_user_active_status(user_id):
     """Check if a user is currently active."""
-    return user_id in USER_POOL
+    return await USER_POOL.contains(user_id)
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
@@ -220,33 +288,43 @@ def get_session_ids_from_room(room):
     return [session_id[0] for session_id in active_session_ids]
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = get_session_ids_from_room(room)
 
-    active_user_ids = list(
-        set([SESSION_POOL.get(session_id)["id"] for session_id in active_session_ids])
-    )
+    sessions = await SESSION_POOL.get_many(active_session_ids)
+    active_user_ids = list(set([user["id"] for user in sessions.values()]))
     return active_user_ids
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
+async def get_active_status_by_user_id(user_id):
+    if await USER_POOL.contains(user_id):
         return True
     return False
 
 
+async def add_session_to_pools(sid, user):
+    await SESSION_POOL.set(sid, user.model_dump())
+
+    session_ids = await USER_POOL.get(user.id, [], cached=False)
+    if sid not in session_ids:
+        await USER_POOL.set(user.id, session_ids + [sid])
+
+
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
+    if await SESSION_POOL.contains(sid):
         model_id = data["model"]
         # Record the timestamp for the last update
         current_time = int(time.time())
 
         # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+        await USAGE_POOL.set(
+            model_id,
+            {
+                **(await USAGE_POOL.get(model_id, {}, cached=False)),
+                sid: {"updated_at": current_time},
+            },
+        )
 
 
 @sio.event
@@ -259,11 +337,7 @@ async def connect(sid, environ, auth):
             user = Users.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await add_session_to_pools(sid, user)
 
 
 @sio.on("user-join")
@@ -281,11 +355,7 @@ async def user_join(sid, data):
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await add_session_to_pools(sid, user)
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -369,7 +439,7 @@ async def channel_events(sid, data):
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**(await SESSION_POOL.get(sid))).model_dump(),
             },
             room=room,
         )
@@ -378,7 +448,7 @@ async def channel_events(sid, data):
 @sio.on("ydoc:document:join")
 async def ydoc_document_join(sid, data):
     """Handle user joining a document"""
-    user = SESSION_POOL.get(sid)
+    user = await SESSION_POOL.get(sid)
 
     try:
         document_id = data["document_id"]
@@ -415,22 +485,26 @@ async def ydoc_document_join(sid, data):
         active_session_ids = get_session_ids_from_room(f"doc_{document_id}")
 
         # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
+        state_update = await YDOC_MANAGER.get_state(document_id)
 
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
-        await sio.emit(
-            "ydoc:document:state",
-            {
-                "document_id": document_id,
-                "state": list(state_update),  # Convert bytes to list for JSON
-                "sessions": active_session_ids,
-            },
-            room=sid,
-        )
+        state = {
+            "document_id": document_id,
+            "state": list(state_update),  # Convert bytes to list for JSON
+            "sessions": active_session_ids,
+        }
+
+        # A client rejoining with its state vector only gets what it is missing,
+        # and the server state vector to send back what the server is missing
+        state_vector = data.get("state_vector")
+        if state_vector:
+            try:
+                state["state"] = list(Y.get_update(state_update, bytes(state_vector)))
+                state["state_vector"] = list(Y.get_state(state_update))
+                state["diff"] = True
+            except Exception as e:
+                log.debug(f"Invalid state vector for document {document_id}: {e}")
+
+        await sio.emit("ydoc:document:state", state, room=sid)
 
         # Notify other users about the new user
         await sio.emit(
@@ -491,13 +565,7 @@ async def yjs_document_state(sid, data):
             return
 
         # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        state_update = await YDOC_MANAGER.get_state(document_id)
 
         await sio.emit(
             "ydoc:document:state",
@@ -529,7 +597,7 @@ async def yjs_document_update(sid, data):
 
         await YDOC_MANAGER.append_to_updates(
             document_id=document_id,
-            update=update,  # Convert list of bytes to bytes
+            update=bytes(update),  # Convert list of bytes to bytes
         )
 
         # Broadcast update to all other users in the document
@@ -548,7 +616,7 @@ async def yjs_document_update(sid, data):
         async def debounced_save():
             await asyncio.sleep(0.5)
             await document_save_handler(
-                document_id, data.get("data", {}), SESSION_POOL.get(sid)
+                document_id, data.get("data", {}), await SESSION_POOL.get(sid)
             )
 
         if data.get("data"):
@@ -581,7 +649,7 @@ async def yjs_document_leave(sid, data):
         )
 
         if (
-            YDOC_MANAGER.document_exists(document_id)
+            await YDOC_MANAGER.document_exists(document_id)
             and len(await YDOC_MANAGER.get_users(document_id)) == 0
         ):
             log.info(f"Cleaning up document {document_id} as no users are left")
@@ -611,17 +679,36 @@ async def yjs_awareness_update(sid, data):
         log.error(f"Error in yjs_awareness_update: {e}")
 
 
+@sio.on("chat:resync")
+async def chat_resync(sid, data):
+    if not await SESSION_POOL.contains(sid):
+        return
+
+    chat_id = data.get("chat_id")
+    message_id = data.get("message_id")
+    if chat_id and message_id:
+        # The next batch of the message carries the full content
+        await CHAT_EVENT_BATCHER.request_resync(chat_id, message_id)
+
+
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
+    # SESSION_POOL is the reverse index from session to user
+    user = await SESSION_POOL.get(sid, cached=False)
+    if user:
+        await SESSION_POOL.delete(sid)
 
         user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
+        session_ids = [
+            _sid
+            for _sid in await USER_POOL.get(user_id, [], cached=False)
+            if _sid != sid
+        ]
 
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+        if session_ids:
+            await USER_POOL.set(user_id, session_ids)
+        else:
+            await USER_POOL.delete(user_id)
 
         await YDOC_MANAGER.remove_user_from_all_documents(sid)
     else:
@@ -635,7 +722,7 @@ def get_event_emitter(request_info, update_db=True):
 
         session_ids = list(
             set(
-                USER_POOL.get(user_id, [])
+                (await USER_POOL.get(user_id, []))
                 + (
                     [request_info.get("session_id")]
                     if request_info.get("session_id")
@@ -644,51 +731,41 @@ def get_event_emitter(request_info, update_db=True):
             )
         )
 
-        emit_tasks = [
-            sio.emit(
-                "chat-events",
-                {
-                    "chat_id": request_info.get("chat_id", None),
-                    "message_id": request_info.get("message_id", None),
-                    "data": event_data,
-                },
-                to=session_id,
+        if ENABLE_CHAT_EVENT_BATCHING and request_info.get("message_id"):
+            await CHAT_EVENT_BATCHER.add(
+                request_info.get("chat_id", None),
+                request_info["message_id"],
+                session_ids,
+                event_data,
+            )
+        else:
+            await emit_chat_event(
+                session_ids,
+                request_info.get("chat_id", None),
+                request_info.get("message_id", None),
+                event_data,
             )
-            for session_id in session_ids
-        ]
-
-        await asyncio.gather(*emit_tasks)
 
         if update_db:
+            # Buffered, so streamed events don't each read and rewrite the message
             if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
+                CHAT_MESSAGE_WRITE_BUFFER.add_status(
                     request_info["chat_id"],
                     request_info["message_id"],
                     event_data.get("data", {}),
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                CHAT_MESSAGE_WRITE_BUFFER.append(
                     request_info["chat_id"],
                     request_info["message_id"],
+                    event_data.get("data", {}).get("content", ""),
                 )
 
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
-
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                CHAT_MESSAGE_WRITE_BUFFER.write(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -701,6 +778,12 @@ def get_event_emitter(request_info, update_db=True):
 
 def get_event_call(request_info):
     async def __event_caller__(event_data):
+        if ENABLE_CHAT_EVENT_BATCHING:
+            # Deliver the batched events before the call
+            await CHAT_EVENT_BATCHER.flush(
+                request_info.get("chat_id", None), request_info.get("message_id", None)
+            )
+
         response = await sio.call(
             "chat-events",
             {
@@ -1,9 +1,17 @@
+import asyncio
 import json
+import logging
+import time
 import uuid
 from open_webui.utils.redis import get_redis_connection
-from typing import Optional, List, Tuple
+from typing import Awaitable, Callable, Optional, List, Tuple
 import pycrdt as Y
 
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
 
 class RedisLock:
     def __init__(self, redis_url, lock_name, timeout_secs, redis_sentinels=[]):
@@ -93,43 +101,311 @@ class RedisDict:
         return self[key]
 
 
+_MISSING = object()
+
+
+class AsyncRedisDict:
+    """
+    Dict stored in a Redis hash, accessed without blocking the event loop.
+
+    Reads are served from a local cache for `cache_ttl` seconds. Writes go
+    through to Redis and are published on `<name>:invalidate`, so other
+    instances drop their cached copy right away rather than after the TTL.
+    Without a Redis URL the dict lives in memory.
+    """
+
+    def __init__(self, name, redis_url=None, redis_sentinels=[], cache_ttl=1.0):
+        self.name = name
+        self.cache_ttl = cache_ttl
+
+        self._redis_url = redis_url
+        self._redis_sentinels = redis_sentinels
+        self._redis = (
+            get_redis_connection(
+                redis_url, redis_sentinels, async_mode=True, decode_responses=True
+            )
+            if redis_url
+            else None
+        )
+        self._sync_redis = None
+
+        self._data = {}
+        self._cache = {}
+        self._instance_id = str(uuid.uuid4())
+        self._channel = f"{name}:invalidate"
+        self._listener: Optional[asyncio.Task] = None
+
+    def _get_cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry
+
+    def _set_cached(self, key, value):
+        self._cache[key] = (value, time.monotonic() + self.cache_ttl)
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._cache.clear()
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        pubsub = self._redis.pubsub()
+        try:
+            await pubsub.subscribe(self._channel)
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+
+                instance_id, _, key = message["data"].partition(":")
+                if instance_id != self._instance_id:
+                    self._cache.pop(key, None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"Lost invalidations for {self.name}: {e}")
+            self._cache.clear()
+        finally:
+            await pubsub.reset()
+
+    def _invalidate(self, pipe, keys):
+        for key in keys:
+            pipe.publish(self._channel, f"{self._instance_id}:{key}")
+
+    async def get(self, key, default=None, cached=True):
+        return (await self.get_many([key], cached=cached)).get(key, default)
+
+    async def get_many(self, keys, cached=True) -> dict:
+        """
+        Values of the given keys that exist. Keys missing from the local cache
+        are fetched in one round trip, `cached=False` skips the cache.
+        """
+        if not self._redis:
+            return {key: self._data[key] for key in keys if key in self._data}
+
+        self._ensure_listener()
+
+        values = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            entry = self._get_cached(key) if cached else None
+            if entry is None:
+                missing.append(key)
+            elif entry[0] is not _MISSING:
+                values[key] = entry[0]
+
+        if missing:
+            for key, value in zip(missing, await self._redis.hmget(self.name, missing)):
+                value = _MISSING if value is None else json.loads(value)
+                self._set_cached(key, value)
+                if value is not _MISSING:
+                    values[key] = value
+
+        return values
+
+    async def contains(self, key) -> bool:
+        return key in await self.get_many([key])
+
+    async def set(self, key, value):
+        await self.set_many({key: value})
+
+    async def set_many(self, mapping: dict):
+        if not mapping:
+            return
+        if not self._redis:
+            self._data.update(mapping)
+            return
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hset(
+                self.name,
+                mapping={key: json.dumps(value) for key, value in mapping.items()},
+            )
+            self._invalidate(pipe, mapping.keys())
+            await pipe.execute()
+
+        for key, value in mapping.items():
+            self._set_cached(key, value)
+
+    async def delete(self, *keys):
+        if not self._redis:
+            for key in keys:
+                self._data.pop(key, None)
+            return
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hdel(self.name, *keys)
+            self._invalidate(pipe, keys)
+            await pipe.execute()
+
+        for key in keys:
+            self._set_cached(key, _MISSING)
+
+    async def keys(self) -> list:
+        if not self._redis:
+            return list(self._data.keys())
+        return await self._redis.hkeys(self.name)
+
+    async def items(self) -> list:
+        if not self._redis:
+            return list(self._data.items())
+
+        items = [
+            (key, json.loads(value))
+            for key, value in (await self._redis.hgetall(self.name)).items()
+        ]
+        for key, value in items:
+            self._set_cached(key, value)
+        return items
+
+    def sync_keys(self) -> list:
+        """Blocking `keys`, for callers outside the event loop."""
+        if not self._redis_url:
+            return list(self._data.keys())
+
+        if self._sync_redis is None:
+            self._sync_redis = get_redis_connection(
+                self._redis_url, self._redis_sentinels, decode_responses=True
+            )
+        return self._sync_redis.hkeys(self.name)
+
+
+def get_state_update(updates: List[bytes]) -> bytes:
+    """Merge Yjs updates into a single update holding the whole state."""
+    if not updates:
+        return Y.Doc().get_update()
+    return Y.merge_updates(*updates)
+
+
 class YdocManager:
+    """
+    Log of the Yjs updates of every open document.
+
+    Updates are stored as raw bytes. Once a document's log holds more than
+    `compact_count` updates, or more than `compact_bytes` bytes were appended
+    since it was last compacted, it is merged into a single state update.
+    With Redis, the client must be created with `decode_responses=False`.
+
+    The documents each session joined are indexed per session, so that a
+    disconnect only touches the documents of that session.
+    """
+
     def __init__(
         self,
         redis=None,
         redis_key_prefix: str = "open-webui:ydoc:documents",
+        redis_user_key_prefix: str = "open-webui:ydoc:users",
+        compact_count: int = 100,
+        compact_bytes: int = 1024 * 1024,
     ):
         self._updates = {}
+        self._sizes = {}
         self._users = {}
+        self._user_documents = {}
         self._redis = redis
         self._redis_key_prefix = redis_key_prefix
+        self._redis_user_key_prefix = redis_user_key_prefix
+        self._compact_count = compact_count
+        self._compact_bytes = compact_bytes
+
+    def _get_redis_key(self, document_id: str, name: str) -> str:
+        return f"{self._redis_key_prefix}:{document_id}:{name}"
+
+    def _get_user_redis_key(self, user_id: str) -> str:
+        return f"{self._redis_user_key_prefix}:{user_id}:documents"
 
     async def append_to_updates(self, document_id: str, update: bytes):
         document_id = document_id.replace(":", "_")
+        update = bytes(update)
+
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.rpush(redis_key, json.dumps(list(update)))
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.rpush(self._get_redis_key(document_id, "log"), update)
+                pipe.incrby(self._get_redis_key(document_id, "size"), len(update))
+                count, size = await pipe.execute()
         else:
             if document_id not in self._updates:
                 self._updates[document_id] = []
             self._updates[document_id].append(update)
+            self._sizes[document_id] = self._sizes.get(document_id, 0) + len(update)
+
+            count = len(self._updates[document_id])
+            size = self._sizes[document_id]
+
+        if count > self._compact_count or (count > 1 and size > self._compact_bytes):
+            await self.compact(document_id)
+
+    async def compact(self, document_id: str):
+        """Replace the update log of a document by a single state update."""
+        document_id = document_id.replace(":", "_")
+
+        if self._redis:
+            lock_key = self._get_redis_key(document_id, "compacting")
+            if not await self._redis.set(lock_key, 1, nx=True, ex=30):
+                return
+
+            try:
+                log_key = self._get_redis_key(document_id, "log")
+                snapshot_key = self._get_redis_key(document_id, "snapshot")
+
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.lrange(log_key, 0, -1)
+                    pipe.get(snapshot_key)
+                    updates, snapshot_size = await pipe.execute()
+                if len(updates) < 2:
+                    return
+
+                state = get_state_update(updates)
+
+                # Updates appended in the meantime stay after the snapshot, the
+                # previous snapshot was never counted in the appended bytes
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.ltrim(log_key, len(updates), -1)
+                    pipe.lpush(log_key, state)
+                    pipe.set(snapshot_key, len(state))
+                    pipe.decrby(
+                        self._get_redis_key(document_id, "size"),
+                        sum(len(update) for update in updates)
+                        - int(snapshot_size or 0),
+                    )
+                    await pipe.execute()
+            finally:
+                await self._redis.delete(lock_key)
+        else:
+            updates = self._updates.get(document_id, [])
+            if len(updates) > 1:
+                self._updates[document_id] = [get_state_update(updates)]
+                self._sizes[document_id] = 0
 
     async def get_updates(self, document_id: str) -> List[bytes]:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            updates = await self._redis.lrange(redis_key, 0, -1)
-            return [bytes(json.loads(update)) for update in updates]
+            # Updates stored as JSON lists of ints before the binary log
+            legacy_updates = await self._redis.lrange(
+                self._get_redis_key(document_id, "updates"), 0, -1
+            )
+            updates = await self._redis.lrange(
+                self._get_redis_key(document_id, "log"), 0, -1
+            )
+            return [bytes(json.loads(update)) for update in legacy_updates] + updates
         else:
             return self._updates.get(document_id, [])
 
+    async def get_state(self, document_id: str) -> bytes:
+        return get_state_update(await self.get_updates(document_id))
+
     async def document_exists(self, document_id: str) -> bool:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            return await self._redis.exists(redis_key) > 0
+            return (
+                await self._redis.exists(
+                    self._get_redis_key(document_id, "log"),
+                    self._get_redis_key(document_id, "updates"),
+                )
+                > 0
+            )
         else:
             return document_id in self._updates
 
@@ -139,7 +415,7 @@ class YdocManager:
         if self._redis:
             redis_key = f"{self._redis_key_prefix}:{document_id}:users"
             users = await self._redis.smembers(redis_key)
-            return list(users)
+            return [user.decode() for user in users]
         else:
             return self._users.get(document_id, [])
 
@@ -147,53 +423,308 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.sadd(redis_key, user_id)
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.sadd(self._get_redis_key(document_id, "users"), user_id)
+                pipe.sadd(self._get_user_redis_key(user_id), document_id)
+                await pipe.execute()
         else:
             if document_id not in self._users:
                 self._users[document_id] = set()
             self._users[document_id].add(user_id)
 
+            if user_id not in self._user_documents:
+                self._user_documents[user_id] = set()
+            self._user_documents[user_id].add(document_id)
+
     async def remove_user(self, document_id: str, user_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.srem(redis_key, user_id)
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.srem(self._get_redis_key(document_id, "users"), user_id)
+                pipe.srem(self._get_user_redis_key(user_id), document_id)
+                await pipe.execute()
         else:
             if document_id in self._users and user_id in self._users[document_id]:
                 self._users[document_id].remove(user_id)
+            if user_id in self._user_documents:
+                self._user_documents[user_id].discard(document_id)
+                if not self._user_documents[user_id]:
+                    del self._user_documents[user_id]
 
     async def remove_user_from_all_documents(self, user_id: str):
         if self._redis:
-            keys = await self._redis.keys(f"{self._redis_key_prefix}:*")
-            for key in keys:
-                if key.endswith(":users"):
-                    await self._redis.srem(key, user_id)
+            user_key = self._get_user_redis_key(user_id)
+            for document_id in await self._redis.smembers(user_key):
+                document_id = document_id.decode()
+                users_key = self._get_redis_key(document_id, "users")
 
-                    document_id = key.split(":")[-2]
-                    if len(await self.get_users(document_id)) == 0:
-                        await self.clear_document(document_id)
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.srem(users_key, user_id)
+                    pipe.scard(users_key)
+                    _, count = await pipe.execute()
+
+                if count == 0:
+                    await self.clear_document(document_id)
+
+            await self._redis.delete(user_key)
 
         else:
-            for document_id in list(self._users.keys()):
-                if user_id in self._users[document_id]:
+            for document_id in self._user_documents.pop(user_id, set()):
+                if user_id in self._users.get(document_id, set()):
                     self._users[document_id].remove(user_id)
                     if not self._users[document_id]:
                         del self._users[document_id]
 
                         await self.clear_document(document_id)
 
+    async def reconcile(self, is_active: Callable[[str], Awaitable[bool]]) -> int:
+        """
+        Removes the sessions for which `is_active` is false from all documents,
+        for disconnects that were never handled (e.g. a worker was killed), and
+        clears the documents left without users. Keys are iterated with SCAN.
+        Returns the number of cleared documents.
+        """
+        cleared = 0
+
+        if self._redis:
+            document_ids = set()
+            async for key in self._redis.scan_iter(
+                match=f"{self._redis_key_prefix}:*", count=1000
+            ):
+                key = key.decode()[len(self._redis_key_prefix) + 1 :]
+                document_ids.add(key.rpartition(":")[0])
+
+            for document_id in document_ids:
+                for user_id in await self.get_users(document_id):
+                    if not await is_active(user_id):
+                        await self.remove_user(document_id, user_id)
+
+                if not await self.get_users(document_id):
+                    await self.clear_document(document_id)
+                    cleared += 1
+
+            async for key in self._redis.scan_iter(
+                match=f"{self._redis_user_key_prefix}:*", count=1000
+            ):
+                key = key.decode()[len(self._redis_user_key_prefix) + 1 :]
+                user_id = key.rpartition(":")[0]
+                if not await is_active(user_id):
+                    await self.remove_user_from_all_documents(user_id)
+        else:
+            for document_id in set(self._updates) | set(self._users):
+                for user_id in list(self._users.get(document_id, [])):
+                    if not await is_active(user_id):
+                        await self.remove_user(document_id, user_id)
+
+                if not self._users.get(document_id):
+                    await self.clear_document(document_id)
+                    cleared += 1
+
+        return cleared
+
     async def clear_document(self, document_id: str):
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.delete(redis_key)
-            redis_users_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.delete(redis_users_key)
+            await self._redis.delete(
+                self._get_redis_key(document_id, "log"),
+                self._get_redis_key(document_id, "size"),
+                self._get_redis_key(document_id, "snapshot"),
+                self._get_redis_key(document_id, "updates"),
+                self._get_redis_key(document_id, "users"),
+            )
         else:
             if document_id in self._updates:
                 del self._updates[document_id]
+            if document_id in self._sizes:
+                del self._sizes[document_id]
             if document_id in self._users:
                 del self._users[document_id]
+
+
+def get_common_prefix_length(a: str, b: str) -> int:
+    if b.startswith(a):
+        return len(a)
+
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def get_utf16_length(value: str) -> int:
+    # Offsets are applied by the browser, which indexes strings in UTF-16 units
+    return len(value.encode("utf-16-le")) // 2
+
+
+class ChatEventStream:
+    def __init__(self):
+        self.session_ids = []
+        self.events = []
+        self.seq = 0
+        # Last full content sent to the clients
+        self.content = None
+        self.flush_task: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+        self.updated_at = time.monotonic()
+
+
+class ChatEventBatcher:
+    """
+    Batches the `chat-events` of streamed messages.
+
+    Events of a message are collected for `interval` seconds and sent as a
+    single `chat:events` frame. Content updates superseded within the window
+    are dropped, and the remaining ones are sent as deltas against the
+    previously sent content (`content_offset`, `content_delta`) with a
+    sequence number `seq`. A client that detects a gap asks for a resync, and
+    the next frame then carries the full content again.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[List[str], str, str, dict], Awaitable[None]],
+        interval: float,
+        redis=None,
+        redis_key_prefix: str = "open-webui:chat-events",
+        stream_timeout: int = 600,
+    ):
+        self._emit = emit
+        self._interval = interval
+        self._streams: dict[Tuple[str, str], ChatEventStream] = {}
+        self._resync_requests = set()
+        self._redis = redis
+        self._redis_key_prefix = redis_key_prefix
+        self._stream_timeout = stream_timeout
+
+    async def request_resync(self, chat_id: str, message_id: str):
+        if self._redis:
+            redis_key = f"{self._redis_key_prefix}:resync"
+            await self._redis.sadd(redis_key, f"{chat_id}:{message_id}")
+        else:
+            self._resync_requests.add((chat_id, message_id))
+
+    async def pop_resync_request(self, chat_id: str, message_id: str) -> bool:
+        if self._redis:
+            redis_key = f"{self._redis_key_prefix}:resync"
+            return await self._redis.srem(redis_key, f"{chat_id}:{message_id}") > 0
+        else:
+            if (chat_id, message_id) in self._resync_requests:
+                self._resync_requests.remove((chat_id, message_id))
+                return True
+            return False
+
+    def _remove_stale_streams(self):
+        now = time.monotonic()
+        for key, stream in list(self._streams.items()):
+            if not stream.events and now - stream.updated_at > self._stream_timeout:
+                del self._streams[key]
+
+    async def add(
+        self, chat_id: str, message_id: str, session_ids: List[str], event_data: dict
+    ):
+        key = (chat_id, message_id)
+        stream = self._streams.get(key)
+        if stream is None:
+            self._remove_stale_streams()
+            stream = self._streams[key] = ChatEventStream()
+
+        stream.session_ids = session_ids
+        stream.updated_at = time.monotonic()
+
+        data = event_data.get("data")
+        if (
+            event_data.get("type") == "chat:completion"
+            and isinstance(data, dict)
+            and isinstance(data.get("content"), str)
+        ):
+            # Only the latest content matters, drop pending content-only updates
+            stream.events = [
+                event
+                for event in stream.events
+                if not (
+                    event.get("type") == "chat:completion"
+                    and isinstance(event.get("data"), dict)
+                    and event["data"].keys() == {"content"}
+                )
+            ]
+
+        stream.events.append(event_data)
+
+        if isinstance(data, dict) and data.get("done"):
+            await self.flush(chat_id, message_id)
+            self._streams.pop(key, None)
+        elif stream.flush_task is None:
+            stream.flush_task = asyncio.create_task(
+                self._flush_later(chat_id, message_id)
+            )
+
+    async def _flush_later(self, chat_id: str, message_id: str):
+        await asyncio.sleep(self._interval)
+        stream = self._streams.get((chat_id, message_id))
+        if stream is not None:
+            stream.flush_task = None
+            await self.flush(chat_id, message_id)
+
+    def _get_content_frame(self, stream: ChatEventStream, data: dict, keyframe: bool):
+        content = data["content"]
+        frame = {k: v for k, v in data.items() if k != "content"}
+        frame["seq"] = stream.seq
+
+        if keyframe or stream.content is None or data.get("done"):
+            frame["content"] = content
+        else:
+            offset = get_common_prefix_length(stream.content, content)
+            frame["content_offset"] = get_utf16_length(content[:offset])
+            frame["content_delta"] = content[offset:]
+
+        stream.seq += 1
+        stream.content = content
+        return frame
+
+    async def flush(self, chat_id: str, message_id: str):
+        stream = self._streams.get((chat_id, message_id))
+        if stream is None:
+            return
+
+        async with stream.lock:
+            if stream.flush_task is not None:
+                stream.flush_task.cancel()
+                stream.flush_task = None
+
+            events, stream.events = stream.events, []
+            if not events:
+                return
+
+            keyframe = await self.pop_resync_request(chat_id, message_id)
+
+            frames = []
+            for event in events:
+                data = event.get("data")
+                if (
+                    event.get("type") == "chat:completion"
+                    and isinstance(data, dict)
+                    and isinstance(data.get("content"), str)
+                ):
+                    event = {
+                        **event,
+                        "data": self._get_content_frame(stream, data, keyframe),
+                    }
+                    keyframe = False
+                frames.append(event)
+
+            await self._emit(
+                stream.session_ids,
+                chat_id,
+                message_id,
+                (
+                    frames[0]
+                    if len(frames) == 1
+                    else {"type": "chat:events", "data": {"events": frames}}
+                ),
+            )
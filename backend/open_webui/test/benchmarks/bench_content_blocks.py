@@ -0,0 +1,141 @@
+"""
+Micro-benchmark for serializing streamed content blocks.
+
+Replays an SSE chat completion stream (a recorded `data: {...}` stream file,
+or a generated one of `--tokens` tokens) through the content block handling
+of the streaming response handler, and reports the CPU time spent per chunk
+serializing the response with the full and the incremental serializer.
+
+    python open_webui/test/benchmarks/bench_content_blocks.py --tokens 20000
+    python open_webui/test/benchmarks/bench_content_blocks.py --stream recorded.sse
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from open_webui.utils.content_blocks import (
+    ContentBlocksSerializer,
+    serialize_content_blocks,
+)
+
+WORDS = ["the", "model", "streams", "tokens", "and", "reasons", "about", "code"]
+
+
+def generate_stream(tokens: int, seed: int = 0) -> list[str]:
+    """
+    Generates a reasoning model response: a reasoning phase followed by the
+    answer, each chunk carrying one token.
+    """
+    rng = random.Random(seed)
+
+    lines = []
+    for idx in range(tokens):
+        token = rng.choice(WORDS) + (" " if idx % 12 else "\n")
+        key = "reasoning_content" if idx < tokens // 2 else "content"
+        lines.append(
+            "data: " + json.dumps({"choices": [{"index": 0, "delta": {key: token}}]})
+        )
+    lines.append("data: [DONE]")
+    return lines
+
+
+def load_stream(path: str) -> list[str]:
+    with open(path) as f:
+        return [line for line in f.read().splitlines() if line.startswith("data:")]
+
+
+def get_tool_call_blocks(count: int) -> list[dict]:
+    """Previous tool rounds of the same response, with large results."""
+    return [
+        {
+            "type": "tool_calls",
+            "content": [
+                {
+                    "id": f"call_{idx}",
+                    "function": {"name": "search", "arguments": '{"query": "q"}'},
+                }
+            ],
+            "results": [
+                {
+                    "tool_call_id": f"call_{idx}",
+                    "content": json.dumps([{"text": "<p>result</p>" * 200}]),
+                }
+            ],
+        }
+        for idx in range(count)
+    ] + [{"type": "text", "content": ""}]
+
+
+def replay(lines: list[str], serialize, tool_rounds: int) -> list[float]:
+    content_blocks = get_tool_call_blocks(tool_rounds)
+    timings = []
+
+    for line in lines:
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            break
+
+        delta = json.loads(data)["choices"][0]["delta"]
+
+        reasoning_content = delta.get("reasoning_content")
+        if reasoning_content:
+            if content_blocks[-1]["type"] != "reasoning":
+                content_blocks.append(
+                    {
+                        "type": "reasoning",
+                        "start_tag": "think",
+                        "end_tag": "/think",
+                        "attributes": {"type": "reasoning_content"},
+                        "content": "",
+                        "started_at": time.time(),
+                    }
+                )
+            content_blocks[-1]["content"] += reasoning_content
+
+        value = delta.get("content")
+        if value:
+            if content_blocks[-1]["type"] == "reasoning":
+                content_blocks[-1]["duration"] = 1
+                content_blocks.append({"type": "text", "content": ""})
+            content_blocks[-1]["content"] += value
+
+        start = time.process_time()
+        serialize(content_blocks)
+        timings.append(time.process_time() - start)
+
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    timings_us = sorted(timing * 1_000_000 for timing in timings)
+    print(
+        f"{name:<12} chunks={len(timings_us)} "
+        f"total={sum(timings_us) / 1_000_000:.3f}s "
+        f"mean={statistics.fmean(timings_us):.1f}us "
+        f"p50={timings_us[len(timings_us) // 2]:.1f}us "
+        f"p99={timings_us[int(len(timings_us) * 0.99)]:.1f}us "
+        f"last={timings[-1] * 1_000_000:.1f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--stream", help="recorded SSE stream to replay")
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--tool-rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = load_stream(args.stream) if args.stream else generate_stream(args.tokens)
+
+    report("full", replay(lines, serialize_content_blocks, args.tool_rounds))
+    report(
+        "incremental",
+        replay(lines, ContentBlocksSerializer().serialize, args.tool_rounds),
+    )
+
+
+if __name__ == "__main__":
+    main()
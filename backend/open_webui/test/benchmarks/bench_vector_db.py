@@ -0,0 +1,169 @@
+"""
+Benchmark of the local vector database against Chroma.
+
+Inserts `--vectors` clustered random vectors into a collection of each
+backend, then reports the insert throughput, the search latency and the
+recall of the 10 nearest neighbours against an exhaustive search.
+
+    python open_webui/test/benchmarks/bench_vector_db.py --vectors 1000000
+    python open_webui/test/benchmarks/bench_vector_db.py --backends local \\
+        --dtype float16 --probe-ratio 0.3
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from open_webui.retrieval.vector.dbs.local import LocalVectorClient, normalize
+
+K = 10
+
+
+def generate_vectors(count: int, dimension: int, seed: int = 0) -> np.ndarray:
+    """Vectors around 1000 centers, closer to embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((1000, dimension), dtype=np.float32)
+
+    # In chunks, to stay within memory for millions of vectors
+    vectors = np.empty((count, dimension), dtype=np.float32)
+    for start in range(0, count, 100000):
+        chunk = centers[rng.integers(0, len(centers), min(100000, count - start))]
+        chunk += 0.5 * rng.standard_normal(chunk.shape, dtype=np.float32)
+        vectors[start : start + len(chunk)] = normalize(chunk)
+    return vectors
+
+
+def get_nearest(vectors: np.ndarray, queries: np.ndarray) -> list[set[str]]:
+    """Ids of the exact nearest neighbours of the queries."""
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    for offset in range(0, len(vectors), 100000):
+        chunk = queries @ vectors[offset : offset + 100000].T
+        ids = np.arange(offset, offset + chunk.shape[1])
+        ids = np.broadcast_to(ids, chunk.shape)
+
+        scores = np.concatenate([best_scores, chunk], axis=1)
+        ids = np.concatenate([best_ids, ids], axis=1)
+        best = np.argpartition(-scores, K - 1, axis=1)[:, :K]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        best_ids = np.take_along_axis(ids, best, axis=1)
+
+    return [set(str(id) for id in row) for row in best_ids]
+
+
+def get_items(vectors: np.ndarray, offset: int) -> list[dict]:
+    return [
+        {
+            "id": str(offset + idx),
+            "text": f"chunk {offset + idx}",
+            "vector": vector.tolist(),
+            "metadata": {"file_id": str((offset + idx) // 100)},
+        }
+        for idx, vector in enumerate(vectors)
+    ]
+
+
+class ChromaBackend:
+    def __init__(self, path: str):
+        import chromadb
+        from chromadb import Settings
+
+        client = chromadb.PersistentClient(
+            path=path, settings=Settings(anonymized_telemetry=False)
+        )
+        self.collection = client.get_or_create_collection(
+            name="bench", metadata={"hnsw:space": "cosine"}
+        )
+
+    def upsert(self, items: list[dict]):
+        self.collection.upsert(
+            ids=[item["id"] for item in items],
+            documents=[item["text"] for item in items],
+            embeddings=[item["vector"] for item in items],
+            metadatas=[item["metadata"] for item in items],
+        )
+
+    def search(self, vector: np.ndarray) -> list[str]:
+        return self.collection.query(query_embeddings=[vector.tolist()], n_results=K)[
+            "ids"
+        ][0]
+
+    def wait(self):
+        pass
+
+
+class LocalBackend:
+    def __init__(self, path: str, dtype: str, probe_ratio: float):
+        self.client = LocalVectorClient(path=path, dtype=dtype, probe_ratio=probe_ratio)
+
+    def upsert(self, items: list[dict]):
+        self.client.upsert("bench", items)
+
+    def search(self, vector: np.ndarray) -> list[str]:
+        return self.client.search("bench", [vector.tolist()], limit=K).ids[0]
+
+    def wait(self):
+        """Waits for the background compaction training the IVF index."""
+        collection = self.client._get_collection("bench")
+        while collection.compacting:
+            time.sleep(0.1)
+
+
+def run(name: str, backend, vectors: np.ndarray, queries: np.ndarray, truth):
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), 5000):
+        backend.upsert(get_items(vectors[offset : offset + 5000], offset))
+    insert_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backend.wait()
+    index_time = time.perf_counter() - start
+
+    timings, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        ids = backend.search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(ids) & expected) / K)
+
+    timings.sort()
+    print(
+        f"{name:<8} insert={len(vectors) / insert_time:8.0f} vectors/s "
+        f"index={index_time:6.1f}s "
+        f"p50={timings[len(timings) // 2]:7.2f}ms "
+        f"p99={timings[int(len(timings) * 0.99)]:7.2f}ms "
+        f"recall@{K}={statistics.fmean(recalls):.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backends", default="local,chroma")
+    parser.add_argument("--dtype", default="float32")
+    parser.add_argument("--probe-ratio", type=float, default=0.15)
+    args = parser.parse_args()
+
+    vectors = generate_vectors(args.vectors, args.dimension)
+    queries = generate_vectors(args.queries, args.dimension, seed=1)
+
+    truth = get_nearest(vectors, queries)
+
+    for name in args.backends.split(","):
+        with tempfile.TemporaryDirectory() as path:
+            if name == "local":
+                backend = LocalBackend(path, args.dtype, args.probe_ratio)
+            elif name == "chroma":
+                backend = ChromaBackend(path)
+            else:
+                raise ValueError(f"Unknown backend: {name}")
+            run(name, backend, vectors, queries, truth)
+
+
+if __name__ == "__main__":
+    main()
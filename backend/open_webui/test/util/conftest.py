@@ -0,0 +1,42 @@
+from contextlib import ExitStack
+from typing import Callable, Optional
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import Connection, create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+@pytest.fixture
+def create_db(tmp_path):
+    """
+    Returns a function creating a SQLite database with the tables of `models`
+    and patching it in as the database of `module`. It returns the session
+    maker, which stands for `get_db` as sessions close on exit. `seed` is
+    called with a connection once the tables exist. With `file`, sessions
+    get a connection each, like separate workers.
+    """
+    with ExitStack() as stack:
+
+        def create(
+            models: list,
+            module: str,
+            seed: Optional[Callable[[Connection], None]] = None,
+            file: bool = False,
+        ) -> sessionmaker:
+            engine = create_engine(
+                f"sqlite:///{tmp_path / 'db.sqlite'}" if file else "sqlite://"
+            )
+            with engine.begin() as conn:
+                for model in models:
+                    model.__table__.create(conn)
+                if seed is not None:
+                    seed(conn)
+
+            # As the sessions of the app
+            Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+            stack.enter_context(patch(f"{module}.get_db", Session))
+            stack.callback(engine.dispose)
+            return Session
+
+        yield create
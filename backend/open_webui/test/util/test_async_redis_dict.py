@@ -0,0 +1,39 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from open_webui.socket.utils import AsyncRedisDict
+
+
+class TestAsyncRedisDict:
+    @pytest.mark.asyncio
+    async def test_in_memory(self):
+        pool = AsyncRedisDict("pool")
+
+        await pool.set_many({"a": [1], "b": [2]})
+        await pool.delete("b")
+
+        assert await pool.get("a") == [1]
+        assert await pool.get("b", []) == []
+        assert await pool.contains("a")
+        assert await pool.keys() == ["a"]
+        assert pool.sync_keys() == ["a"]
+
+    @patch("open_webui.socket.utils.get_redis_connection")
+    @pytest.mark.asyncio
+    async def test_caches_reads(self, mock_get_redis_connection):
+        redis = MagicMock()
+        redis.hmget = AsyncMock(return_value=[json.dumps(["sid"]), None])
+        mock_get_redis_connection.return_value = redis
+
+        pool = AsyncRedisDict("pool", redis_url="redis://localhost", cache_ttl=60)
+        pool._ensure_listener = MagicMock()
+
+        assert await pool.get_many(["user", "missing"]) == {"user": ["sid"]}
+        assert await pool.get("user") == ["sid"]
+        assert not await pool.contains("missing")
+        redis.hmget.assert_awaited_once_with("pool", ["user", "missing"])
+
+        await pool.get("user", cached=False)
+        assert redis.hmget.await_count == 2
@@ -0,0 +1,174 @@
+import math
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from open_webui.models.bm25 import (
+    B,
+    BUILD_TIMEOUT,
+    K1,
+    BM25Collection,
+    BM25Document,
+    BM25Index,
+    BM25Posting,
+    tokenize,
+)
+
+DOCUMENTS = [
+    {"id": "a", "text": "The cat sat on the mat", "metadata": {"file_id": "1"}},
+    {"id": "b", "text": "A dog and a cat", "metadata": {"file_id": "1"}},
+    {"id": "c", "text": "Dogs chase cats, the dog barks", "metadata": {"file_id": "2"}},
+    {"id": "d", "text": "Nothing to see here", "metadata": {"file_id": "2"}},
+]
+
+
+def get_result(documents: list[dict]):
+    return SimpleNamespace(
+        ids=[[document["id"] for document in documents]],
+        documents=[[document["text"] for document in documents]],
+        metadatas=[[document["metadata"] for document in documents]],
+    )
+
+
+def get_scores(documents: list[dict], query: str) -> dict[str, float]:
+    """BM25 of the documents computed in Python, as the index should."""
+    tokens = {document["id"]: tokenize(document["text"]) for document in documents}
+    avg_length = sum(len(doc) for doc in tokens.values()) / len(tokens)
+
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(term in doc for doc in tokens.values())
+        if not df:
+            continue
+        idf = math.log(1 + (len(tokens) - df + 0.5) / (df + 0.5))
+        for id, doc in tokens.items():
+            tf = doc.count(term)
+            if tf:
+                scores[id] = scores.get(id, 0.0) + idf * tf * (K1 + 1) / (
+                    tf + K1 * (1 - B + B * len(doc) / avg_length)
+                )
+    return scores
+
+
+@pytest.fixture
+def db(create_db):
+    return create_db(
+        [BM25Collection, BM25Document, BM25Posting], "open_webui.models.bm25"
+    )
+
+
+def get_collection(get_db, name: str):
+    with get_db() as db:
+        return db.get(BM25Collection, name)
+
+
+class TestBM25Index:
+    def test_scores_match_bm25(self, db):
+        assert BM25Index.ensure_collection("kb", lambda: get_result(DOCUMENTS))
+
+        results = BM25Index.search("kb", "cat dog", k=10)
+        expected = get_scores(DOCUMENTS, "cat dog")
+
+        assert [result["id"] for result in results] == sorted(
+            expected, key=expected.get, reverse=True
+        )
+        for result in results:
+            assert result["score"] == pytest.approx(expected[result["id"]])
+        assert results[0]["metadata"] == {"file_id": "1"}
+
+        # The shorter of the two documents with a single "cat"
+        assert [result["id"] for result in BM25Index.search("kb", "cat", k=1)] == ["b"]
+        assert BM25Index.search("kb", "unicorn", k=10) == []
+
+    def test_upsert_and_delete_keep_statistics(self, db):
+        BM25Index.ensure_collection("kb", lambda: get_result(DOCUMENTS))
+
+        documents = [
+            {**DOCUMENTS[0], "text": "A bird on the mat"},
+            *DOCUMENTS[1:],
+            {"id": "e", "text": "cat cat cat", "metadata": {"file_id": "3"}},
+        ]
+        BM25Index.upsert("kb", [documents[0], documents[-1]])
+
+        collection = get_collection(db, "kb")
+        assert collection.doc_count == 5
+        assert collection.total_length == sum(
+            len(tokenize(document["text"])) for document in documents
+        )
+        expected = get_scores(documents, "cat")
+        results = BM25Index.search("kb", "cat", k=10)
+        assert {result["id"]: result["score"] for result in results} == (
+            pytest.approx(expected)
+        )
+
+        BM25Index.delete("kb", filter={"file_id": "1"})
+        BM25Index.delete("kb", ids=["e"])
+
+        documents = [documents[2], documents[3]]
+        collection = get_collection(db, "kb")
+        assert collection.doc_count == 2
+        assert collection.total_length == sum(
+            len(tokenize(document["text"])) for document in documents
+        )
+        assert [result["id"] for result in BM25Index.search("kb", "dog", k=10)] == ["c"]
+        with db() as session:
+            assert {posting.document_id for posting in session.query(BM25Posting)} == {
+                "c",
+                "d",
+            }
+
+    def test_failed_indexing_leaves_no_collection(self, db):
+        with patch.object(BM25Index, "upsert", side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError):
+                BM25Index.ensure_collection("kb", lambda: get_result(DOCUMENTS))
+
+        assert not BM25Index.has_collection("kb")
+        assert BM25Index.ensure_collection("kb", lambda: get_result(DOCUMENTS))
+        assert get_collection(db, "kb").status == "ready"
+        assert BM25Index.search("kb", "cat", k=10)
+
+    def test_collections_being_indexed_are_not_searched(self, db):
+        with db() as session:
+            session.add(
+                BM25Collection(
+                    name="kb",
+                    doc_count=0,
+                    total_length=0,
+                    status="building",
+                    updated_at=int(time.time()),
+                )
+            )
+            session.commit()
+        BM25Index.upsert("kb", DOCUMENTS[:1])
+
+        def load():
+            raise AssertionError("Indexed by another caller")
+
+        assert BM25Index.ensure_collection("kb", load)
+        assert BM25Index.has_collection("kb")
+        assert BM25Index.search("kb", "cat", k=10) == []
+
+    def test_abandoned_indexing_is_taken_over(self, db):
+        with db() as session:
+            session.add(
+                BM25Collection(
+                    name="kb",
+                    doc_count=0,
+                    total_length=0,
+                    status="building",
+                    updated_at=int(time.time()) - BUILD_TIMEOUT - 1,
+                )
+            )
+            session.commit()
+        BM25Index.upsert("kb", [{"id": "x", "text": "stale cat", "metadata": {}}])
+
+        assert BM25Index.ensure_collection("kb", lambda: get_result(DOCUMENTS))
+
+        collection = get_collection(db, "kb")
+        assert collection.status == "ready"
+        assert collection.doc_count == len(DOCUMENTS)
+        assert "x" not in {
+            result["id"] for result in BM25Index.search("kb", "cat", k=10)
+        }
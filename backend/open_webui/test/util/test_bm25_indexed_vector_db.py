@@ -0,0 +1,41 @@
+from unittest.mock import MagicMock, patch
+
+from open_webui.retrieval.vector.bm25 import BM25IndexedVectorDB
+
+
+class TestBM25IndexedVectorDB:
+    @patch("open_webui.retrieval.vector.bm25.BM25Index")
+    def test_mirrors_writes_to_indexed_collections(self, mock_index):
+        mock_index.has_collection.side_effect = lambda name: name == "indexed"
+        client = BM25IndexedVectorDB(MagicMock())
+        items = [{"id": "a", "text": "hello", "vector": [0.1], "metadata": {}}]
+
+        client.insert("indexed", items)
+        client.insert("other", items)
+        client.delete("indexed", filter={"file_id": "f"})
+
+        mock_index.upsert.assert_called_once_with("indexed", items)
+        mock_index.delete.assert_called_once_with(
+            "indexed", ids=None, filter={"file_id": "f"}
+        )
+
+    @patch("open_webui.retrieval.vector.bm25.BM25Index")
+    def test_drops_index_when_mirroring_fails(self, mock_index):
+        mock_index.has_collection.return_value = True
+        mock_index.upsert.side_effect = Exception("boom")
+        vector_db = MagicMock()
+        client = BM25IndexedVectorDB(vector_db)
+
+        client.upsert("indexed", [{"id": "a", "text": "hello"}])
+
+        vector_db.upsert.assert_called_once()
+        mock_index.delete_collection.assert_called_once_with("indexed")
+
+    @patch("open_webui.retrieval.vector.bm25.BM25Index")
+    def test_unscoped_delete_drops_index(self, mock_index):
+        mock_index.has_collection.return_value = True
+        client = BM25IndexedVectorDB(MagicMock())
+
+        client.delete("indexed")
+
+        mock_index.delete_collection.assert_called_once_with("indexed")
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from open_webui.socket.utils import ChatEventBatcher
+
+
+def completion(**data):
+    return {"type": "chat:completion", "data": data}
+
+
+def apply_frame(content, frame):
+    if "content" in frame:
+        return frame["content"]
+    return content[: frame["content_offset"]] + frame["content_delta"]
+
+
+class TestChatEventBatcher:
+    @pytest.fixture
+    def emitted(self):
+        return []
+
+    @pytest.fixture
+    def batcher(self, emitted):
+        async def emit(session_ids, chat_id, message_id, event_data):
+            emitted.append(event_data)
+
+        return ChatEventBatcher(emit=emit, interval=0.02)
+
+    @pytest.mark.asyncio
+    async def test_batches_events_within_interval(self, batcher, emitted):
+        await batcher.add("chat", "message", ["sid"], {"type": "status", "data": {}})
+        for content in ["He", "Hell", "Hello"]:
+            await batcher.add("chat", "message", ["sid"], completion(content=content))
+        assert emitted == []
+
+        await asyncio.sleep(0.05)
+
+        assert emitted == [
+            {
+                "type": "chat:events",
+                "data": {
+                    "events": [
+                        {"type": "status", "data": {}},
+                        completion(seq=0, content="Hello"),
+                    ]
+                },
+            }
+        ]
+
+    @pytest.mark.asyncio
+    async def test_sends_content_deltas(self, batcher, emitted):
+        content = ""
+        for value in [
+            "Hello",
+            "Hello wor",
+            "Hello world",
+            "Hi 🌍 there",
+            "Hi 🌍 there!",
+        ]:
+            await batcher.add("chat", "message", ["sid"], completion(content=value))
+            await batcher.flush("chat", "message")
+
+            frame = emitted[-1]["data"]
+            content = apply_frame(content, frame)
+            assert content == value
+
+        assert [event["data"]["seq"] for event in emitted] == [0, 1, 2, 3, 4]
+        assert emitted[1]["data"] == {
+            "seq": 1,
+            "content_offset": 5,
+            "content_delta": " wor",
+        }
+        # Offsets are in UTF-16 code units
+        assert emitted[4]["data"]["content_offset"] == len("Hi 🌍 there") + 1
+
+    @pytest.mark.asyncio
+    async def test_resync_sends_full_content(self, batcher, emitted):
+        await batcher.add("chat", "message", ["sid"], completion(content="a"))
+        await batcher.flush("chat", "message")
+        await batcher.request_resync("chat", "message")
+
+        await batcher.add("chat", "message", ["sid"], completion(content="ab"))
+        await batcher.flush("chat", "message")
+        await batcher.add("chat", "message", ["sid"], completion(content="abc"))
+        await batcher.flush("chat", "message")
+
+        assert emitted[1]["data"] == {"seq": 1, "content": "ab"}
+        assert "content" not in emitted[2]["data"]
+
+    @pytest.mark.asyncio
+    async def test_done_flushes_immediately(self, batcher, emitted):
+        await batcher.add("chat", "message", ["sid"], completion(content="a"))
+        await batcher.add(
+            "chat", "message", ["sid"], completion(done=True, content="ab", title="t")
+        )
+
+        assert emitted == [completion(done=True, seq=0, content="ab", title="t")]
+        await asyncio.sleep(0.05)
+        assert len(emitted) == 1
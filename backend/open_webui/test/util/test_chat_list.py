@@ -0,0 +1,16 @@
+import pytest
+
+from open_webui.models.chats import get_chat_cursor, parse_chat_cursor
+
+
+class TestChatListCursor:
+    def test_cursor_round_trips(self):
+        cursor = get_chat_cursor(1722772800, "3f2a_b1c9")
+
+        assert cursor == "1722772800_3f2a_b1c9"
+        assert parse_chat_cursor(cursor) == (1722772800, "3f2a_b1c9")
+
+    def test_invalid_cursor_raises_value_error(self):
+        for cursor in ["", "1722772800", "now_3f2a"]:
+            with pytest.raises(ValueError):
+                parse_chat_cursor(cursor)
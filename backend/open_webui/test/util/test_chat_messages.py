@@ -0,0 +1,228 @@
+import importlib.util
+import os
+from unittest.mock import patch
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, insert, select
+
+from open_webui.models.chats import (
+    Chat,
+    ChatForm,
+    ChatMessage,
+    ChatSearch,
+    ChatTag,
+    Chats,
+    assemble_chat,
+    split_chat_messages,
+)
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "../../migrations/versions/b8e9c6a1d4f2_add_chat_message_table.py",
+)
+
+
+def get_chat() -> dict:
+    """A chat with a regenerated answer, the second branch being current."""
+    messages = {
+        "q": {
+            "id": "q",
+            "parentId": None,
+            "childrenIds": ["a1", "a2"],
+            "role": "user",
+            "content": "Hello",
+            "timestamp": 1,
+        },
+        "a1": {
+            "id": "a1",
+            "parentId": "q",
+            "childrenIds": [],
+            "role": "assistant",
+            "content": "Hi",
+            "timestamp": 2,
+        },
+        "a2": {
+            "id": "a2",
+            "parentId": "q",
+            "childrenIds": [],
+            "role": "assistant",
+            "content": "Hi there",
+            "files": [{"type": "image", "url": "image.png"}],
+            "timestamp": 3,
+        },
+    }
+    return {
+        "title": "Greetings",
+        "models": ["model"],
+        "history": {"messages": messages, "currentId": "a2"},
+        "messages": [messages["q"], messages["a2"]],
+    }
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("migration", MIGRATION_PATH)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration
+
+
+@pytest.fixture
+def db(create_db):
+    return create_db(
+        [Chat, ChatMessage, ChatSearch, ChatTag], "open_webui.models.chats"
+    )
+
+
+def get_chat_messages(get_db, chat_id: str) -> dict[str, ChatMessage]:
+    with get_db() as db:
+        return {
+            chat_message.id: chat_message
+            for chat_message in db.query(ChatMessage).filter_by(chat_id=chat_id)
+        }
+
+
+class TestChatMessages:
+    def test_split_and_assemble_round_trip(self):
+        chat = get_chat()
+        chat_data, messages = split_chat_messages(chat)
+
+        assert chat_data == {
+            "title": "Greetings",
+            "models": ["model"],
+            "history": {"currentId": "a2"},
+        }
+        assert messages == chat["history"]["messages"]
+
+        assembled = assemble_chat(chat_data, messages)
+        assert assembled == chat
+        assert [message["id"] for message in assembled["messages"]] == ["q", "a2"]
+        assert assembled["history"]["messages"]["q"]["childrenIds"] == ["a1", "a2"]
+
+    def test_chats_without_history_are_left_as_is(self):
+        chat = {"title": "Empty", "messages": []}
+        assert split_chat_messages(chat) == (chat, None)
+        assert assemble_chat(chat, {}) == chat
+
+    def test_messages_are_stored_per_row(self, db):
+        chat = Chats.insert_new_chat("user", ChatForm(chat=get_chat()))
+        assert chat.chat == get_chat()
+
+        with db() as session:
+            assert session.get(Chat, chat.id).chat == {
+                "title": "Greetings",
+                "models": ["model"],
+                "history": {"currentId": "a2"},
+            }
+
+        chat_messages = get_chat_messages(db, chat.id)
+        assert set(chat_messages) == {"q", "a1", "a2"}
+        assert chat_messages["a2"].parent_id == "q"
+        assert chat_messages["a2"].content == "Hi there"
+        assert "content" not in chat_messages["a2"].data
+        assert chat_messages["a2"].data["files"] == [
+            {"type": "image", "url": "image.png"}
+        ]
+
+    def test_update_upserts_and_removes_messages(self, db):
+        chat = Chats.insert_new_chat("user", ChatForm(chat=get_chat()))
+        updated_at = {
+            message_id: chat_message.updated_at
+            for message_id, chat_message in get_chat_messages(db, chat.id).items()
+        }
+
+        chat_data = get_chat()
+        messages = chat_data["history"]["messages"]
+        messages["a2"]["content"] = "Hi there!"
+        del messages["a1"]
+        messages["q2"] = {
+            "id": "q2",
+            "parentId": "a2",
+            "childrenIds": [],
+            "role": "user",
+            "content": "How are you?",
+        }
+        messages["a2"]["childrenIds"] = ["q2"]
+        chat_data["history"]["currentId"] = "q2"
+
+        with patch("time.time", return_value=updated_at["q"] + 10):
+            chat = Chats.update_chat_by_id(chat.id, chat_data)
+
+        chat_messages = get_chat_messages(db, chat.id)
+        assert set(chat_messages) == {"q", "a2", "q2"}
+        assert chat_messages["a2"].content == "Hi there!"
+        assert chat_messages["q2"].parent_id == "a2"
+        # Only the changed messages are written
+        assert chat_messages["q"].updated_at == updated_at["q"]
+        assert chat_messages["a2"].updated_at == updated_at["q"] + 10
+        assert [message["id"] for message in chat.chat["messages"]] == [
+            "q",
+            "a2",
+            "q2",
+        ]
+
+        # Updates without `history.messages` leave the messages untouched
+        chat = Chats.update_chat_by_id(
+            chat.id, {"title": "Renamed", "history": {"currentId": "q2"}}
+        )
+        assert chat.title == "Renamed"
+        assert set(chat.chat["history"]["messages"]) == {"q", "a2", "q2"}
+
+    def test_upsert_message_updates_current_id(self, db):
+        chat = Chats.insert_new_chat("user", ChatForm(chat=get_chat()))
+
+        Chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id, "a1", {"content": "Hi!"}
+        )
+        Chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id,
+            "a3",
+            {"id": "a3", "parentId": "q", "role": "assistant", "content": "Hey"},
+        )
+
+        chat = Chats.get_chat_by_id(chat.id)
+        messages = chat.chat["history"]["messages"]
+        assert chat.chat["history"]["currentId"] == "a3"
+        assert messages["a1"]["content"] == "Hi!"
+        assert messages["a1"]["childrenIds"] == []
+        assert messages["a3"]["parentId"] == "q"
+        assert [message["id"] for message in chat.chat["messages"]] == ["q", "a3"]
+
+    def test_migration_backfills_and_restores_chats(self):
+        engine = create_engine("sqlite://")
+        Chat.__table__.create(engine)
+        chat = get_chat()
+
+        with engine.begin() as conn:
+            conn.execute(
+                insert(Chat),
+                [
+                    {"id": "chat", "user_id": "user", "chat": chat},
+                    {"id": "empty", "user_id": "user", "chat": {"title": "Empty"}},
+                ],
+            )
+
+            migration = load_migration()
+            with Operations.context(MigrationContext.configure(conn)):
+                migration.upgrade()
+
+            rows = conn.execute(select(ChatMessage.__table__)).fetchall()
+            assert {(row.chat_id, row.id, row.parent_id) for row in rows} == {
+                ("chat", "q", None),
+                ("chat", "a1", "q"),
+                ("chat", "a2", "q"),
+            }
+            assert conn.execute(
+                select(Chat.chat).where(Chat.id == "chat")
+            ).scalar() == {
+                "title": "Greetings",
+                "models": ["model"],
+                "history": {"currentId": "a2"},
+            }
+
+            with Operations.context(MigrationContext.configure(conn)):
+                migration.downgrade()
+
+            chats = dict(conn.execute(select(Chat.id, Chat.chat)).fetchall())
+            assert chats == {"chat": chat, "empty": {"title": "Empty"}}
@@ -0,0 +1,142 @@
+import importlib.util
+import os
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import insert
+
+from open_webui.models.chats import (
+    Chat,
+    ChatForm,
+    ChatImportForm,
+    ChatMessage,
+    ChatTag,
+    Chats,
+    get_fts5_query,
+    get_search_terms,
+    get_tsquery,
+)
+
+MIGRATION_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "../../migrations/versions/a7d3f9c2e815_add_chat_search_table.py",
+)
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("migration", MIGRATION_PATH)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration
+
+
+def get_chat(title: str, *contents: str) -> dict:
+    messages = {
+        str(idx): {
+            "id": str(idx),
+            "parentId": str(idx - 1) if idx else None,
+            "childrenIds": [str(idx + 1)] if idx < len(contents) - 1 else [],
+            "role": "user" if idx % 2 == 0 else "assistant",
+            "content": content,
+            "timestamp": idx,
+        }
+        for idx, content in enumerate(contents)
+    }
+    return {
+        "title": title,
+        "history": {"messages": messages, "currentId": str(len(contents) - 1)},
+    }
+
+
+def seed(conn):
+    # A chat from before the migration, to be backfilled
+    chat = {"title": "Old", "chat": {}, "created_at": 1, "updated_at": 1}
+    conn.execute(
+        insert(Chat.__table__),
+        [
+            {**chat, "id": "old", "user_id": "user"},
+            {**chat, "id": "shared", "user_id": "shared-old"},
+        ],
+    )
+    conn.execute(
+        insert(ChatMessage.__table__),
+        [
+            {"chat_id": "old", "id": "1", "content": "about penguins"},
+            {"chat_id": "shared", "id": "1", "content": "about penguins"},
+        ],
+    )
+    with Operations.context(MigrationContext.configure(conn)):
+        load_migration().upgrade()
+
+
+@pytest.fixture
+def db(create_db):
+    return create_db([Chat, ChatMessage, ChatTag], "open_webui.models.chats", seed)
+
+
+def search(search_text: str, user_id: str = "user") -> list[str]:
+    return [
+        chat.title
+        for chat in Chats.get_chats_by_user_id_and_search_text(user_id, search_text)
+    ]
+
+
+class TestChatSearch:
+    def test_search_terms(self):
+        assert get_search_terms('how to "use" my_tag, déjà-vu?') == [
+            "how",
+            "to",
+            "use",
+            "my",
+            "tag",
+            "déjà",
+            "vu",
+        ]
+        assert get_search_terms("  ?! ") == []
+
+    def test_queries_match_prefixes_of_all_terms(self):
+        assert get_fts5_query(["python", "asy"]) == '"python"* "asy"*'
+        assert get_tsquery(["python", "asy"]) == "python:* & asy:*"
+
+    def test_migration_backfills_existing_chats(self, db):
+        assert search("penguin") == ["Old"]
+        assert search("penguin", user_id="shared-old") == []
+
+    def test_searches_titles_and_messages(self, db):
+        Chats.insert_new_chat(
+            "user", ChatForm(chat=get_chat("Python tips", "How do I sort?"))
+        )
+        Chats.insert_new_chat(
+            "user", ChatForm(chat=get_chat("Cooking", "Any python recipes?"))
+        )
+        Chats.insert_new_chat("other", ChatForm(chat=get_chat("Python", "Hello")))
+
+        # Title matches weigh more
+        assert search("pyth") == ["Python tips", "Cooking"]
+        assert search("python sort") == ["Python tips"]
+        assert search("python", user_id="other") == ["Python"]
+        assert search("unicorn") == []
+
+    def test_writes_update_the_index(self, db):
+        chat = Chats.insert_new_chat(
+            "user", ChatForm(chat=get_chat("Notes", "first draft"))
+        )
+
+        Chats.update_chat_by_id(chat.id, get_chat("Notes", "second draft"))
+        assert search("second") == ["Notes"]
+        assert search("first") == []
+
+        Chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id, "1", {"role": "assistant", "content": "a reply", "parentId": "0"}
+        )
+        assert search("reply") == ["Notes"]
+
+        Chats.update_chat_title_by_id(chat.id, "Journal")
+        assert search("journal second reply") == ["Journal"]
+
+        Chats.import_chats("user", [ChatImportForm(chat=get_chat("Imported", "zebra"))])
+        assert search("zebra") == ["Imported"]
+
+        Chats.delete_chat_by_id(chat.id)
+        assert search("journal") == []
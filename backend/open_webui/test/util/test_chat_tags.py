@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from open_webui.models.chats import (
+    Chat,
+    ChatImportForm,
+    ChatMessage,
+    ChatSearch,
+    ChatTag,
+    Chats,
+)
+
+
+@pytest.fixture
+def db(create_db):
+    tags = SimpleNamespace(
+        get_tag_by_name_and_user_id=lambda name, user_id: SimpleNamespace(
+            id=name.replace(" ", "_").lower()
+        )
+    )
+    with patch("open_webui.models.chats.Tags", tags):
+        yield create_db(
+            [Chat, ChatMessage, ChatSearch, ChatTag], "open_webui.models.chats"
+        )
+
+
+def get_chat_tags(get_db) -> set[tuple[str, str]]:
+    with get_db() as db:
+        return {(row.chat_id, row.tag_id) for row in db.query(ChatTag)}
+
+
+class TestChatTags:
+    def test_tags_are_mirrored_in_the_chat_tag_table(self, db):
+        a = Chats.import_chat(
+            "user", ChatImportForm(chat={"title": "a"}, meta={"tags": ["x", "y", "x"]})
+        )
+        b = Chats.import_chat("user", ChatImportForm(chat={"title": "b"}))
+        assert a.meta["tags"] == ["x", "y"]
+
+        Chats.add_chat_tag_by_id_and_user_id_and_tag_name(b.id, "user", "X")
+        assert get_chat_tags(db) == {(a.id, "x"), (a.id, "y"), (b.id, "x")}
+        assert Chats.count_chats_by_tag_name_and_user_id("x", "user") == 2
+        assert Chats.count_chats_by_tag_name_and_user_id("x", "other user") == 0
+
+        Chats.delete_tag_by_id_and_user_id_and_tag_name(a.id, "user", "x")
+        assert get_chat_tags(db) == {(a.id, "y"), (b.id, "x")}
+
+        Chats.delete_all_tags_by_id_and_user_id(a.id, "user")
+        assert get_chat_tags(db) == {(b.id, "x")}
+
+        Chats.delete_chat_by_id(b.id)
+        assert get_chat_tags(db) == set()
+
+    def test_filters_chats_by_tags(self, db):
+        a = Chats.import_chat(
+            "user", ChatImportForm(chat={"title": "a"}, meta={"tags": ["x", "y"]})
+        )
+        b = Chats.import_chat(
+            "user", ChatImportForm(chat={"title": "b"}, meta={"tags": ["x"]})
+        )
+        c = Chats.import_chat("user", ChatImportForm(chat={"title": "c"}))
+
+        def filter_by_tag_ids(tag_ids):
+            with db() as session:
+                query = Chats._filter_by_tag_ids(session.query(Chat), tag_ids)
+                return {chat.id for chat in query}
+
+        assert filter_by_tag_ids(["x"]) == {a.id, b.id}
+        assert filter_by_tag_ids(["x", "y"]) == {a.id}
+        assert filter_by_tag_ids(["none"]) == {c.id}
+        assert {
+            chat.id for chat in Chats.get_chat_list_by_user_id_and_tag_name("user", "X")
+        } == {a.id, b.id}
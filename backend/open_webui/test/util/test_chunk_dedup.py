@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock, patch
+
+from open_webui.retrieval.utils import get_chunk_id, get_stored_vectors
+
+
+class TestChunkDedup:
+    def test_chunk_id_is_deterministic(self):
+        id = get_chunk_id("kb", "config", "text", "file")
+
+        assert id == get_chunk_id("kb", "config", "text", "file")
+        assert id != get_chunk_id("kb", "other config", "text", "file")
+        assert id != get_chunk_id("other kb", "config", "text", "file")
+        assert id != get_chunk_id("kb", "config", "text", "other file")
+
+    def test_reuses_vectors_of_the_file_collection(self):
+        client = MagicMock()
+        client.has_collection.return_value = True
+        stored = {
+            "kb": {get_chunk_id("kb", "config", "a", "file"): [1.0]},
+            "file-file": {get_chunk_id("file-file", "config", "b", "file"): [2.0]},
+        }
+        client.get_vectors.side_effect = lambda name, ids: {
+            id: vector for id, vector in stored[name].items() if id in ids
+        }
+
+        chunks = {"1": ("a", "file"), "2": ("b", "file"), "3": ("c", "file")}
+        with patch("open_webui.retrieval.utils.VECTOR_DB_CLIENT", client):
+            vectors = get_stored_vectors("kb", "config", chunks)
+
+        assert vectors == {"1": [1.0], "2": [2.0]}
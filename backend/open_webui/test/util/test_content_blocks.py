@@ -0,0 +1,181 @@
+import pytest
+
+from open_webui.utils.content_blocks import (
+    ContentBlocksSerializer,
+    StreamingTagParser,
+    serialize_content_blocks,
+)
+
+TAGS = {
+    "reasoning": [
+        ("<think>", "</think>"),
+        ("<thinking>", "</thinking>"),
+        ("<|begin_of_thought|>", "<|end_of_thought|>"),
+        ("◁think▷", "◁/think▷"),
+    ],
+    "code_interpreter": [("<code_interpreter>", "</code_interpreter>")],
+    "solution": [("<|begin_of_solution|>", "<|end_of_solution|>")],
+}
+
+REASONING = '<details type="reasoning" done="true" duration="0">\n<summary>Thought for 0 seconds</summary>\n'
+
+GOLDEN_STREAMS = [
+    (
+        "<think>\nLet me think.\nYes.\n</think>\n\nThe answer is 42.",
+        f"{REASONING}> Let me think.\n> Yes.\n</details>\nThe answer is 42.",
+    ),
+    (
+        "Intro <thinking>hmm</thinking> answer",
+        f"Intro\n\n{REASONING}> hmm\n</details>\nanswer",
+    ),
+    (
+        "<|begin_of_thought|>x<|end_of_thought|><|begin_of_solution|>y<|end_of_solution|>done",
+        f"{REASONING}> x\n</details>\nsolution: y\ndone",
+    ),
+    (
+        "◁think▷ab◁/think▷ok",
+        f"{REASONING}> ab\n</details>\nok",
+    ),
+    ("<think></think>Empty", "Empty"),
+    (
+        "<think>unterminated",
+        '<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n> unterminated\n</details>',
+    ),
+    (
+        "plain <b>html</b>, a < sign and <thin",
+        "plain <b>html</b>, a < sign and <thin",
+    ),
+]
+
+
+def get_chunks(text: str, size: int) -> list[str]:
+    return [text[idx : idx + size] for idx in range(0, len(text), size)]
+
+
+def feed_stream(parser, chunks):
+    content_blocks = [{"type": "text", "content": ""}]
+    events = []
+    for chunk in chunks:
+        content_blocks[-1]["content"] += chunk
+        events.extend(parser.feed(content_blocks))
+    return content_blocks, events
+
+
+def get_stream_steps():
+    """Content blocks as the streaming handler mutates them, one step at a time."""
+    content_blocks = [{"type": "text", "content": ""}]
+
+    for token in ["Let ", "me ", "check."]:
+        content_blocks[-1]["content"] += token
+        yield content_blocks
+
+    content_blocks.append(
+        {
+            "type": "reasoning",
+            "start_tag": "think",
+            "end_tag": "/think",
+            "content": "",
+        }
+    )
+    for token in ["hmm\n", "> quoted\n", "done"]:
+        content_blocks[-1]["content"] += token
+        yield content_blocks
+    content_blocks[-1]["duration"] = 2
+    yield content_blocks
+
+    content_blocks.append(
+        {
+            "type": "tool_calls",
+            "content": [{"id": "call_1", "function": {"name": "f", "arguments": "{}"}}],
+        }
+    )
+    yield content_blocks
+    content_blocks[-1]["results"] = [{"tool_call_id": "call_1", "content": "ok"}]
+    yield content_blocks
+
+    content_blocks.append({"type": "text", "content": "```python\nprint(1)\n```"})
+    yield content_blocks
+    content_blocks[-1]["content"] = "```python\n"
+    content_blocks.append(
+        {"type": "code_interpreter", "attributes": {"lang": "python"}, "content": "1"}
+    )
+    yield content_blocks
+    content_blocks[-1]["output"] = {"stdout": "1"}
+    yield content_blocks
+
+    content_blocks.append({"type": "text", "content": ""})
+    for token in ["The ", "answer ", "is ", "1."]:
+        content_blocks[-1]["content"] += token
+        yield content_blocks
+
+
+class TestContentBlocksSerializer:
+    def test_matches_full_serialization(self):
+        serializer = ContentBlocksSerializer()
+
+        for content_blocks in get_stream_steps():
+            for raw in (False, True):
+                assert serializer.serialize(
+                    content_blocks, raw=raw
+                ) == serialize_content_blocks(content_blocks, raw=raw)
+
+    def test_rebuilds_when_earlier_block_changes(self):
+        serializer = ContentBlocksSerializer()
+        content_blocks = [
+            {"type": "text", "content": "a"},
+            {"type": "text", "content": "b"},
+        ]
+        assert serializer.serialize(content_blocks) == "a\nb"
+
+        content_blocks[0]["content"] = "changed"
+        assert serializer.serialize(content_blocks) == "changed\nb"
+
+        content_blocks.pop()
+        assert serializer.serialize(content_blocks) == "changed"
+
+    def test_empty(self):
+        assert ContentBlocksSerializer().serialize([]) == ""
+
+
+class TestStreamingTagParser:
+    @pytest.mark.parametrize("text,expected", GOLDEN_STREAMS)
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+    def test_golden_streams(self, text, expected, size):
+        content_blocks, _ = feed_stream(
+            StreamingTagParser(TAGS), get_chunks(text, size)
+        )
+
+        assert serialize_content_blocks(content_blocks) == expected
+
+    def test_parses_attributes(self):
+        content_blocks, events = feed_stream(
+            StreamingTagParser(TAGS), ['<think type="deep" ', 'lang="en">', "x"]
+        )
+
+        assert [event for event, _ in events] == ["open"]
+        assert content_blocks[-1]["attributes"] == {"type": "deep", "lang": "en"}
+        assert content_blocks[-1]["content"] == "x"
+
+    def test_stops_after_code_interpreter(self):
+        content_blocks, events = feed_stream(
+            StreamingTagParser(TAGS),
+            ["Run <code_interpreter>print(1)</code_interpreter> ignored"],
+        )
+
+        assert [(event, block["type"]) for event, block in events] == [
+            ("open", "code_interpreter"),
+            ("close", "code_interpreter"),
+        ]
+        assert content_blocks[-1]["type"] == "code_interpreter"
+        assert content_blocks[-1]["content"] == "print(1)"
+
+    def test_ignores_unconfigured_tags(self):
+        content_blocks, events = feed_stream(
+            StreamingTagParser({"reasoning": TAGS["reasoning"]}),
+            ["<code_interpreter>x</code_interpreter>"],
+        )
+
+        assert events == []
+        assert content_blocks == [
+            {"type": "text", "content": "<code_interpreter>x</code_interpreter>"}
+        ]
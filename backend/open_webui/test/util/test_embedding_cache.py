@@ -0,0 +1,68 @@
+from open_webui.retrieval.embedding_cache import (
+    EmbeddingCache,
+    SQLiteEmbeddingCache,
+)
+
+
+class CountingEmbeddingFunction:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        self.texts.extend(texts)
+        embeddings = [[float(len(text)), 0.5] for text in texts]
+        return embeddings if isinstance(query, list) else embeddings[0]
+
+
+class TestEmbeddingCache:
+    def test_only_embeds_missing_texts(self, tmp_path):
+        cache = EmbeddingCache(SQLiteEmbeddingCache(str(tmp_path / "cache.db")))
+        func = CountingEmbeddingFunction()
+        embed = cache.wrap(func, "openai", "model")
+
+        assert embed(["a", "bb"]) == [[1.0, 0.5], [2.0, 0.5]]
+        assert embed(["bb", "ccc", "ccc"]) == [[2.0, 0.5], [3.0, 0.5], [3.0, 0.5]]
+        assert embed("a") == [1.0, 0.5]
+
+        assert func.texts == ["a", "bb", "ccc"]
+        assert cache.get_metrics()["hits"] == 3
+        assert cache.get_metrics()["misses"] == 3
+
+    def test_prefix_and_model_are_part_of_the_key(self, tmp_path):
+        cache = EmbeddingCache(SQLiteEmbeddingCache(str(tmp_path / "cache.db")))
+        func = CountingEmbeddingFunction()
+
+        cache.wrap(func, "openai", "model")("a")
+        cache.wrap(func, "openai", "model")("a", prefix="query: ")
+        cache.wrap(func, "openai", "other-model")("a")
+
+        assert func.texts == ["a", "a", "a"]
+
+    def test_model_change_clears_cache(self, tmp_path):
+        backend = SQLiteEmbeddingCache(str(tmp_path / "cache.db"))
+        cache = EmbeddingCache(backend)
+        func = CountingEmbeddingFunction()
+
+        cache.wrap(func, "openai", "model")(["a", "b"])
+        backend.set_active_namespace(cache.namespace)
+        assert backend.store.count == 2
+
+        cache.wrap(func, "openai", "other-model")
+        backend.set_active_namespace(cache.namespace)
+        assert backend.store.count == 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        backend = SQLiteEmbeddingCache(str(tmp_path / "cache.db"), max_entries=10)
+        cache = EmbeddingCache(backend)
+        func = CountingEmbeddingFunction()
+        embed = cache.wrap(func, "openai", "model")
+
+        for idx in range(30):
+            embed(f"text {idx}")
+            embed("text 0")
+
+        assert backend.store.count <= 10
+        func.texts.clear()
+        embed("text 0")
+        assert func.texts == []
@@ -0,0 +1,33 @@
+import asyncio
+
+from open_webui.retrieval.embedding_client import (
+    EmbeddingBatchTooLarge,
+    EmbeddingClient,
+    get_batches,
+)
+
+
+class TestEmbeddingClient:
+    def test_batches_by_size_and_tokens(self):
+        assert get_batches(["a"] * 5, 2, 100) == [["a", "a"], ["a", "a"], ["a"]]
+        # 40 characters are about 11 tokens
+        assert get_batches(["x" * 40] * 3, 10, 25) == [["x" * 40] * 2, ["x" * 40]]
+        # A text above the token limit still gets a batch of its own
+        assert get_batches(["x" * 400, "a"], 10, 25) == [["x" * 400], ["a"]]
+
+    def test_embeds_in_order_and_splits_large_batches(self):
+        calls = []
+
+        async def embed(texts):
+            calls.append(texts)
+            if len(texts) > 2:
+                raise EmbeddingBatchTooLarge()
+            return [[float(len(text))] for text in texts]
+
+        client = EmbeddingClient()
+        texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+        embeddings = asyncio.run(client.embed(embed, texts, 4))
+
+        assert embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+        assert ["a", "bb", "ccc", "dddd"] in calls
+        assert all(len(batch) <= 2 for batch in calls[1:])
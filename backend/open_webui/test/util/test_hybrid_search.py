@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+from open_webui.retrieval.utils import (
+    get_cosine_scores,
+    reciprocal_rank_fusion,
+    score_hybrid_search_candidates,
+)
+
+
+def candidate(text, vector=None):
+    return {"text": text, "metadata": {}, "vector": vector}
+
+
+class TestHybridSearch:
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion(
+            [
+                [candidate("a"), candidate("b")],
+                [candidate("b", [1.0]), candidate("c")],
+            ],
+            [0.5, 0.5],
+        )
+
+        assert [c["text"] for c in fused] == ["b", "a", "c"]
+        # The candidate with a stored vector wins the dedup
+        assert fused[0]["vector"] == [1.0]
+
+    def test_cosine_scores(self):
+        scores = get_cosine_scores([1.0, 0.0], [[2.0, 0.0], [0.0, 1.0], [0.0, 0.0]])
+
+        assert scores.tolist() == [1.0, 0.0, 0.0]
+
+    def test_only_embeds_candidates_without_vectors(self):
+        calls = []
+
+        def embedding_function(texts, prefix=None):
+            calls.append(texts)
+            return [[0.0, 1.0] for _ in texts]
+
+        with patch("open_webui.retrieval.utils.RAG_EMBEDDING_CONTENT_PREFIX", None):
+            scores = score_hybrid_search_candidates(
+                [
+                    ("q1", [1.0, 0.0], [candidate("a", [1.0, 0.0]), candidate("b")]),
+                    ("q2", [0.0, 1.0], [candidate("b")]),
+                ],
+                embedding_function,
+                None,
+            )
+
+        assert calls == [["b"]]
+        assert scores == [[1.0, 0.0], [1.0]]
+
+    def test_reranks_each_query_once(self):
+        calls = []
+
+        def reranking_function(pairs):
+            calls.append(pairs)
+            return [float(len(text)) for _, text in pairs]
+
+        scores = score_hybrid_search_candidates(
+            [
+                ("q", [1.0], [candidate("aa"), candidate("b")]),
+                ("q", [1.0], [candidate("b"), candidate("ccc")]),
+            ],
+            None,
+            reranking_function,
+        )
+
+        assert calls == [[("q", "aa"), ("q", "b"), ("q", "ccc")]]
+        assert scores == [[2.0, 1.0], [1.0, 3.0]]
@@ -0,0 +1,49 @@
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.retrieval.ingestion import batch_docs, run_pipeline
+
+
+def docs(*texts):
+    return [Document(page_content=text) for text in texts]
+
+
+class TestIngestion:
+    def test_batches_by_count_and_size(self):
+        batches = batch_docs(docs("aa", "bb", "cc", "dddddd", "e"), 2, 5)
+
+        assert [[doc.page_content for doc in batch] for batch in batches] == [
+            ["aa", "bb"],
+            ["cc"],
+            ["dddddd"],
+            ["e"],
+        ]
+
+    def test_consumes_batches_in_order_with_backpressure(self):
+        produced = []
+        consumed = []
+
+        def produce():
+            for idx in range(10):
+                produced.append(idx)
+                yield docs(str(idx) * 10)
+
+        def consume(batch):
+            # The producer never runs more than a couple of batches ahead
+            assert len(produced) - len(consumed) <= 4
+            consumed.append(int(batch[0].page_content[0]))
+
+        run_pipeline(produce(), consume, 20)
+
+        assert consumed == list(range(10))
+
+    def test_raises_producer_errors(self):
+        def produce():
+            yield docs("a")
+            raise ValueError("broken page")
+
+        consumed = []
+        with pytest.raises(ValueError):
+            run_pipeline(produce(), consumed.append, 100)
+
+        assert len(consumed) == 1
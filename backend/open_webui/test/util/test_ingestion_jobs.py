@@ -0,0 +1,151 @@
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import event
+
+from open_webui.models.ingestion_jobs import (
+    IngestionJob,
+    IngestionJobModel,
+    IngestionJobs,
+)
+from open_webui.retrieval.jobs import IngestionJobQueue
+
+
+def job(attempts):
+    return IngestionJobModel(
+        id="job",
+        user_id="user",
+        type="fail",
+        status="running",
+        attempts=attempts,
+        run_at=0,
+        created_at=0,
+        updated_at=0,
+    )
+
+
+@pytest.fixture
+def Session(create_db):
+    # A file, so that each session has its own connection like the workers
+    return create_db([IngestionJob], "open_webui.models.ingestion_jobs", file=True)
+
+
+class TestIngestionJobsTable:
+    def test_claims_each_job_once(self, Session):
+        created = IngestionJobs.insert_new_job("user", "fail")
+
+        claimed = IngestionJobs.claim_next_job()
+        assert claimed.id == created.id
+        assert claimed.status == "running" and claimed.attempts == 1
+        assert IngestionJobs.claim_next_job() is None
+
+    def test_claims_each_job_once_across_workers(self, Session):
+        created = IngestionJobs.insert_new_job("user", "fail")
+        raced = False
+        claimed_by_other = None
+
+        # Another worker claims the job between the lookup and the update
+        @event.listens_for(Session, "do_orm_execute")
+        def claim_first(state):
+            nonlocal raced, claimed_by_other
+            if state.is_update and not raced:
+                raced = True
+                claimed_by_other = IngestionJobs.claim_next_job()
+
+        assert IngestionJobs.claim_next_job() is None
+        assert claimed_by_other.id == created.id
+        assert IngestionJobs.get_job_by_id(created.id).attempts == 1
+
+    def test_requeues_stale_jobs_up_to_max_attempts(self, Session):
+        def make_stale(id):
+            with Session() as db:
+                db.query(IngestionJob).filter_by(id=id).update(
+                    {IngestionJob.updated_at: int(time.time()) - 120}
+                )
+                db.commit()
+
+        stale = IngestionJobs.insert_new_job("user", "fail")
+        IngestionJobs.claim_next_job()
+        running = IngestionJobs.insert_new_job("user", "fail")
+        IngestionJobs.claim_next_job()
+
+        make_stale(stale.id)
+        assert IngestionJobs.requeue_stale_jobs(timeout=60, max_attempts=2) == 1
+        assert IngestionJobs.get_job_by_id(stale.id).status == "pending"
+        assert IngestionJobs.get_job_by_id(running.id).status == "running"
+
+        claimed = IngestionJobs.claim_next_job()
+        assert claimed.id == stale.id and claimed.attempts == 2
+        assert IngestionJobs.claim_next_job() is None
+
+        # A job killing its worker on every attempt is not retried forever
+        make_stale(stale.id)
+        assert IngestionJobs.requeue_stale_jobs(timeout=60, max_attempts=2) == 0
+        failed = IngestionJobs.get_job_by_id(stale.id)
+        assert failed.status == "failed" and failed.error
+        assert IngestionJobs.get_job_by_id(running.id).status == "running"
+        assert IngestionJobs.claim_next_job() is None
+
+
+class TestIngestionJobQueue:
+    @patch("open_webui.retrieval.jobs.Users")
+    @patch("open_webui.retrieval.jobs.IngestionJobs")
+    def test_retries_failed_jobs_until_the_last_attempt(self, mock_jobs, mock_users):
+        queue = IngestionJobQueue(max_attempts=2)
+
+        @queue.register("fail")
+        def fail(request, user, job, progress):
+            raise ValueError("broken file")
+
+        asyncio.run(queue.run(job(attempts=1)))
+        _, error, retry_at = mock_jobs.fail_job.call_args.args
+        assert error == "broken file" and retry_at is not None
+
+        asyncio.run(queue.run(job(attempts=2)))
+        _, error, retry_at = mock_jobs.fail_job.call_args.args
+        assert retry_at is None
+
+    @patch("open_webui.retrieval.jobs.Users")
+    @patch("open_webui.retrieval.jobs.IngestionJobs")
+    def test_reports_progress_and_result(self, mock_jobs, mock_users):
+        mock_jobs.get_job_by_id.return_value = job(attempts=1)
+        queue = IngestionJobQueue()
+        emit = MagicMock()
+
+        async def emit_event(user_id, event, data):
+            emit(user_id, event)
+
+        queue.emit = emit_event
+
+        @queue.register("fail")
+        def handler(request, user, job, progress):
+            progress(1, 2)
+            return {"done": True}
+
+        asyncio.run(queue.run(job(attempts=1)))
+
+        mock_jobs.update_job_progress.assert_called_with(
+            "job", {"done": 1, "total": 2}, None
+        )
+        mock_jobs.complete_job.assert_called_once_with("job", {"done": True})
+        emit.assert_called_with("user", "ingestion-job")
+
+    @patch("open_webui.retrieval.jobs.Users")
+    @patch("open_webui.retrieval.jobs.IngestionJobs")
+    def test_resumes_from_checkpoint(self, mock_jobs, mock_users):
+        queue = IngestionJobQueue()
+
+        @queue.register("fail")
+        def handler(request, user, job, progress):
+            done = (job.checkpoint or {}).get("done", 0)
+            progress(done + 1, 3, checkpoint={"done": done + 1}, chunks=10)
+
+        resumed = job(attempts=2)
+        resumed.checkpoint = {"done": 1}
+        asyncio.run(queue.run(resumed))
+
+        mock_jobs.update_job_progress.assert_called_with(
+            "job", {"done": 2, "total": 3, "chunks": 10}, {"done": 2}
+        )
@@ -0,0 +1,175 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from open_webui.routers.knowledge import reindex_knowledge_job
+
+
+class FakeVectorDB:
+    """Collections of chunks which, like Chroma, reject vectors of another size."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def delete(self, collection_name, filter):
+        collection = self.collections.get(collection_name, {})
+        for id in [
+            id
+            for id, (metadata, _) in collection.items()
+            if metadata["file_id"] == filter["file_id"]
+        ]:
+            del collection[id]
+
+    def insert(self, collection_name, metadata, vector):
+        collection = self.collections.setdefault(collection_name, {})
+        if any(len(stored) != len(vector) for _, stored in collection.values()):
+            raise ValueError("Embedding dimension does not match the collection")
+        collection[f"{metadata['file_id']}-{len(collection)}"] = (metadata, vector)
+
+    def query(self, collection_name, filter, limit=None):
+        items = [
+            (id, metadata)
+            for id, (metadata, _) in self.collections.get(collection_name, {}).items()
+            if metadata["file_id"] == filter["file_id"]
+        ][:limit]
+        if not items:
+            return None
+        return SimpleNamespace(
+            ids=[[id for id, _ in items]],
+            metadatas=[[metadata for _, metadata in items]],
+        )
+
+    def get_vectors(self, collection_name, ids):
+        collection = self.collections.get(collection_name, {})
+        return {id: collection[id][1] for id in ids if id in collection}
+
+
+class Reindex:
+    """Runs the reindex job over one knowledge base of two files."""
+
+    def __init__(self):
+        self.db = FakeVectorDB()
+        self.files = [
+            SimpleNamespace(id="1", hash="a", filename="1.txt"),
+            SimpleNamespace(id="2", hash="b", filename="2.txt"),
+        ]
+        self.embedding_config = "model"
+        self.dimension = 3
+        self.processed = []
+
+        self.request = SimpleNamespace(
+            app=SimpleNamespace(
+                state=SimpleNamespace(
+                    EMBEDDING_FUNCTION=lambda text, user=None: [0.0] * self.dimension
+                )
+            )
+        )
+
+    def index(self, file):
+        self.db.insert(
+            "kb",
+            {
+                "file_id": file.id,
+                "hash": file.hash,
+                "embedding_config": self.embedding_config,
+            },
+            [0.0] * self.dimension,
+        )
+
+    def process_file(self, request, form_data, user=None):
+        file = next(file for file in self.files if file.id == form_data.file_id)
+        self.processed.append(file.id)
+        self.index(file)
+
+    def run(self, force=False, checkpoint=None):
+        knowledge = SimpleNamespace(
+            id="kb", data={"file_ids": [file.id for file in self.files]}
+        )
+        job = SimpleNamespace(payload={"force": force}, checkpoint=checkpoint)
+        progress = MagicMock()
+
+        self.processed = []
+        with (
+            patch("open_webui.routers.knowledge.VECTOR_DB_CLIENT", self.db),
+            patch("open_webui.routers.knowledge.Knowledges") as knowledges,
+            patch("open_webui.routers.knowledge.Files") as files,
+            patch("open_webui.routers.knowledge.process_file", self.process_file),
+            patch(
+                "open_webui.routers.knowledge.get_chunk_embedding_config",
+                lambda request: self.embedding_config,
+            ),
+        ):
+            knowledges.get_knowledge_bases.return_value = [knowledge]
+            files.get_files_by_ids.return_value = self.files
+            result = reindex_knowledge_job(self.request, None, job, progress)
+
+        self.checkpoint = progress.call_args.kwargs["checkpoint"]
+        return result
+
+
+@pytest.fixture
+def reindex():
+    reindex = Reindex()
+    for file in reindex.files:
+        reindex.index(file)
+    return reindex
+
+
+class TestReindexKnowledgeJob:
+    def test_skips_unchanged_files(self, reindex):
+        reindex.files[1].hash = "c"
+
+        result = reindex.run()
+
+        assert reindex.processed == ["2"]
+        assert result["skipped"] == 1 and result["chunks"] == 1
+        assert result["rebuilt_knowledge_bases"] == []
+        assert len(reindex.db.collections["kb"]) == 2
+
+    def test_force_reindexes_unchanged_files(self, reindex):
+        result = reindex.run(force=True)
+
+        assert sorted(reindex.processed) == ["1", "2"]
+        assert result["skipped"] == 0 and result["chunks"] == 2
+        assert len(reindex.db.collections["kb"]) == 2
+
+    def test_resumes_from_checkpoint(self, reindex):
+        reindex.files[0].hash = "c"
+        reindex.files[1].hash = "d"
+
+        result = reindex.run(checkpoint={"completed": ["kb/1"], "chunks": 1})
+
+        assert reindex.processed == ["2"]
+        assert result["chunks"] == 2
+        assert sorted(reindex.checkpoint["completed"]) == ["kb/1", "kb/2"]
+
+    def test_rebuilds_collections_of_another_embedding_model(self, reindex):
+        reindex.embedding_config = "other model"
+        reindex.dimension = 4
+
+        result = reindex.run(checkpoint={"completed": ["kb/1"]})
+
+        # Files done before the model changed are indexed again as well
+        assert sorted(reindex.processed) == ["1", "2"]
+        assert result["failed_files"] == []
+        assert result["rebuilt_knowledge_bases"] == ["kb"]
+        assert all(
+            metadata["embedding_config"] == "other model" and len(vector) == 4
+            for metadata, vector in reindex.db.collections["kb"].values()
+        )
+
+    def test_rebuilds_collections_of_another_dimension(self, reindex):
+        reindex.dimension = 4
+
+        result = reindex.run()
+
+        assert sorted(reindex.processed) == ["1", "2"]
+        assert result["failed_files"] == []
+        assert result["rebuilt_knowledge_bases"] == ["kb"]
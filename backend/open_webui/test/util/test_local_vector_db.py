@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from open_webui.retrieval.vector.dbs.local import LocalVectorClient, top_k
+
+
+def get_items(vectors, offset=0):
+    return [
+        {
+            "id": f"item-{offset + idx}",
+            "text": f"text {offset + idx}",
+            "vector": vector.tolist(),
+            "metadata": {"file_id": f"file-{(offset + idx) % 3}"},
+        }
+        for idx, vector in enumerate(vectors)
+    ]
+
+
+@pytest.fixture
+def client(tmp_path):
+    # Compaction is run by the tests
+    return LocalVectorClient(
+        path=str(tmp_path), ivf_min_size=10**9, probe_ratio=0.2, compact_ratio=1.0
+    )
+
+
+class TestLocalVectorDB:
+    vectors = np.random.default_rng(0).normal(size=(600, 16)).astype(np.float32)
+
+    def test_top_k(self):
+        scores = np.array([0.1, 0.9, 0.5, 0.7])
+
+        assert top_k(scores, 2).tolist() == [1, 3]
+        assert top_k(scores, 10).tolist() == [1, 3, 2, 0]
+
+    def test_searches_nearest_items(self, client):
+        client.upsert("kb", get_items(self.vectors))
+
+        result = client.search("kb", [self.vectors[42], self.vectors[7]], limit=3)
+
+        assert result.ids[0][0] == "item-42"
+        assert result.ids[1][0] == "item-7"
+        assert result.documents[0][0] == "text 42"
+        assert result.metadatas[0][0] == {"file_id": "file-0"}
+        assert result.distances[0][0] == pytest.approx(1.0)
+        assert len(result.ids[0]) == 3
+        assert client.search("missing", [self.vectors[0]], limit=3) is None
+
+    def test_upserts_and_deletes_leave_tombstones(self, client):
+        client.upsert("kb", get_items(self.vectors[:10]))
+        client.upsert("kb", get_items(self.vectors[20:22], offset=0))
+        client.delete("kb", ids=["item-5"])
+        client.delete("kb", filter={"file_id": "file-2"})
+
+        ids = client.get("kb").ids[0]
+        assert sorted(ids) == [f"item-{idx}" for idx in [0, 1, 3, 4, 6, 7, 9]]
+        assert client.query("kb", {"file_id": "file-0"}, limit=2).ids == [
+            ["item-3", "item-6"]
+        ]
+
+        collection = client._get_collection("kb")
+        assert collection.get_tombstones() == 5
+        result = client.search("kb", [self.vectors[20]], limit=10)
+        assert result.ids[0][0] == "item-0"
+        assert sorted(result.ids[0]) == sorted(ids)
+
+        collection.compact()
+        assert collection.rows == 7 and collection.get_tombstones() == 0
+        assert client.search("kb", [self.vectors[20]], limit=10).ids == result.ids
+
+    def test_ivf_index_finds_the_nearest_items(self, client, tmp_path):
+        client.upsert("kb", get_items(self.vectors))
+        client._get_collection("kb").compact(train=True)
+        client.upsert("kb", get_items(self.vectors[:50], offset=600))
+
+        collection = client._get_collection("kb")
+        assert collection.centroids is not None
+
+        for idx in [0, 123, 599]:
+            assert client.search("kb", [self.vectors[idx]], limit=1).ids[0][0] in [
+                f"item-{idx}",
+                f"item-{idx + 600}",
+            ]
+
+        # Reopened from the files
+        reopened = LocalVectorClient(path=str(tmp_path), probe_ratio=0.2)
+        assert reopened.search("kb", [self.vectors[123]], limit=1).ids[0][0] == (
+            "item-123"
+        )
+        assert reopened.get_vectors("kb", ["item-1"])["item-1"] == pytest.approx(
+            (self.vectors[1] / np.linalg.norm(self.vectors[1])).tolist(), abs=1e-6
+        )
+
+    def test_delete_collection(self, client):
+        client.upsert("kb", get_items(self.vectors[:10]))
+        assert client.has_collection("kb")
+
+        client.delete_collection("kb")
+        assert not client.has_collection("kb")
+        assert client.get("kb") is None
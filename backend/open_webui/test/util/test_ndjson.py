@@ -0,0 +1,50 @@
+import asyncio
+import gzip
+import json
+
+from open_webui.utils.ndjson import decode_ndjson, encode_ndjson
+
+
+async def collect(chunks: list[bytes]) -> list[dict]:
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    return [item async for item in decode_ndjson(stream())]
+
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [data[idx : idx + size] for idx in range(0, len(data), size)]
+
+
+class TestNDJSON:
+    items = [{"id": str(idx), "title": f"chat {idx}\n"} for idx in range(50)]
+
+    def test_encodes_one_document_per_line(self):
+        data = b"".join(encode_ndjson(json.dumps(item) for item in self.items))
+
+        lines = data.decode().splitlines()
+        assert [json.loads(line) for line in lines] == self.items
+
+    def test_gzip_output_is_a_valid_gzip_file(self):
+        data = b"".join(
+            encode_ndjson((json.dumps(item) for item in self.items), gzip=True)
+        )
+
+        assert gzip.decompress(data) == b"".join(
+            encode_ndjson(json.dumps(item) for item in self.items)
+        )
+
+    def test_decodes_documents_split_across_chunks(self):
+        data = b"".join(encode_ndjson(json.dumps(item) for item in self.items))
+
+        assert asyncio.run(collect(split(data, 7))) == self.items
+        assert asyncio.run(collect([data.rstrip(b"\n")])) == self.items
+        assert asyncio.run(collect([b"\n", b"  \n"])) == []
+
+    def test_decodes_gzipped_documents(self):
+        data = b"".join(
+            encode_ndjson((json.dumps(item) for item in self.items), gzip=True)
+        )
+
+        assert asyncio.run(collect(split(data, 5))) == self.items
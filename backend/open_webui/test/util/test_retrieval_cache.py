@@ -0,0 +1,61 @@
+import numpy as np
+
+from open_webui.retrieval.retrieval_cache import (
+    MemoryRetrievalCache,
+    RetrievalCache,
+)
+
+
+class TestRetrievalCache:
+    def test_serves_results_until_collection_changes(self):
+        cache = RetrievalCache(MemoryRetrievalCache())
+        result = {"documents": [["a"]], "distances": [[np.float32(0.5)]]}
+
+        key = cache.get_key(["kb"], ["what  is it "], {"k": 3})
+        assert cache.get(key) is None
+        cache.set(key, result)
+
+        assert cache.get_key(["kb"], ["what is it"], {"k": 3}) == key
+        assert cache.get(key) == {"documents": [["a"]], "distances": [[0.5]]}
+        assert cache.get_key(["kb"], ["what is it"], {"k": 4}) != key
+
+        cache.invalidate("kb")
+        assert cache.get(cache.get_key(["kb"], ["what is it"], {"k": 3})) is None
+
+        assert cache.get_metrics()["hits"] == 1
+        assert cache.get_metrics()["misses"] == 2
+
+    def test_invalidate_all(self):
+        cache = RetrievalCache(MemoryRetrievalCache())
+        key = cache.get_key(["a", "b"], ["q"], {})
+
+        cache.invalidate("c")
+        assert cache.get_key(["b", "a"], ["q"], {}) == key
+
+        cache.invalidate_all()
+        assert cache.get_key(["a", "b"], ["q"], {}) != key
+
+    def test_evicts_least_recently_used(self):
+        backend = MemoryRetrievalCache(max_entries=2)
+        backend.set("a", "1")
+        backend.set("b", "2")
+        backend.get("a")
+        backend.set("c", "3")
+
+        assert backend.get("b") is None
+        assert backend.get("a") == "1"
+        assert backend.get("c") == "3"
+
+    def test_backend_errors_behave_as_an_empty_cache(self):
+        class FailingRetrievalCache(MemoryRetrievalCache):
+            def get(self, key):
+                raise ConnectionError("down")
+
+            def get_versions(self, collection_names):
+                raise ConnectionError("down")
+
+        cache = RetrievalCache(FailingRetrievalCache())
+
+        assert cache.get_key(["kb"], ["q"], {}) is None
+        assert cache.get("key") is None
+        assert cache.get_metrics()["errors"] == 2
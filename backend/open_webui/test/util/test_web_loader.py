@@ -0,0 +1,47 @@
+import asyncio
+
+from langchain_core.documents import Document
+
+from open_webui.retrieval.web.utils import aload_with_limits
+
+
+class Pages:
+    def __init__(self, delays):
+        self.delays = delays
+        self.closed = False
+
+    async def load(self):
+        try:
+            for idx, delay in enumerate(self.delays):
+                await asyncio.sleep(delay)
+                yield Document(page_content="x" * 10, metadata={"source": str(idx)})
+        finally:
+            self.closed = True
+
+
+async def collect(docs):
+    return [doc.metadata["source"] async for doc in docs]
+
+
+class TestWebLoaderLimits:
+    def test_loads_all_pages_without_limits(self):
+        pages = Pages([0, 0, 0])
+
+        assert asyncio.run(collect(aload_with_limits(pages.load()))) == ["0", "1", "2"]
+        assert pages.closed
+
+    def test_stops_at_content_budget(self):
+        pages = Pages([0, 0, 0])
+
+        sources = asyncio.run(collect(aload_with_limits(pages.load(), max_size=15)))
+
+        assert sources == ["0", "1"]
+        assert pages.closed
+
+    def test_stops_at_deadline(self):
+        pages = Pages([0, 0, 10])
+
+        sources = asyncio.run(collect(aload_with_limits(pages.load(), timeout=0.2)))
+
+        assert sources == ["0", "1"]
+        assert pages.closed
@@ -0,0 +1,69 @@
+import asyncio
+
+from open_webui.retrieval.web.page_cache import (
+    SQLiteWebPageCache,
+    WebPageCache,
+    get_max_age,
+    normalize_url,
+)
+
+
+class Server:
+    def __init__(self, headers):
+        self.headers = headers
+        self.requests = []
+
+    async def fetch(self, headers):
+        self.requests.append(headers)
+        if headers.get("If-None-Match") == self.headers.get("ETag"):
+            return 304, "", self.headers
+        return 200, "<html>page</html>", self.headers
+
+
+def parse(text):
+    return text.upper(), {"title": "Page"}
+
+
+class TestWebPageCache:
+    def test_normalize_url(self):
+        assert normalize_url("HTTPS://Example.com:443/a?b=2&a=1#top") == (
+            "https://example.com/a?a=1&b=2"
+        )
+        assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+
+    def test_max_age(self):
+        assert get_max_age({}, 3600) == 3600
+        assert get_max_age({"Cache-Control": "public, max-age=60"}, 3600) == 60
+        assert get_max_age({"Cache-Control": "no-cache"}, 3600) == 0
+        assert get_max_age({"Cache-Control": "no-store"}, 3600) is None
+
+    def test_serves_fresh_pages_and_revalidates_stale_ones(self, tmp_path):
+        cache = WebPageCache(SQLiteWebPageCache(str(tmp_path / "pages.db")))
+        server = Server({"ETag": '"v1"'})
+
+        def load(url):
+            return asyncio.run(cache.aload(url, server.fetch, parse))
+
+        assert load("https://example.com/a") == ("<HTML>PAGE</HTML>", {"title": "Page"})
+        assert load("https://EXAMPLE.com/a#b")[0] == "<HTML>PAGE</HTML>"
+        assert server.requests == [{}]
+
+        server.headers = {"ETag": '"v1"', "Cache-Control": "no-cache"}
+        cache.max_age = 0
+        load("https://example.com/b")
+        load("https://example.com/b")
+        assert server.requests[-1] == {"If-None-Match": '"v1"'}
+
+        metrics = cache.get_metrics()
+        assert (metrics["hits"], metrics["revalidated"], metrics["misses"]) == (1, 1, 2)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        backend = SQLiteWebPageCache(str(tmp_path / "pages.db"), max_size=25)
+        backend.set("a", b"x" * 10)
+        backend.set("b", b"x" * 10)
+        backend.get("a")
+        backend.set("c", b"x" * 10)
+
+        assert backend.get("b") is None
+        assert backend.get("a") is not None
+        assert backend.get("c") is not None
@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
+from open_webui.models.chats import (
+    Chat,
+    ChatForm,
+    ChatMessage,
+    ChatSearch,
+    ChatTag,
+    Chats,
+)
+from open_webui.utils.write_buffer import ChatMessageWriteBuffer
+
+
+class TestChatMessageWriteBuffer:
+    @patch("open_webui.utils.write_buffer.Chats")
+    @pytest.mark.asyncio
+    async def test_coalesces_writes_within_interval(self, mock_chats):
+        buffer = ChatMessageWriteBuffer(interval=60, max_bytes=1_000_000)
+
+        for idx in range(100):
+            buffer.write("chat", "message", {"content": "x" * idx})
+
+        mock_chats.upsert_message_to_chat_by_id_and_message_id.assert_not_called()
+
+        buffer.close("chat", "message")
+
+        mock_chats.upsert_message_to_chat_by_id_and_message_id.assert_called_once_with(
+            "chat", "message", {"content": "x" * 99}, index=False
+        )
+        assert buffer.get_metrics()["writes"] == 100
+        assert buffer.get_metrics()["flushes"] == 1
+        assert buffer.get_metrics()["pending"] == 0
+
+    @patch("open_webui.utils.write_buffer.Chats")
+    @pytest.mark.asyncio
+    async def test_flushes_on_byte_budget(self, mock_chats):
+        buffer = ChatMessageWriteBuffer(interval=60, max_bytes=10)
+
+        buffer.write("chat", "message", {"content": "x" * 5})
+        mock_chats.upsert_message_to_chat_by_id_and_message_id.assert_not_called()
+
+        buffer.write("chat", "message", {"content": "x" * 10})
+        mock_chats.upsert_message_to_chat_by_id_and_message_id.assert_called_once()
+
+        buffer.write("chat", "message", {"content": "x" * 15})
+        assert mock_chats.upsert_message_to_chat_by_id_and_message_id.call_count == 1
+
+        buffer.close("chat", "message")
+
+    @patch("open_webui.utils.write_buffer.Chats")
+    @pytest.mark.asyncio
+    async def test_flushes_after_interval(self, mock_chats):
+        buffer = ChatMessageWriteBuffer(interval=0.05, max_bytes=1_000_000)
+
+        buffer.write("chat", "message", {"content": "a"})
+        buffer.write("chat", "message", {"content": "ab"})
+        await asyncio.sleep(0.1)
+
+        mock_chats.upsert_message_to_chat_by_id_and_message_id.assert_called_once_with(
+            "chat", "message", {"content": "ab"}, index=False
+        )
+        buffer.close("chat", "message")
+        assert mock_chats.upsert_message_to_chat_by_id_and_message_id.call_count == 1
+
+    @patch("open_webui.utils.write_buffer.Chats")
+    def test_counts_failed_flushes(self, mock_chats):
+        mock_chats.upsert_message_to_chat_by_id_and_message_id.return_value = None
+        buffer = ChatMessageWriteBuffer(interval=60, max_bytes=1_000_000)
+
+        buffer.write("chat", "message", {"content": "a"})
+
+        assert buffer.get_metrics()["flush_errors"] == 1
+
+    @patch("open_webui.utils.write_buffer.Chats")
+    @pytest.mark.asyncio
+    async def test_appends_without_reading_back(self, mock_chats):
+        mock_chats.get_message_by_id_and_message_id.return_value = {"content": "a"}
+        buffer = ChatMessageWriteBuffer(interval=60, max_bytes=1_000_000)
+
+        for value in ["b", "c", "d"]:
+            buffer.append("chat", "message", value)
+        buffer.close("chat", "message")
+
+        mock_chats.get_message_by_id_and_message_id.assert_called_once()
+        mock_chats.upsert_message_to_chat_by_id_and_message_id.assert_called_once_with(
+            "chat", "message", {"content": "abcd"}, index=False
+        )
+
+    @patch("open_webui.utils.write_buffer.Chats")
+    @pytest.mark.asyncio
+    async def test_buffers_statuses(self, mock_chats):
+        buffer = ChatMessageWriteBuffer(interval=60, max_bytes=1_000_000)
+
+        buffer.add_status("chat", "message", {"description": "a"})
+        buffer.add_status("chat", "message", {"description": "b"})
+        buffer.close("chat", "message")
+
+        mock_chats.add_message_statuses_to_chat_by_id_and_message_id.assert_called_once_with(
+            "chat", "message", [{"description": "a"}, {"description": "b"}]
+        )
+        mock_chats.upsert_message_to_chat_by_id_and_message_id.assert_not_called()
+
+    def test_indexes_the_chat_once_the_message_is_done(self, create_db):
+        db = create_db(
+            [Chat, ChatMessage, ChatSearch, ChatTag], "open_webui.models.chats"
+        )
+        chat = Chats.insert_new_chat("user", ChatForm(chat={"title": "Chat"}))
+
+        statements = []
+
+        @event.listens_for(db.kw["bind"], "before_cursor_execute")
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith(("INSERT INTO chat_search", "UPDATE chat_search")):
+                statements.append(statement)
+
+        # Without an event loop, every write over the byte budget is flushed
+        buffer = ChatMessageWriteBuffer(interval=60, max_bytes=10)
+        for idx in range(1, 6):
+            buffer.write(chat.id, "message", {"content": "streamed " * idx})
+        assert buffer.get_metrics()["flushes"] == 5
+        assert statements == []
+
+        buffer.close(chat.id, "message")
+        assert len(statements) == 1
+        with db() as session:
+            chat_search = session.query(ChatSearch).filter_by(chat_id=chat.id).one()
+            assert chat_search.content == "streamed " * 5
@@ -0,0 +1,88 @@
+import pycrdt as Y
+import pytest
+
+from open_webui.socket.utils import YdocManager
+
+
+def get_text(update: bytes) -> str:
+    doc = Y.Doc()
+    text = doc.get("text", type=Y.Text)
+    doc.apply_update(update)
+    return str(text)
+
+
+class TestYdocManager:
+    @pytest.mark.asyncio
+    async def test_compacts_update_log(self):
+        manager = YdocManager(compact_count=10)
+
+        doc = Y.Doc()
+        text = doc.get("text", type=Y.Text)
+        for idx in range(25):
+            state_vector = doc.get_state()
+            text += str(idx % 10)
+            await manager.append_to_updates("note:a", doc.get_update(state_vector))
+
+        updates = await manager.get_updates("note:a")
+        assert len(updates) < 10
+        assert get_text(await manager.get_state("note:a")) == str(text)
+
+    @pytest.mark.asyncio
+    async def test_state_vector_diff(self):
+        manager = YdocManager()
+
+        doc = Y.Doc()
+        text = doc.get("text", type=Y.Text)
+        text += "hello"
+        await manager.append_to_updates("note:a", doc.get_update())
+
+        client_update = doc.get_update()
+        client_state_vector = doc.get_state()
+
+        state_vector = doc.get_state()
+        text += " world"
+        await manager.append_to_updates("note:a", doc.get_update(state_vector))
+
+        diff = Y.get_update(await manager.get_state("note:a"), client_state_vector)
+        assert len(diff) < len(await manager.get_state("note:a"))
+        assert get_text(Y.merge_updates(client_update, diff)) == "hello world"
+
+    @pytest.mark.asyncio
+    async def test_empty_document_state(self):
+        manager = YdocManager()
+
+        assert await manager.get_state("note:a") == b"\x00\x00"
+        assert not await manager.document_exists("note:a")
+
+    @pytest.mark.asyncio
+    async def test_remove_user_from_all_documents(self):
+        manager = YdocManager()
+
+        await manager.add_user("note:a", "sid1")
+        await manager.add_user("note:b", "sid1")
+        await manager.add_user("note:b", "sid2")
+        await manager.append_to_updates("note:a", b"\x00\x00")
+        await manager.append_to_updates("note:b", b"\x00\x00")
+
+        await manager.remove_user_from_all_documents("sid1")
+
+        assert not await manager.document_exists("note:a")
+        assert await manager.get_users("note:b") == {"sid2"}
+
+    @pytest.mark.asyncio
+    async def test_reconcile_removes_inactive_sessions(self):
+        manager = YdocManager()
+
+        await manager.add_user("note:a", "sid1")
+        await manager.add_user("note:b", "sid2")
+        await manager.append_to_updates("note:a", b"\x00\x00")
+        await manager.append_to_updates("note:b", b"\x00\x00")
+        await manager.append_to_updates("note:c", b"\x00\x00")
+
+        async def is_active(user_id):
+            return user_id == "sid2"
+
+        assert await manager.reconcile(is_active) == 2
+        assert not await manager.document_exists("note:a")
+        assert not await manager.document_exists("note:c")
+        assert await manager.document_exists("note:b")
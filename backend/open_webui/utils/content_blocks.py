@@ -0,0 +1,343 @@
+import html
+import json
+import re
+import time
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def serialize_content_block(content: str, block: dict, raw: bool = False) -> str:
+    """
+    Appends the rendered form of `block` to the already serialized `content`.
+    """
+    if block["type"] == "text":
+        content = f"{content}{block['content'].strip()}\n"
+    elif block["type"] == "tool_calls":
+        attributes = block.get("attributes", {})
+
+        tool_calls = block.get("content", [])
+        results = block.get("results", [])
+
+        if results:
+
+            tool_calls_display_content = ""
+            for tool_call in tool_calls:
+
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_result = None
+                tool_result_files = None
+                for result in results:
+                    if tool_call_id == result.get("tool_call_id", ""):
+                        tool_result = result.get("content", None)
+                        tool_result_files = result.get("files", None)
+                        break
+
+                if tool_result:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                else:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in tool_calls:
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+
+    elif block["type"] == "reasoning":
+        reasoning_display_content = "\n".join(
+            (f"> {line}" if not line.startswith(">") else line)
+            for line in block["content"].splitlines()
+        )
+
+        reasoning_duration = block.get("duration", None)
+
+        if reasoning_duration is not None:
+            if raw:
+                content = f'{content}\n{block["start_tag"]}{block["content"]}{block["end_tag"]}\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n{block["start_tag"]}{block["content"]}{block["end_tag"]}\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            # Remove trailing backticks that would open a new block
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            # Keep content as is - either closing backticks or no backticks
+            content = content_stripped + original_whitespace
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks: list[dict], raw: bool = False) -> str:
+    content = ""
+
+    for block in content_blocks:
+        content = serialize_content_block(content, block, raw)
+
+    return content.strip()
+
+
+def get_content_block_signature(block: dict) -> tuple:
+    """
+    Cheap fingerprint of a block, changes whenever the streaming handler
+    mutates a block in a way that affects its rendered form.
+    """
+    content = block.get("content")
+    return (
+        id(block),
+        block.get("type"),
+        len(content) if isinstance(content, (str, list)) else id(content),
+        len(block.get("results") or []),
+        block.get("duration"),
+        id(block.get("output")),
+    )
+
+
+class ContentBlocksSerializer:
+    """
+    Incremental `serialize_content_blocks` for a list of content blocks that
+    only grows or changes at its tail, as it does while a response streams.
+
+    The serialized prefix of all blocks but the last is cached and only the
+    tail block is rendered on each call. The cache is rebuilt from scratch if
+    any earlier block changed.
+    """
+
+    def __init__(self):
+        self.signatures = {False: [], True: []}
+        self.prefix = {False: "", True: ""}
+
+    def serialize(self, content_blocks: list[dict], raw: bool = False) -> str:
+        closed_blocks = content_blocks[:-1]
+        signatures = [get_content_block_signature(block) for block in closed_blocks]
+
+        cached_signatures = self.signatures[raw]
+        if signatures[: len(cached_signatures)] != cached_signatures:
+            cached_signatures.clear()
+            self.prefix[raw] = ""
+
+        for block, signature in zip(
+            closed_blocks[len(cached_signatures) :],
+            signatures[len(cached_signatures) :],
+        ):
+            self.prefix[raw] = serialize_content_block(self.prefix[raw], block, raw)
+            cached_signatures.append(signature)
+
+        content = self.prefix[raw]
+        if content_blocks:
+            content = serialize_content_block(content, content_blocks[-1], raw)
+
+        return content.strip()
+
+
+def is_html_tag(tag: str) -> bool:
+    return tag.startswith("<") and tag.endswith(">")
+
+
+def get_start_tag_pattern(start_tag: str, group: str = "") -> str:
+    if is_html_tag(start_tag):
+        # Match start tag e.g., <tag> or <tag attr="value">
+        attributes_group = f"?P<{group}>" if group else ""
+        return rf"<{re.escape(start_tag[1:-1])}({attributes_group}\s.*?)?>"
+    return re.escape(start_tag)
+
+
+def extract_attributes(tag_content: str) -> dict:
+    """Extract attributes from a tag if they exist."""
+    attributes = {}
+    if not tag_content:
+        return attributes
+    # Match attributes in the format: key="value" (ignores single quotes for simplicity)
+    for key, value in re.findall(r'(\w+)\s*=\s*"([^"]+)"', tag_content):
+        attributes[key] = value
+    return attributes
+
+
+class StreamingTagParser:
+    """
+    Incremental detector for tag delimited blocks (reasoning, solution, code
+    interpreter, ...) in a streamed response.
+
+    `tags` maps a block type to its (start_tag, end_tag) pairs. Each call to
+    `feed` only scans what was appended to the last content block since the
+    previous call, moves the text between tags into blocks of their own and
+    returns the ("open" | "close", block) events it produced. Tags split
+    across chunks are held back until they are complete.
+    """
+
+    def __init__(self, tags: dict[str, list[tuple[str, str]]]):
+        self.start_tags = {}
+        self.end_tags = set()
+
+        patterns = []
+        partial_patterns = []
+        # Literal prefix of every start tag, `<think` for `<think attr="...">`
+        self.heads = []
+
+        for content_type, tag_pairs in tags.items():
+            for start_tag, end_tag in tag_pairs:
+                name = f"tag{len(self.start_tags)}"
+                self.start_tags[name] = (content_type, start_tag, end_tag)
+                self.end_tags.add(end_tag)
+
+                patterns.append(
+                    f"(?P<{name}>{get_start_tag_pattern(start_tag, f'{name}_attributes')})"
+                )
+                if is_html_tag(start_tag):
+                    partial_patterns.append(rf"<{re.escape(start_tag[1:-1])}\s[^>\n]*")
+                    self.heads.append(start_tag[:-1])
+                else:
+                    self.heads.append(start_tag)
+
+        self.start_tag_regex = re.compile("|".join(patterns)) if patterns else None
+        # Start tag whose attributes are still streaming, e.g. `<think a="b`
+        self.partial_start_tag_regex = (
+            re.compile(rf"(?:{'|'.join(partial_patterns)})\Z")
+            if partial_patterns
+            else None
+        )
+        self.max_head_length = max((len(head) for head in self.heads), default=0)
+
+        self.block = None
+        self.position = 0
+
+    def get_resume_position(self, text: str, position: int) -> int:
+        """
+        Earliest position in `text` where a start tag may still be completed
+        by the next chunk.
+        """
+        for idx in range(max(position, len(text) - self.max_head_length), len(text)):
+            tail = text[idx:]
+            if any(head.startswith(tail) for head in self.heads):
+                return idx
+
+        if self.partial_start_tag_regex:
+            match = self.partial_start_tag_regex.search(text, position)
+            if match:
+                return match.start()
+
+        return len(text)
+
+    def feed(self, content_blocks: list[dict]) -> list[tuple[str, dict]]:
+        events = []
+
+        while content_blocks:
+            block = content_blocks[-1]
+            if block is not self.block:
+                self.block = block
+                self.position = 0
+
+            text = block["content"]
+            if not isinstance(text, str):
+                break
+
+            if block["type"] == "text":
+                if self.start_tag_regex is None:
+                    break
+
+                match = self.start_tag_regex.search(text, self.position)
+                if not match:
+                    self.position = self.get_resume_position(text, self.position)
+                    break
+
+                content_type, start_tag, end_tag = self.start_tags[match.lastgroup]
+                before_tag = text[: match.start()]
+
+                block["content"] = before_tag
+                if not before_tag:
+                    content_blocks.pop()
+
+                new_block = {
+                    "type": content_type,
+                    "start_tag": start_tag,
+                    "end_tag": end_tag,
+                    "attributes": extract_attributes(
+                        match.groupdict().get(f"{match.lastgroup}_attributes") or ""
+                    ),
+                    "content": text[match.end() :],
+                    "started_at": time.time(),
+                }
+                content_blocks.append(new_block)
+                events.append(("open", new_block))
+
+            elif block.get("end_tag") in self.end_tags and "ended_at" not in block:
+                end_tag = block["end_tag"]
+
+                idx = text.find(end_tag, self.position)
+                if idx == -1:
+                    self.position = max(self.position, len(text) - len(end_tag) + 1, 0)
+                    break
+
+                block_content = text[:idx].strip()
+                leftover_content = text[idx + len(end_tag) :].lstrip()
+
+                if block_content:
+                    block["content"] = block_content
+                    block["ended_at"] = time.time()
+                    block["duration"] = int(block["ended_at"] - block["started_at"])
+                    events.append(("close", block))
+
+                    if block["type"] == "code_interpreter":
+                        # The code has to run before the response can continue
+                        break
+                else:
+                    # Remove the block if content is empty
+                    content_blocks.pop()
+                    events.append(("close", block))
+
+                content_blocks.append({"type": "text", "content": leftover_content})
+            else:
+                break
+
+        return events
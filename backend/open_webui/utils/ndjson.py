@@ -0,0 +1,54 @@
+import json
+import zlib
+from typing import AsyncIterator, Iterable, Iterator
+
+# gzip container for zlib
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def encode_ndjson(lines: Iterable[str], gzip: bool = False) -> Iterator[bytes]:
+    """
+    Encodes JSON documents one per line, compressed incrementally if `gzip`
+    so that only the current line is held in memory.
+    """
+    compressor = zlib.compressobj(wbits=GZIP_WBITS) if gzip else None
+    for line in lines:
+        data = f"{line}\n".encode()
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+
+    if compressor:
+        yield compressor.flush()
+
+
+async def decode_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """
+    Decodes JSON documents one per line as the chunks arrive, decompressing
+    them if they are gzipped. Blank lines are skipped.
+    """
+    decompressor = None
+    buffer = b""
+    first = True
+
+    async for chunk in chunks:
+        if first and chunk:
+            first = False
+            if chunk[:2] == GZIP_MAGIC:
+                decompressor = zlib.decompressobj(wbits=GZIP_WBITS)
+        if decompressor:
+            chunk = decompressor.decompress(chunk)
+
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+    if decompressor:
+        buffer += decompressor.flush()
+    for line in buffer.split(b"\n"):
+        if line.strip():
+            yield json.loads(line)
@@ -8,6 +8,7 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* webui.chat_save.* (write-behind buffer for streamed message saves)
 
 Attributes used: http.method, http.route, http.status_code
 
@@ -34,8 +35,12 @@ from opentelemetry.sdk.resources import SERVICE_NAME, Resource
 
 from open_webui.env import OTEL_SERVICE_NAME, OTEL_EXPORTER_OTLP_ENDPOINT
 
-from open_webui.socket.main import get_active_user_ids
+from open_webui.socket.main import USER_POOL
 from open_webui.models.users import Users
+from open_webui.utils.write_buffer import CHAT_MESSAGE_WRITE_BUFFER
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
+from open_webui.retrieval.retrieval_cache import RETRIEVAL_CACHE
+from open_webui.retrieval.web.page_cache import WEB_PAGE_CACHE
 
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
 
@@ -67,6 +72,9 @@ def _build_meter_provider() -> MeterProvider:
         View(
             instrument_name="webui.users.active",
         ),
+        View(
+            instrument_name="webui.chat_save.*",
+        ),
     ]
 
     provider = MeterProvider(
@@ -100,7 +108,8 @@ def setup_metrics(app: FastAPI) -> None:
     ) -> Sequence[metrics.Observation]:
         return [
             metrics.Observation(
-                value=len(get_active_user_ids()),
+                # Runs in the exporter thread, off the event loop
+                value=len(USER_POOL.sync_keys()),
             )
         ]
 
@@ -127,6 +136,114 @@ def setup_metrics(app: FastAPI) -> None:
         callbacks=[observe_active_users],
     )
 
+    def observe_chat_save(key: str):
+        def callback(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [
+                metrics.Observation(
+                    value=CHAT_MESSAGE_WRITE_BUFFER.get_metrics()[key],
+                )
+            ]
+
+        return callback
+
+    meter.create_observable_counter(
+        name="webui.chat_save.writes",
+        description="Streamed message saves received by the write buffer",
+        unit="1",
+        callbacks=[observe_chat_save("writes")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.chat_save.flushes",
+        description="Message writes flushed to the database",
+        unit="1",
+        callbacks=[observe_chat_save("flushes")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.chat_save.flush_errors",
+        description="Message writes that failed to flush",
+        unit="1",
+        callbacks=[observe_chat_save("flush_errors")],
+    )
+
+    meter.create_observable_gauge(
+        name="webui.chat_save.pending",
+        description="Messages with buffered, unflushed changes",
+        unit="messages",
+        callbacks=[observe_chat_save("pending")],
+    )
+
+    meter.create_observable_gauge(
+        name="webui.chat_save.lag",
+        description="Age of the oldest unflushed message change",
+        unit="s",
+        callbacks=[observe_chat_save("max_pending_lag")],
+    )
+
+    def create_cache_instruments(name: str, cache, descriptions: dict[str, str]):
+        """Counters of the lookups and errors of a cache, and its hit rate."""
+
+        def observe_cache(key: str):
+            def callback(
+                options: metrics.CallbackOptions,
+            ) -> Sequence[metrics.Observation]:
+                return [metrics.Observation(value=cache.get_metrics()[key])]
+
+            return callback
+
+        for key, description in descriptions.items():
+            create_instrument = (
+                meter.create_observable_gauge
+                if key == "hit_rate"
+                else meter.create_observable_counter
+            )
+            create_instrument(
+                name=f"webui.{name}.{key}",
+                description=description,
+                unit="1",
+                callbacks=[observe_cache(key)],
+            )
+
+    if EMBEDDING_CACHE:
+        create_cache_instruments(
+            "embedding_cache",
+            EMBEDDING_CACHE,
+            {
+                "hits": "Embeddings served from the embedding cache",
+                "misses": "Embeddings computed by the embedding engine",
+                "errors": "Failed embedding cache operations",
+                "hit_rate": "Share of embedding lookups served from the cache",
+            },
+        )
+
+    if RETRIEVAL_CACHE:
+        create_cache_instruments(
+            "retrieval_cache",
+            RETRIEVAL_CACHE,
+            {
+                "hits": "Retrievals served from the retrieval cache",
+                "misses": "Retrievals searching the collections",
+                "errors": "Failed retrieval cache operations",
+                "hit_rate": "Share of retrievals served from the cache",
+            },
+        )
+
+    if WEB_PAGE_CACHE:
+        create_cache_instruments(
+            "web_page_cache",
+            WEB_PAGE_CACHE,
+            {
+                "hits": "Web pages served from the cache without a request",
+                "revalidated": "Cached web pages the server reported as not modified",
+                "misses": "Web pages fetched and parsed",
+                "errors": "Failed web page cache operations",
+                "hit_rate": "Share of web pages served from the cache",
+            },
+        )
+
     # FastAPI middleware
     @app.middleware("http")
     async def _metrics_middleware(request: Request, call_next):
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    REALTIME_CHAT_SAVE_INTERVAL,
+    REALTIME_CHAT_SAVE_MAX_BYTES,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
+
+def get_message_size(message: dict) -> int:
+    return sum(len(value) for value in message.values() if isinstance(value, str))
+
+
+class PendingMessage:
+    def __init__(self):
+        self.message = {}
+        self.statuses = []
+        # Latest known content, so appends don't have to read it back
+        self.content: Optional[str] = None
+        self.first_write_at = None
+        self.last_flush_at = time.monotonic()
+        self.flushed_size = 0
+        # Content was flushed without indexing the chat for search
+        self.unindexed = False
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class ChatMessageWriteBuffer:
+    """
+    Write-behind buffer for streamed message saves.
+
+    Keeps the latest state of every message being streamed and writes it to
+    the database at most once per `interval` seconds, or earlier once the
+    buffered content differs from the last write by `max_bytes`. Content
+    appends and status updates emitted while the message streams are
+    buffered the same way. Callers must `close` the message once the stream
+    is done, which also indexes the chat for search: flushes leave the
+    index stale, as indexing rewrites the text of the whole chat.
+    """
+
+    def __init__(self, interval: float, max_bytes: int):
+        self.interval = interval
+        self.max_bytes = max_bytes
+
+        self.pending: dict[tuple[str, str], PendingMessage] = {}
+
+        self.writes = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_flush_lag = 0.0
+
+    def get_pending(self, chat_id: str, message_id: str) -> PendingMessage:
+        key = (chat_id, message_id)
+        pending = self.pending.get(key)
+        if pending is None:
+            self.remove_idle()
+            pending = self.pending[key] = PendingMessage()
+        return pending
+
+    def remove_idle(self):
+        """Stop tracking messages that were flushed but never closed."""
+        now = time.monotonic()
+        for key, pending in list(self.pending.items()):
+            if pending.first_write_at is None and now - pending.last_flush_at > max(
+                60, self.interval * 10
+            ):
+                self.close(*key)
+
+    def write(self, chat_id: str, message_id: str, message: dict):
+        pending = self.get_pending(chat_id, message_id)
+
+        pending.message.update(message)
+        if isinstance(message.get("content"), str):
+            pending.content = message["content"]
+        self.schedule(chat_id, message_id, pending)
+
+    def append(self, chat_id: str, message_id: str, content: str):
+        """Append to the content of a message already in the database."""
+        pending = self.get_pending(chat_id, message_id)
+
+        if pending.content is None:
+            message = Chats.get_message_by_id_and_message_id(chat_id, message_id)
+            if message is None:
+                return
+            pending.content = message.get("content", "") or ""
+
+        self.write(chat_id, message_id, {"content": pending.content + content})
+
+    def add_status(self, chat_id: str, message_id: str, status: dict):
+        pending = self.get_pending(chat_id, message_id)
+
+        pending.statuses.append(status)
+        self.schedule(chat_id, message_id, pending)
+
+    def schedule(self, chat_id: str, message_id: str, pending: PendingMessage):
+        if pending.first_write_at is None:
+            pending.first_write_at = time.monotonic()
+        self.writes += 1
+
+        elapsed = time.monotonic() - pending.last_flush_at
+        if elapsed >= self.interval or (
+            "content" in pending.message
+            and abs(get_message_size(pending.message) - pending.flushed_size)
+            >= self.max_bytes
+        ):
+            self.flush(chat_id, message_id)
+        elif pending.timer is None:
+            try:
+                pending.timer = asyncio.get_running_loop().call_later(
+                    self.interval - elapsed, self.flush, chat_id, message_id
+                )
+            except RuntimeError:
+                # No running loop, nothing can flush later
+                self.flush(chat_id, message_id)
+
+    def flush(self, chat_id: str, message_id: str):
+        pending = self.pending.get((chat_id, message_id))
+        if pending is None:
+            return
+
+        if pending.timer is not None:
+            pending.timer.cancel()
+            pending.timer = None
+
+        if not pending.message and not pending.statuses:
+            return
+
+        message = pending.message
+        statuses = pending.statuses
+        lag = time.monotonic() - pending.first_write_at
+
+        pending.message = {}
+        pending.statuses = []
+        pending.first_write_at = None
+        pending.last_flush_at = time.monotonic()
+
+        success = True
+        if message:
+            if "content" in message:
+                pending.flushed_size = get_message_size(message)
+            success = bool(
+                Chats.upsert_message_to_chat_by_id_and_message_id(
+                    chat_id, message_id, message, index=False
+                )
+            )
+            pending.unindexed = pending.unindexed or "content" in message
+        if statuses:
+            success = (
+                bool(
+                    Chats.add_message_statuses_to_chat_by_id_and_message_id(
+                        chat_id, message_id, statuses
+                    )
+                )
+                and success
+            )
+
+        if success:
+            self.flushes += 1
+            self.last_flush_lag = lag
+        else:
+            self.flush_errors += 1
+            log.error(f"Error flushing message {chat_id}/{message_id}")
+
+    def close(self, chat_id: str, message_id: str):
+        """Flush the message, index its chat and stop tracking it."""
+        self.flush(chat_id, message_id)
+        pending = self.pending.pop((chat_id, message_id), None)
+        if pending is not None and pending.unindexed:
+            Chats.index_chat_by_id(chat_id)
+
+    def flush_all(self):
+        for chat_id, message_id in list(self.pending.keys()):
+            self.close(chat_id, message_id)
+
+    def get_metrics(self) -> dict:
+        now = time.monotonic()
+        return {
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "pending": sum(
+                1
+                for pending in self.pending.values()
+                if pending.message or pending.statuses
+            ),
+            "last_flush_lag": self.last_flush_lag,
+            "max_pending_lag": max(
+                (
+                    now - pending.first_write_at
+                    for pending in self.pending.values()
+                    if pending.first_write_at is not None
+                ),
+                default=0.0,
+            ),
+        }
+
+
+CHAT_MESSAGE_WRITE_BUFFER = ChatMessageWriteBuffer(
+    interval=REALTIME_CHAT_SAVE_INTERVAL,
+    max_bytes=REALTIME_CHAT_SAVE_MAX_BYTES,
+)
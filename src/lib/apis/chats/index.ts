@@ -77,11 +77,17 @@ export const importChat = async (
 	return res;
 };
 
-export const getChatList = async (token: string = '', page: number | null = null) => {
+export const getChatList = async (
+	token: string = '',
+	page: number | null = null,
+	cursor: string | null = null
+) => {
 	let error = null;
 	const searchParams = new URLSearchParams();
 
-	if (page !== null) {
+	if (cursor !== null) {
+		searchParams.append('cursor', cursor);
+	} else if (page !== null) {
 		searchParams.append('page', `${page}`);
 	}
 
@@ -381,6 +387,32 @@ export const getAllUserChats = async (token: string) => {
 	return res;
 };
 
+export const downloadAllUserChats = async (token: string) => {
+	let error = null;
+
+	const res = await fetch(`${WEBUI_API_BASE_URL}/chats/all/db?stream=true`, {
+		method: 'GET',
+		headers: {
+			...(token && { authorization: `Bearer ${token}` })
+		}
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.blob();
+		})
+		.catch((err) => {
+			error = err;
+			console.error(err);
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
+	return res;
+};
+
 export const getAllTags = async (token: string) => {
 	let error = null;
 